@@ -6,7 +6,7 @@ import argparse
 import json
 import sys
 import time
-from typing import Any, List
+from typing import Any, Iterator, List
 from pathlib import Path
 import difflib
 try:
@@ -16,18 +16,22 @@ except Exception:  # pragma: no cover - platform without readline
 
 from client_settings import ClientSettings
 from .ringer import ring
+from . import local_socket
 
 import requests
 
 HELP_TEXT = """\
 Available commands:
   create <seconds>     create a new timer
-  list                 list all timers
+  list [status]        list timers, optionally only running/paused/finished
   pause <id|all>       pause a timer or all timers
   resume <id|all>      resume a timer or all timers
   remove <id|all>      remove a timer or all timers
   clear/reset          remove all timers
   tick <seconds>       advance all timers
+  stats                show server engine statistics
+  export <file>        save all timers to an NDJSON file
+  import <file>        create timers from an NDJSON file
   help                 show this help message
   quit/exit            exit the shell
 """
@@ -41,6 +45,9 @@ COMMANDS: List[str] = [
     "clear",
     "reset",
     "tick",
+    "stats",
+    "export",
+    "import",
     "interactive",
     "help",
     "quit",
@@ -48,6 +55,20 @@ COMMANDS: List[str] = [
 ]
 
 SETTINGS_PATH = Path.home() / ".timercli" / "settings.db"
+# Timers requested per ``GET /timers`` call by ``list``.
+PAGE_SIZE = 500
+
+
+_sessions: dict[str, requests.Session] = {}
+
+
+def _session(base_url: str) -> requests.Session:
+    """Return a keep-alive session for ``base_url``, over its Unix socket if local."""
+    session = _sessions.get(base_url)
+    if session is None:
+        session = _sessions[base_url] = requests.Session()
+        local_socket.mount(session, base_url)
+    return session
 
 
 def _load_settings() -> ClientSettings:
@@ -64,35 +85,50 @@ def _ring_if_needed(base_url: str) -> None:
     ):
         return
     try:
-        for t in _get_timers(base_url).values():
-            if t.get("finished"):
-                try:
-                    requests.post("http://127.0.0.1:8800/ring", timeout=0.1)
-                except Exception:
-                    ring(settings.notify_sound, settings.volume, settings.mute)
-                break
+        resp = _session(base_url).get(
+            f"{base_url}/timers",
+            params={"status": "finished", "limit": 1, "fields": "finished"},
+            timeout=5,
+        )
+        resp.raise_for_status()
+        if resp.json()["timers"]:
+            try:
+                requests.post("http://127.0.0.1:8800/ring", timeout=0.1)
+            except Exception:
+                ring(settings.notify_sound, settings.volume, settings.mute)
     except requests.RequestException:
         pass
 
 
-def _get_timers(base_url: str) -> dict[str, Any]:
-    resp = requests.get(f"{base_url}/timers", timeout=5)
-    resp.raise_for_status()
-    return resp.json()
+def iter_timer_pages(
+    base_url: str, status: str | None = None, page_size: int = PAGE_SIZE
+) -> Iterator[dict[str, Any]]:
+    """Yield the timers page by page so large lists are never fetched at once."""
+    params: dict[str, Any] = {"limit": page_size}
+    if status:
+        params["status"] = status
+    while True:
+        resp = _session(base_url).get(f"{base_url}/timers", params=params, timeout=5)
+        resp.raise_for_status()
+        data = resp.json()
+        yield data["timers"]
+        if data["next_cursor"] is None:
+            return
+        params["cursor"] = data["next_cursor"]
 
 
 def pause_all_timers(base_url: str) -> None:
-    requests.post(f"{base_url}/timers/pause_all", timeout=5).raise_for_status()
+    _session(base_url).post(f"{base_url}/timers/pause_all", timeout=5).raise_for_status()
     print("paused all")
 
 
 def resume_all_timers(base_url: str) -> None:
-    requests.post(f"{base_url}/timers/resume_all", timeout=5).raise_for_status()
+    _session(base_url).post(f"{base_url}/timers/resume_all", timeout=5).raise_for_status()
     print("resumed all")
 
 
 def remove_all_timers(base_url: str) -> None:
-    requests.delete(f"{base_url}/timers", timeout=5).raise_for_status()
+    _session(base_url).delete(f"{base_url}/timers", timeout=5).raise_for_status()
     print("removed all")
 
 
@@ -118,7 +154,7 @@ def handle_request_error(exc: requests.RequestException, base_url: str) -> None:
 
 def create_timer(base_url: str, duration: float) -> int:
     """Create a new timer and return its identifier."""
-    resp = requests.post(
+    resp = _session(base_url).post(
         f"{base_url}/timers", params={"duration": duration}, timeout=5
     )
     resp.raise_for_status()
@@ -127,42 +163,92 @@ def create_timer(base_url: str, duration: float) -> int:
     return int(timer_id)
 
 
-def list_timers(base_url: str) -> dict[str, Any]:
-    """List all timers and print JSON to stdout."""
-    data = _get_timers(base_url)
+def list_timers(base_url: str, status: str | None = None) -> dict[str, Any]:
+    """List timers, optionally of one status, and print JSON to stdout."""
+    data: dict[str, Any] = {}
+    for page in iter_timer_pages(base_url, status):
+        data.update(page)
     print(json.dumps(data))
     return data
 
 
+def stream_timers(base_url: str, status: str | None = None) -> int:
+    """Print timers as NDJSON while paging and return how many were listed.
+
+    Each line has the ``id`` and fields of one timer, as in ``export``.
+    """
+    count = 0
+    for page in iter_timer_pages(base_url, status):
+        for tid, info in page.items():
+            print(json.dumps({"id": int(tid), **info}))
+        count += len(page)
+    return count
+
+
 def pause_timer(base_url: str, timer_id: int) -> None:
     """Pause the specified timer."""
-    resp = requests.post(f"{base_url}/timers/{timer_id}/pause", timeout=5)
+    resp = _session(base_url).post(f"{base_url}/timers/{timer_id}/pause", timeout=5)
     resp.raise_for_status()
     print("paused")
 
 
 def resume_timer(base_url: str, timer_id: int) -> None:
     """Resume the specified timer."""
-    resp = requests.post(f"{base_url}/timers/{timer_id}/resume", timeout=5)
+    resp = _session(base_url).post(f"{base_url}/timers/{timer_id}/resume", timeout=5)
     resp.raise_for_status()
     print("resumed")
 
 
 def remove_timer(base_url: str, timer_id: int) -> None:
     """Remove a timer."""
-    resp = requests.delete(f"{base_url}/timers/{timer_id}", timeout=5)
+    resp = _session(base_url).delete(f"{base_url}/timers/{timer_id}", timeout=5)
     resp.raise_for_status()
     print("removed")
 
 
 def tick(base_url: str, seconds: float) -> None:
     """Advance all timers by ``seconds``."""
-    resp = requests.post(f"{base_url}/tick", params={"seconds": seconds}, timeout=5)
+    resp = _session(base_url).post(f"{base_url}/tick", params={"seconds": seconds}, timeout=5)
     resp.raise_for_status()
     print("ticked")
     _ring_if_needed(base_url)
 
 
+def engine_stats(base_url: str) -> dict[str, Any]:
+    """Print the server's TimerManager operation statistics as JSON."""
+    resp = _session(base_url).get(f"{base_url}/debug/engine", timeout=5)
+    resp.raise_for_status()
+    data = resp.json()
+    print(json.dumps(data, indent=2))
+    return data
+
+
+def export_timers(base_url: str, path: str) -> None:
+    """Stream all timers from the server into an NDJSON file."""
+    with _session(base_url).get(f"{base_url}/timers/export", stream=True, timeout=30) as resp:
+        resp.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in resp.iter_content(chunk_size=64 * 1024):
+                f.write(chunk)
+    print("exported")
+
+
+def import_timers(base_url: str, path: str, preserve_ids: bool = False) -> dict[str, Any]:
+    """Upload an NDJSON file without reading it into memory at once."""
+    with open(path, "rb") as f:
+        resp = _session(base_url).post(
+            f"{base_url}/timers/import",
+            params={"preserve_ids": preserve_ids},
+            data=f,
+            headers={"Content-Type": "application/x-ndjson"},
+            timeout=300,
+        )
+    resp.raise_for_status()
+    data = resp.json()
+    print(json.dumps(data))
+    return data
+
+
 def interactive(base_url: str) -> None:
     """Run an interactive shell for sending timer commands."""
     if readline:
@@ -190,8 +276,8 @@ def interactive(base_url: str) -> None:
                 continue
             if cmd == "create" and len(args) == 1:
                 create_timer(base_url, float(args[0]))
-            elif cmd == "list" and not args:
-                list_timers(base_url)
+            elif cmd == "list" and len(args) <= 1:
+                list_timers(base_url, *args)
             elif cmd == "pause" and len(args) == 1 and args[0] == "all":
                 pause_all_timers(base_url)
             elif cmd == "resume" and len(args) == 1 and args[0] == "all":
@@ -206,6 +292,12 @@ def interactive(base_url: str) -> None:
                 remove_timer(base_url, int(args[0]))
             elif cmd in {"clear", "reset"} and not args:
                 clear_timers(base_url)
+            elif cmd == "stats" and not args:
+                engine_stats(base_url)
+            elif cmd == "export" and len(args) == 1:
+                export_timers(base_url, args[0])
+            elif cmd == "import" and len(args) == 1:
+                import_timers(base_url, args[0])
             elif cmd == "tick":
                 if len(args) == 1:
                     tick(base_url, float(args[0]))
@@ -229,6 +321,9 @@ def main() -> None:
     parser.add_argument("args", nargs="*")
     default_url = ClientSettings.load(SETTINGS_PATH).server_url
     parser.add_argument("--url", default=default_url, help="API server base URL")
+    parser.add_argument(
+        "--ndjson", action="store_true", help="Stream 'list' output as one timer per line"
+    )
     parsed = parser.parse_args()
 
     base_url = parsed.url.rstrip("/")
@@ -239,8 +334,10 @@ def main() -> None:
     try:
         if parsed.command == "create" and len(parsed.args) == 1:
             create_timer(base_url, float(parsed.args[0]))
-        elif parsed.command == "list" and len(parsed.args) == 0:
-            list_timers(base_url)
+        elif parsed.command == "list" and len(parsed.args) <= 1 and parsed.ndjson:
+            stream_timers(base_url, *parsed.args)
+        elif parsed.command == "list" and len(parsed.args) <= 1:
+            list_timers(base_url, *parsed.args)
         elif parsed.command == "pause" and parsed.args == ["all"]:
             pause_all_timers(base_url)
         elif parsed.command == "resume" and parsed.args == ["all"]:
@@ -255,6 +352,12 @@ def main() -> None:
             remove_timer(base_url, int(parsed.args[0]))
         elif parsed.command in {"clear", "reset"}:
             clear_timers(base_url)
+        elif parsed.command == "stats" and not parsed.args:
+            engine_stats(base_url)
+        elif parsed.command == "export" and len(parsed.args) == 1:
+            export_timers(base_url, parsed.args[0])
+        elif parsed.command == "import" and len(parsed.args) == 1:
+            import_timers(base_url, parsed.args[0])
         elif parsed.command == "tick":
             if len(parsed.args) == 1:
                 tick(base_url, float(parsed.args[0]))
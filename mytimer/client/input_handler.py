@@ -22,7 +22,7 @@ import httpx
 HELP_TEXT = """\
 Available commands:
   create <seconds>  create a new timer
-  list              list all timers
+  list [status]     list timers, optionally only running/paused/finished
   pause <id|all>    pause a timer or all timers
   resume <id|all>   resume a timer or all timers
   remove <id|all>   remove a timer or all timers
@@ -48,6 +48,8 @@ COMMANDS: List[str] = [
 ]
 
 SETTINGS_PATH = Path.home() / ".timercli" / "settings.db"
+# Timers requested per ``GET /timers`` call by ``list``.
+PAGE_SIZE = 500
 
 
 def _load_settings() -> ClientSettings:
@@ -83,6 +85,23 @@ async def _get_timers(service: "SyncService") -> dict[str, Any]:
     return resp.json()
 
 
+async def list_timers(service: "SyncService", status: str | None = None) -> dict[str, Any]:
+    """Fetch timers page by page and print them as one JSON object."""
+    params: dict[str, Any] = {"limit": PAGE_SIZE}
+    if status:
+        params["status"] = status
+    timers: dict[str, Any] = {}
+    while True:
+        resp = await service.client.get("/timers", params=params)
+        resp.raise_for_status()
+        data = resp.json()
+        timers.update(data["timers"])
+        if data["next_cursor"] is None:
+            print(json.dumps(timers))
+            return timers
+        params["cursor"] = data["next_cursor"]
+
+
 async def pause_all_timers(service: "SyncService") -> None:
     await service.pause_all()
     print("paused all")
@@ -141,9 +160,8 @@ class InputHandler:
             elif cmd == "create" and len(args) == 1:
                 timer_id = await self.service.create_timer(float(args[0]))
                 print(timer_id)
-            elif cmd == "list" and len(args) == 0:
-                data = await _get_timers(self.service)
-                print(json.dumps(data))
+            elif cmd == "list" and len(args) <= 1:
+                await list_timers(self.service, *args)
             elif cmd == "pause" and len(args) == 1 and args[0] == "all":
                 await pause_all_timers(self.service)
             elif cmd == "resume" and len(args) == 1 and args[0] == "all":
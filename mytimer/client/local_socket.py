@@ -0,0 +1,138 @@
+"""Reach a server on the same host through its Unix domain socket.
+
+When the server runs with ``MYTIMER_UNIX_SOCKET`` (``python tools/manage.py
+start --unix-socket``) it also listens on a Unix socket.  Clients configured
+with a loopback URL use that socket instead of TCP when it is accepting
+connections, and fall back to the URL otherwise.
+
+The socket path is taken from ``MYTIMER_UNIX_SOCKET`` when set, otherwise
+from :func:`default_socket_path` for the port in the URL.  Setting the
+variable to ``off`` disables the lookup.  Only sockets owned by the current
+user are used, so another account cannot stand in for the server.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import os
+import socket
+import stat
+import tempfile
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+
+ENV_VAR = "MYTIMER_UNIX_SOCKET"
+DISABLED = "off"
+
+
+def socket_dir() -> str:
+    """Return the per-user directory holding the sockets of local servers.
+
+    ``$XDG_RUNTIME_DIR/mytimer`` when the variable is set, otherwise
+    ``mytimer-<uid>`` in the temporary directory.  The server creates it with
+    mode ``0700``.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "mytimer")
+    return os.path.join(tempfile.gettempdir(), f"mytimer-{os.getuid()}")
+
+
+def default_socket_path(port: int) -> str:
+    """Return the socket path used for the server on TCP ``port``."""
+    return os.path.join(socket_dir(), f"{port}.sock")
+
+
+def is_local_url(base_url: str) -> bool:
+    """Return ``True`` if ``base_url`` points at this host."""
+    host = urlsplit(base_url).hostname or ""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def resolve(base_url: str) -> str | None:
+    """Return the Unix socket serving ``base_url``, or ``None`` to use TCP."""
+    configured = os.environ.get(ENV_VAR)
+    if configured == DISABLED or not is_local_url(base_url):
+        return None
+    if configured:
+        path = configured
+    else:
+        parts = urlsplit(base_url)
+        port = parts.port or (443 if parts.scheme in ("https", "wss") else 80)
+        path = default_socket_path(port)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        return None
+    # A socket file left behind by a crashed server refuses connections.
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(0.5)
+        try:
+            sock.connect(path)
+        except OSError:
+            return None
+    return path
+
+
+class _UnixConnection(HTTPConnection):
+    def __init__(self, *args, socket_path: str, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.socket_path = socket_path
+
+    def _new_conn(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if isinstance(self.timeout, (int, float)):
+            sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+
+class _UnixConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _UnixConnection
+
+
+class UnixSocketAdapter(HTTPAdapter):
+    """``requests`` transport adapter sending every request to ``path``."""
+
+    def __init__(self, path: str, pool_maxsize: int = 10) -> None:
+        super().__init__(pool_maxsize=pool_maxsize)
+        self.path = path
+        self._pool = _UnixConnectionPool(
+            "localhost", maxsize=pool_maxsize, socket_path=path
+        )
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        return self._pool
+
+    def get_connection(self, url, proxies=None):  # requests < 2.32
+        return self._pool
+
+    def close(self) -> None:
+        self._pool.close()
+        super().close()
+
+
+def mount(session: requests.Session, base_url: str) -> str | None:
+    """Route ``session`` requests for ``base_url`` over its Unix socket.
+
+    Returns the socket path, or ``None`` if the session keeps using TCP.
+    """
+    path = resolve(base_url)
+    if path is not None:
+        session.mount(base_url.rstrip("/") + "/", UnixSocketAdapter(path))
+    return path
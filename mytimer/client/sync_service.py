@@ -8,19 +8,30 @@ methods to control timers through the REST API.
 from __future__ import annotations
 
 import asyncio
+import itertools
 import json
-from dataclasses import dataclass
-from typing import Dict, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
 import time
 from pathlib import Path
 import json as _json
 import contextlib
+from urllib.parse import urlencode
 
+from ..core import binary_codec
+from ..core.frame_compression import decompress_frame, is_compressed
+from ..core.loop_monitor import LoopLagMonitor
+from ..core.clock_sync import ClockOffset
 from ..core.timer_manager import TimerManager
+from . import local_socket
 
 import httpx
 import websockets
 
+# Messages whose ``seq`` a reconnect can resume from: deltas and the start of
+# a snapshot. Snapshot chunks repeat the snapshot's seq while newer deltas
+# interleave with them.
+RESUME_POINTS = {"update", "remove", "snapshot_begin"}
 
 @dataclass
 class TimerState:
@@ -32,15 +43,44 @@ class TimerState:
     finished: bool
     created_at: float
     start_at: float | None
+    # Offset of the server clock ``start_at`` was taken on; ``None`` for
+    # timers kept on the local clock.
+    clock: ClockOffset | None = field(default=None, repr=False, compare=False)
 
-    def remaining_now(self) -> float:
+    def remaining_now(self, now: float | None = None) -> float:
+        """Return the remaining time at ``now`` on the server clock.
+
+        ``now`` defaults to the current server time as estimated by
+        :attr:`clock`, or the local time if the state has no clock.
+        """
         if self.running and self.start_at is not None:
-            return max(0.0, self.duration - (time.time() - self.start_at))
+            if now is None:
+                now = self.clock.now() if self.clock is not None else time.time()
+            return max(0.0, self.duration - (now - self.start_at))
         return self.remaining
 
 
+class CommandError(Exception):
+    """A WebSocket command was rejected by the server."""
+
+    def __init__(self, status: int, detail: str, retry_after: float | None = None) -> None:
+        super().__init__(f"{status}: {detail}")
+        self.status = status
+        self.detail = detail
+        self.retry_after = retry_after
+
+
 class SyncService:
-    """Maintain timer state synchronization via WebSocket or HTTP polling."""
+    """Maintain timer state synchronization via WebSocket or HTTP polling.
+
+    Transports are tried in order of efficiency: WebSocket push, then HTTP
+    long-polling of ``/timers/changes`` (useful behind proxies that drop
+    WebSockets), then fixed-interval polling of ``/timers``.
+
+    ``compress``, ``chunked_snapshot``, ``ws_commands`` and ``unix_socket``
+    are off by default so the client also works with servers that predate
+    them; enable them when the server is known to support them.
+    """
 
     def __init__(
         self,
@@ -48,7 +88,16 @@ class SyncService:
         reconnect_interval: float = 1.0,
         *,
         use_websocket: bool = True,
+        use_long_poll: bool = True,
+        long_poll_timeout: float = 30.0,
+        binary: bool = False,
+        compress: bool = False,
         storage_path: Path | None = None,
+        monitor_loop: bool = False,
+        clock_sync_interval: float = 30.0,
+        chunked_snapshot: bool = False,
+        ws_commands: bool = False,
+        unix_socket: bool = False,
     ) -> None:
         self.base_url = base_url.rstrip("/")
         self.ws_url = self.base_url.replace("http", "ws", 1) + "/ws"
@@ -57,17 +106,55 @@ class SyncService:
         # which ``httpx`` does not understand without optional dependencies.
         # To avoid startup failures like ``ValueError: Unknown scheme for proxy
         # URL ...`` we disable usage of environment proxy variables.
-        self.client = httpx.AsyncClient(base_url=self.base_url, trust_env=False)
+        # A server on this host is reached over its Unix socket when it
+        # offers one; requests keep the configured URL for ``Host``.
+        self.unix_socket = local_socket.resolve(self.base_url) if unix_socket else None
+        transport = (
+            httpx.AsyncHTTPTransport(uds=self.unix_socket) if self.unix_socket else None
+        )
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url, trust_env=False, transport=transport
+        )
         self.state: Dict[str, TimerState] = {}
         self._ws: Optional[websockets.WebSocketClientProtocol] = None
         self._recv_task: Optional[asyncio.Task[None]] = None
         self._running = False
         self.reconnect_interval = reconnect_interval
         self.use_websocket = use_websocket
+        self.use_long_poll = use_long_poll
+        # Offer the compact binary WebSocket subprotocol; JSON stays default.
+        self.binary = binary
+        # Ask the server to deflate large frames; small deltas stay raw.
+        self.compress = compress
+        self.long_poll_timeout = long_poll_timeout
+        # Change feed position used by the long-poll transport.
+        self.version = 0
+        self._epoch: str | None = None
+        # Active WebSocket topic filter, re-sent after reconnecting.
+        self._subscription: Dict[str, list] | None = None
         self.connected = False
         self.local_mode = False
         self._storage_path = storage_path or Path.home() / ".timercli" / "timers.json"
         self._manager: TimerManager | None = None
+        # Optional probe reporting callbacks that stall message handling.
+        self.loop_monitor = LoopLagMonitor() if monitor_loop else None
+        # Estimated offset of the server clock; ``start_at`` values are
+        # server timestamps, so countdowns are computed on that clock.
+        self.clock = ClockOffset()
+        self.clock_sync_interval = clock_sync_interval
+        self._clock_task: Optional[asyncio.Task[None]] = None
+        # Receive the initial WebSocket snapshot in ordered chunks instead of
+        # fetching all timers over HTTP first.
+        self.chunked_snapshot = chunked_snapshot
+        self._snapshot_open = False
+        self._snapshot_started = asyncio.Event()
+        # Send timer operations over the open WebSocket when the server
+        # announces support in ``hello``; acks are matched by command id.
+        self.ws_commands = ws_commands
+        self._commands_available = False
+        self._acks: Dict[int, asyncio.Future] = {}
+        self._command_ids = itertools.count(1)
+        self.command_timeout = 10.0
 
 
     async def connect(self) -> None:
@@ -75,37 +162,107 @@ class SyncService:
         if self._recv_task:
             return
         self._running = True
+        if self.loop_monitor is not None:
+            await self.loop_monitor.start()
         try:
-            if self.use_websocket:
-                self._ws = await websockets.connect(self.ws_url)
+            if self.use_websocket and await self._connect_websocket():
                 self.connected = True
                 self._recv_task = asyncio.create_task(self._recv_loop())
+                if not await self._wait_first_chunk():
+                    await self._fetch_state()
             else:
                 await self.client.get("/status")
-                self._recv_task = asyncio.create_task(self._poll_loop())
-            await self._fetch_state()
+                if self.use_long_poll:
+                    self._recv_task = asyncio.create_task(self._long_poll_loop())
+                else:
+                    self._recv_task = asyncio.create_task(self._poll_loop())
+                await self._fetch_state()
             self.local_mode = False
+            if self.clock_sync_interval > 0:
+                self._clock_task = asyncio.create_task(self._clock_loop())
         except Exception:
-            self.local_mode = True
-            self.connected = False
-            self._manager = TimerManager()
-            self._manager.load_state(self._storage_path)
-            self.state = {
-                str(tid): TimerState(
-                    duration=t.duration,
-                    remaining=t.remaining,
-                    running=t.running,
-                    finished=t.finished,
-                    created_at=t.created_at,
-                    start_at=t.start_at,
+            self._enter_local_mode()
+
+    def _enter_local_mode(self) -> None:
+        """Switch to the offline :class:`TimerManager` backed by local storage."""
+        self.local_mode = True
+        self.connected = False
+        self._manager = TimerManager()
+        self._manager.load_state(self._storage_path)
+        self.state = {
+            str(tid): TimerState(
+                duration=t.duration,
+                remaining=t.remaining,
+                running=t.running,
+                finished=t.finished,
+                created_at=t.created_at,
+                start_at=t.start_at,
+            )
+            for tid, t in self._manager.timers.items()
+        }
+
+    async def _wait_first_chunk(self, timeout: float = 5.0) -> bool:
+        """Wait until the first rows of a chunked snapshot arrived."""
+        if not self.chunked_snapshot:
+            return False
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._snapshot_started.wait(), timeout)
+        return self._snapshot_started.is_set()
+
+    async def _drop_unix_socket(self) -> None:
+        """Switch the HTTP client and later WebSocket connects back to TCP."""
+        self.unix_socket = None
+        old, self.client = self.client, httpx.AsyncClient(
+            base_url=self.base_url, trust_env=False
+        )
+        await old.aclose()
+
+    async def _open_websocket(self, resume: bool = False) -> websockets.WebSocketClientProtocol:
+        """Open the WebSocket, asking to resume after ``self.version`` if ``resume``."""
+        subprotocols = [binary_codec.SUBPROTOCOL] if self.binary else None
+        params: Dict[str, object] = {"seq": 1}
+        if self.chunked_snapshot:
+            params["snapshot"] = "chunked"
+        if resume and self._epoch is not None:
+            params.update(since=self.version, epoch=self._epoch)
+        kwargs: Dict[str, object] = {}
+        if self.compress:
+            # The server compresses frames above its size threshold itself,
+            # so transport-level permessage-deflate would only add CPU cost.
+            params["compress"] = "deflate"
+            kwargs["compression"] = None
+        url = f"{self.ws_url}?{urlencode(params)}"
+        if self.unix_socket:
+            try:
+                return await websockets.unix_connect(
+                    self.unix_socket, url, subprotocols=subprotocols, **kwargs
                 )
-                for tid, t in self._manager.timers.items()
-            }
+            except OSError:
+                # The server restarted without its socket; stay on TCP.
+                await self._drop_unix_socket()
+        return await websockets.connect(url, subprotocols=subprotocols, **kwargs)
+
+    async def _connect_websocket(self) -> bool:
+        """Try to open the WebSocket, returning ``False`` if it is unreachable.
+
+        Without a long-poll fallback the error propagates so callers drop
+        straight to plain polling or local mode as before.
+        """
+        try:
+            self._ws = await self._open_websocket()
+        except Exception:
+            if not self.use_long_poll:
+                raise
+            self._ws = None
+            return False
+        return True
 
     async def _fetch_state(self) -> None:
         resp = await self.client.get("/timers")
         resp.raise_for_status()
         data = resp.json()
+        self.version = int(resp.headers.get("X-Timer-Version", 0))
+        self._epoch = resp.headers.get("X-Timer-Epoch")
         self.state = {
             str(tid): TimerState(
                 duration=info["duration"],
@@ -114,14 +271,60 @@ class SyncService:
                 finished=info.get("finished", False),
                 created_at=info.get("created_at", time.time()),
                 start_at=info.get("start_at"),
+                clock=self.clock,
             )
             for tid, info in data.items()
         }
 
-    def _handle_message(self, message: str) -> None:
-        data = json.loads(message)
+    def _handle_message(self, message: str | bytes) -> None:
+        if isinstance(message, bytes) and is_compressed(message):
+            message = decompress_frame(message)
+        if isinstance(message, bytes):
+            data = binary_codec.decode_message(message)
+        else:
+            data = json.loads(message)
+        if isinstance(data, list):
+            for item in data:
+                self._handle_data(item)
+        else:
+            self._handle_data(data)
+
+    def _handle_data(self, data) -> None:
         if isinstance(data, dict) and "type" in data:
-            if data.get("type") == "update":
+            seq = data.get("seq")
+            if isinstance(seq, int) and data.get("type") in RESUME_POINTS:
+                # The server sends messages in sequence order, so the last
+                # seq is the one to resume from; should an older one still
+                # arrive late, resuming from it replays what followed.
+                self.version = seq
+            if data.get("type") == "hello":
+                if data.get("epoch") != self._epoch:
+                    self.version = data.get("seq", 0)
+                self._epoch = data.get("epoch")
+                self._commands_available = bool(data.get("commands"))
+            elif data.get("type") == "heartbeat":
+                # The server reaps numbered connections that stay silent.
+                asyncio.get_running_loop().create_task(self._send_ws({"type": "heartbeat"}))
+            elif data.get("type") == "ack":
+                fut = self._acks.pop(data.get("id"), None)
+                if fut is not None and not fut.done():
+                    fut.set_result(data)
+            elif data.get("type") == "snapshot":
+                self.version = data.get("seq", self.version)
+                self._replace_state(data.get("timers", {}))
+                self._snapshot_started.set()
+            elif data.get("type") == "snapshot_begin":
+                # Until ``snapshot_end`` the state is incomplete, so a
+                # reconnect must not resume from this version.
+                self._snapshot_open = True
+                self.state = {}
+            elif data.get("type") == "snapshot_chunk":
+                self._merge_state(data.get("timers", {}))
+                self._snapshot_started.set()
+            elif data.get("type") == "snapshot_end":
+                self._snapshot_open = False
+                self._snapshot_started.set()
+            elif data.get("type") == "update":
                 tid = str(data["timer_id"])
                 state = self.state.get(tid)
                 if state:
@@ -139,26 +342,44 @@ class SyncService:
                         finished=data.get("finished", False),
                         created_at=data.get("created_at", time.time()),
                         start_at=data.get("start_at"),
+                        clock=self.clock,
                     )
+            elif data.get("type") == "remove":
+                self.state.pop(str(data["timer_id"]), None)
+            elif data.get("type") == "pong":
+                with contextlib.suppress(KeyError, TypeError, ValueError):
+                    self.clock.add_sample(data["t0"], data["t1"], data["t2"], time.time())
         else:
-            self.state = {
-                str(tid): TimerState(
-                    duration=info["duration"],
-                    remaining=info.get("remaining", info["duration"]),
-                    running=info.get("running", info.get("start_at") is not None),
-                    finished=info.get("finished", False),
-                    created_at=info.get("created_at", time.time()),
-                    start_at=info.get("start_at"),
-                )
-                for tid, info in data.items()
-            }
+            self._replace_state(data)
+
+    def _replace_state(self, data: dict) -> None:
+        self.state = {}
+        self._merge_state(data)
+
+    def _merge_state(self, data: dict) -> None:
+        for tid, info in data.items():
+            self.state[str(tid)] = TimerState(
+                duration=info["duration"],
+                remaining=info.get("remaining", info["duration"]),
+                running=info.get("running", info.get("start_at") is not None),
+                finished=info.get("finished", False),
+                created_at=info.get("created_at", time.time()),
+                start_at=info.get("start_at"),
+                clock=self.clock,
+            )
 
     async def _recv_loop(self) -> None:
         while self._running:
             try:
                 if self._ws is None:
-                    self._ws = await websockets.connect(self.ws_url)
-                    await self._fetch_state()
+                    # Resume from the last seen message number; the server
+                    # replays what was missed or falls back to a snapshot,
+                    # so only clients that never synced download everything.
+                    resume = self._epoch is not None and not self._snapshot_open
+                    self._ws = await self._open_websocket(resume=resume)
+                    if not resume and not self.chunked_snapshot:
+                        await self._fetch_state()
+                    await self._send_subscription()
                 async for message in self._ws:
                     self._handle_message(message)
             except websockets.ConnectionClosed:
@@ -167,23 +388,11 @@ class SyncService:
             except Exception:
                 if not self._running:
                     break
-                self.local_mode = True
-                self.connected = False
-                self._manager = TimerManager()
-                self._manager.load_state(self._storage_path)
-                self.state = {
-                    str(tid): TimerState(
-                        duration=t.duration,
-                        remaining=t.remaining,
-                        running=t.running,
-                        finished=t.finished,
-                        created_at=t.created_at,
-                        start_at=t.start_at,
-                    )
-                    for tid, t in self._manager.timers.items()
-                }
+                self._enter_local_mode()
                 return
             finally:
+                self._commands_available = False
+                self._fail_commands()
                 if self._ws:
                     with contextlib.suppress(Exception):
                         await self._ws.close()
@@ -191,6 +400,97 @@ class SyncService:
             if self._running:
                 await asyncio.sleep(self.reconnect_interval)
 
+    async def subscribe(
+        self, timers: list[int] | None = None, status: list[str] | None = None
+    ) -> None:
+        """Only receive WebSocket updates for ``timers`` and ``status`` classes.
+
+        Status classes are ``running``, ``paused`` and ``finished``. Topics
+        accumulate across calls and are restored after a reconnect.
+        """
+        sub = self._subscription or {"timers": [], "status": []}
+        sub["timers"] = sorted(set(sub["timers"]) | {int(t) for t in timers or []})
+        sub["status"] = sorted(set(sub["status"]) | set(status or []))
+        self._subscription = sub
+        await self._send_ws({"type": "subscribe", **sub})
+
+    async def unsubscribe(
+        self, timers: list[int] | None = None, status: list[str] | None = None
+    ) -> None:
+        """Drop topics; without arguments receive every update again."""
+        if not timers and not status:
+            self._subscription = None
+            await self._send_ws({"type": "unsubscribe"})
+            return
+        if self._subscription is not None:
+            drop_timers = {int(t) for t in timers or []}
+            drop_status = set(status or [])
+            self._subscription["timers"] = [
+                t for t in self._subscription["timers"] if t not in drop_timers
+            ]
+            self._subscription["status"] = [
+                s for s in self._subscription["status"] if s not in drop_status
+            ]
+        await self._send_ws(
+            {"type": "unsubscribe", "timers": list(timers or []), "status": list(status or [])}
+        )
+
+    async def _send_subscription(self) -> None:
+        if self._subscription is not None:
+            await self._send_ws({"type": "subscribe", **self._subscription})
+
+    async def _send_ws(self, message: dict) -> None:
+        if self._ws is not None:
+            with contextlib.suppress(websockets.ConnectionClosed):
+                await self._ws.send(json.dumps(message))
+
+    def _apply_changes(self, data: dict) -> None:
+        """Merge a ``/timers/changes`` response into the local state."""
+        timers = data.get("timers", {})
+        if data.get("reset"):
+            self.state = {}
+        for tid, info in timers.items():
+            if info is None:
+                self.state.pop(str(tid), None)
+                continue
+            self.state[str(tid)] = TimerState(
+                duration=info["duration"],
+                remaining=info.get("remaining", info["duration"]),
+                running=info.get("running", info.get("start_at") is not None),
+                finished=info.get("finished", False),
+                created_at=info.get("created_at", time.time()),
+                start_at=info.get("start_at"),
+                clock=self.clock,
+            )
+        self.version = data.get("version", self.version)
+        self._epoch = data.get("epoch", self._epoch)
+
+    async def _long_poll_loop(self) -> None:
+        while self._running:
+            params: Dict[str, object] = {
+                "since": self.version,
+                "timeout": self.long_poll_timeout,
+            }
+            if self._epoch is not None:
+                params["epoch"] = self._epoch
+            try:
+                resp = await self.client.get(
+                    "/timers/changes",
+                    params=params,
+                    timeout=self.long_poll_timeout + 5,
+                )
+                if resp.status_code == 404:
+                    # Server without a change feed; degrade to plain polling.
+                    await self._poll_loop()
+                    return
+                resp.raise_for_status()
+                self._apply_changes(resp.json())
+            except Exception:
+                if not self._running:
+                    break
+                self._enter_local_mode()
+                return
+
     async def _poll_loop(self) -> None:
         while self._running:
             try:
@@ -198,27 +498,49 @@ class SyncService:
             except Exception:
                 if not self._running:
                     break
-                self.local_mode = True
-                self.connected = False
-                self._manager = TimerManager()
-                self._manager.load_state(self._storage_path)
-                self.state = {
-                    str(tid): TimerState(
-                        duration=t.duration,
-                        remaining=t.remaining,
-                        running=t.running,
-                        finished=t.finished,
-                        created_at=t.created_at,
-                        start_at=t.start_at,
-                    )
-                    for tid, t in self._manager.timers.items()
-                }
+                self._enter_local_mode()
                 return
             await asyncio.sleep(self.reconnect_interval)
 
+    def server_now(self) -> float:
+        """Return the current time on the server clock."""
+        if self.local_mode:
+            return time.time()
+        return self.clock.now()
+
+    async def sync_clock(self, samples: int = 4) -> float:
+        """Measure the server clock offset over HTTP and return it."""
+        for _ in range(samples):
+            t0 = time.time()
+            resp = await self.client.get("/time", params={"t0": t0})
+            t3 = time.time()
+            resp.raise_for_status()
+            data = resp.json()
+            self.clock.add_sample(t0, data["t1"], data["t2"], t3)
+        return self.clock.offset
+
+    async def _clock_loop(self) -> None:
+        """Keep the clock offset fresh with WebSocket or HTTP pings."""
+        with contextlib.suppress(Exception):
+            await self.sync_clock()
+        while self._running:
+            await asyncio.sleep(self.clock_sync_interval)
+            try:
+                if self._ws is not None:
+                    await self._send_ws({"type": "ping", "t0": time.time()})
+                else:
+                    await self.sync_clock(samples=1)
+            except Exception:
+                pass
+
     async def close(self) -> None:
         """Close WebSocket connection and HTTP client."""
         self._running = False
+        if self._clock_task is not None:
+            self._clock_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._clock_task
+            self._clock_task = None
         if self._ws is not None:
             await self._ws.close()
             self._ws = None
@@ -228,10 +550,56 @@ class SyncService:
             with contextlib.suppress(asyncio.CancelledError):
                 await self._recv_task
             self._recv_task = None
+        if self.loop_monitor is not None:
+            await self.loop_monitor.stop()
         await self.client.aclose()
         if self.local_mode and self._manager is not None:
             self._manager.save_state(self._storage_path)
 
+    def _fail_commands(self) -> None:
+        acks, self._acks = self._acks, {}
+        for fut in acks.values():
+            if not fut.done():
+                fut.set_exception(ConnectionError("WebSocket closed before the command was acknowledged"))
+
+    async def _ws_command(self, op: str, **args: Any) -> tuple[bool, Any]:
+        """Run ``op`` over the WebSocket command channel.
+
+        Returns ``(False, None)`` when the channel is unavailable so the
+        caller can fall back to HTTP, otherwise ``(True, result)``. Several
+        commands may be awaited concurrently; they are pipelined on the
+        connection.
+
+        Raises
+        ------
+        CommandError
+            If the server rejected the command.
+        ConnectionError
+            If the connection closed after the command was sent.
+        asyncio.TimeoutError
+            If no ack arrived within ``command_timeout`` seconds.
+        """
+        ws = self._ws
+        if not (self.ws_commands and self._commands_available and ws is not None):
+            return False, None
+        command_id = next(self._command_ids)
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._acks[command_id] = fut
+        try:
+            await ws.send(
+                json.dumps({"type": "command", "id": command_id, "op": op, "args": args})
+            )
+        except websockets.ConnectionClosed:
+            self._acks.pop(command_id, None)
+            return False, None
+        try:
+            ack = await asyncio.wait_for(fut, self.command_timeout)
+        finally:
+            self._acks.pop(command_id, None)
+        if not ack.get("ok"):
+            raise CommandError(ack.get("status", 500), ack.get("detail", ""), ack.get("retry_after"))
+        return True, ack.get("result")
+
     async def create_timer(self, duration: float) -> int:
         if self.local_mode and self._manager is not None:
             tid = self._manager.create_timer(duration)
@@ -245,6 +613,9 @@ class SyncService:
                 start_at=self._manager.timers[tid].start_at,
             )
             return tid
+        sent, result = await self._ws_command("create", duration=duration)
+        if sent:
+            return result["timer_id"]
         resp = await self.client.post("/timers", params={"duration": duration})
         resp.raise_for_status()
         return resp.json()["timer_id"]
@@ -260,6 +631,8 @@ class SyncService:
                 self.state[str(timer_id)].start_at = None
                 self.state[str(timer_id)].finished = t.finished
             return
+        if (await self._ws_command("pause", timer_id=timer_id))[0]:
+            return
         resp = await self.client.post(f"/timers/{timer_id}/pause")
         resp.raise_for_status()
 
@@ -272,6 +645,8 @@ class SyncService:
                 self.state[str(timer_id)].running = True
                 self.state[str(timer_id)].start_at = t.start_at
             return
+        if (await self._ws_command("resume", timer_id=timer_id))[0]:
+            return
         resp = await self.client.post(f"/timers/{timer_id}/resume")
         resp.raise_for_status()
 
@@ -281,6 +656,8 @@ class SyncService:
             self._manager.save_state(self._storage_path)
             self.state.pop(str(timer_id), None)
             return
+        if (await self._ws_command("remove", timer_id=timer_id))[0]:
+            return
         resp = await self.client.delete(f"/timers/{timer_id}")
         resp.raise_for_status()
 
@@ -290,6 +667,8 @@ class SyncService:
             self._manager.save_state(self._storage_path)
             self.state.clear()
             return
+        if (await self._ws_command("remove_all"))[0]:
+            return
         resp = await self.client.delete("/timers")
         resp.raise_for_status()
 
@@ -301,6 +680,8 @@ class SyncService:
                 t.running = False
                 t.start_at = None
             return
+        if (await self._ws_command("pause_all"))[0]:
+            return
         resp = await self.client.post("/timers/pause_all")
         resp.raise_for_status()
 
@@ -314,6 +695,8 @@ class SyncService:
                     state.running = True
                     state.start_at = t.start_at
             return
+        if (await self._ws_command("resume_all"))[0]:
+            return
         resp = await self.client.post("/timers/resume_all")
         resp.raise_for_status()
 
@@ -329,5 +712,7 @@ class SyncService:
                     state.finished = t.finished
                     state.start_at = t.start_at
             return
+        if (await self._ws_command("tick", seconds=seconds))[0]:
+            return
         resp = await self.client.post("/tick", params={"seconds": seconds})
         resp.raise_for_status()
@@ -21,6 +21,9 @@ from rich.prompt import Prompt
 from client_settings import ClientSettings
 from .sync_service import SyncService, TimerState
 
+# Rows shown per dashboard page; each page is one ``GET /timers`` call.
+PAGE_ROWS = 20
+
 
 class ClientViewLayer:
     """Render timer states provided by :class:`SyncService`."""
@@ -30,7 +33,16 @@ class ClientViewLayer:
         self.selected_idx = 0
         self.tags: dict[str, str] = {}
         self._pending: set[str] = set()
-        
+        # Ids shown on the current page, the cursors of the pages before and
+        # including it, and the cursor of the next page.
+        self._page_ids: list[str] = []
+        self._cursors: list[str | None] = [None]
+        self._next_cursor: str | None = None
+
+    def _page_rows(self) -> list[tuple[str, TimerState]]:
+        state = self.service.state
+        return [(tid, state[tid]) for tid in self._page_ids if tid in state]
+
     def _build_table(self) -> Table:
         table = Table(title="Timer Dashboard")
         table.add_column("ID", justify="right")
@@ -38,8 +50,10 @@ class ClientViewLayer:
         table.add_column("Duration", justify="right")
         table.add_column("Remaining", justify="right")
         table.add_column("Status")
-        sorted_timers = sorted(self.service.state.items(), key=lambda t: int(t[0]))
-        for index, (tid, timer) in enumerate(sorted_timers):
+        now = self.service.server_now()
+        more = " (more: n)" if self._next_cursor is not None else ""
+        table.caption = f"Page {len(self._cursors)}{more}"
+        for index, (tid, timer) in enumerate(self._page_rows()):
             if timer.finished:
                 status = "finished"
             else:
@@ -50,7 +64,7 @@ class ClientViewLayer:
                 str(tid),
                 tag,
                 f"{timer.duration}",
-                f"{timer.remaining_now():.1f}",
+                f"{timer.remaining_now(now):.1f}",
                 status,
                 style=style,
             )
@@ -58,13 +72,10 @@ class ClientViewLayer:
 
     def _build_panel(self) -> Panel:
         """Return a panel summarizing and containing the timer table."""
-        running = sum(
-            1 for t in self.service.state.values() if t.running and not t.finished
-        )
-        paused = sum(
-            1 for t in self.service.state.values() if not t.running and not t.finished
-        )
-        finished = sum(1 for t in self.service.state.values() if t.finished)
+        shown = [t for _, t in self._page_rows()]
+        running = sum(1 for t in shown if t.running and not t.finished)
+        paused = sum(1 for t in shown if not t.running and not t.finished)
+        finished = sum(1 for t in shown if t.finished)
         title = f"Running: {running}  Paused: {paused}  Finished: {finished}"
         header = Text(
             f"Server: {self.service.base_url} "
@@ -72,7 +83,7 @@ class ClientViewLayer:
             style="cyan",
         )
         hints = Text(
-            "j/down: next  k/up: prev  c: create  s: start  p: pause  r: resume  d: delete  q: quit",
+            "j/down: next  k/up: prev  n/b: next/prev page  c: create  s: start  p: pause  r: resume  d: delete  q: quit",
             style="green",
         )
         return Panel(
@@ -81,11 +92,39 @@ class ClientViewLayer:
             border_style="blue",
         )
 
+    async def _load_page(self, cursor: str | None) -> None:
+        """Show the page of timers after ``cursor``.
+
+        Only that page is requested; a WebSocket connection is subscribed to
+        its timers so updates for other pages are not received or kept.
+        """
+        if self.service.local_mode:
+            after = int(cursor) if cursor else 0
+            ids = sorted(int(tid) for tid in self.service.state)
+            ids = [tid for tid in ids if tid > after]
+            page = [str(tid) for tid in ids[:PAGE_ROWS]]
+            next_cursor = page[-1] if len(ids) > PAGE_ROWS else None
+        else:
+            params: dict[str, object] = {"limit": PAGE_ROWS}
+            if cursor is not None:
+                params["cursor"] = cursor
+            resp = await self.service.client.get("/timers", params=params)
+            resp.raise_for_status()
+            data = resp.json()
+            page = sorted(data["timers"], key=int)
+            next_cursor = data["next_cursor"]
+            if self.service.connected:
+                stale = set(self._page_ids).difference(page)
+                await self.service.subscribe(timers=[int(tid) for tid in page])
+                if stale:
+                    await self.service.unsubscribe(timers=[int(tid) for tid in stale])
+        self._page_ids = page
+        self._next_cursor = next_cursor
+        self.selected_idx = max(0, min(self.selected_idx, len(page) - 1))
+
     async def _fetch_initial_state(self) -> None:
-        resp = await self.service.client.get("/timers")
-        resp.raise_for_status()
-        data = resp.json()
-        self.service.state = {str(tid): TimerState(**info) for tid, info in data.items()}
+        self._cursors = [None]
+        await self._load_page(None)
 
     async def show_once(self) -> str:
         """Connect to the server, render one table snapshot and return text."""
@@ -117,11 +156,21 @@ class ClientViewLayer:
                     running = False
                     break
                 if cmd in {"j", "down"}:
-                    if self.service.state:
-                        self.selected_idx = (self.selected_idx + 1) % len(self.service.state)
+                    if self._page_ids:
+                        self.selected_idx = (self.selected_idx + 1) % len(self._page_ids)
                 elif cmd in {"k", "up"}:
-                    if self.service.state:
-                        self.selected_idx = (self.selected_idx - 1) % len(self.service.state)
+                    if self._page_ids:
+                        self.selected_idx = (self.selected_idx - 1) % len(self._page_ids)
+                elif cmd == "n":
+                    if self._next_cursor is not None:
+                        self._cursors.append(self._next_cursor)
+                        self.selected_idx = 0
+                        await self._load_page(self._next_cursor)
+                elif cmd == "b":
+                    if len(self._cursors) > 1:
+                        self._cursors.pop()
+                        self.selected_idx = 0
+                        await self._load_page(self._cursors[-1])
                 elif cmd == "c":
                     dur = await loop.run_in_executor(
                         None, lambda: Prompt.ask("Duration (seconds)")
@@ -137,6 +186,7 @@ class ClientViewLayer:
                     await self.service.pause_timer(timer_id)
                     self.tags[str(timer_id)] = tag.strip() or f"Timer {timer_id}"
                     self._pending.add(str(timer_id))
+                    await self._load_page(self._cursors[-1])
                 elif cmd == "s":
                     tid = self._current_id()
                     if tid is not None:
@@ -159,6 +209,7 @@ class ClientViewLayer:
                             await self.service.remove_timer(int(tid))
                             self.tags.pop(str(tid), None)
                             self._pending.discard(str(tid))
+                            await self._load_page(self._cursors[-1])
 
         async def tick_loop() -> None:
             nonlocal running
@@ -190,9 +241,9 @@ class ClientViewLayer:
 
 
     def _current_id(self) -> str | None:
-        if not self.service.state:
+        timers = [tid for tid, _ in self._page_rows()]
+        if not timers:
             return None
-        timers = sorted(self.service.state.keys(), key=lambda x: int(x))
         self.selected_idx = max(0, min(self.selected_idx, len(timers) - 1))
         return timers[self.selected_idx]
 
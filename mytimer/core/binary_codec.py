@@ -0,0 +1,168 @@
+"""Compact binary encoding of timer messages for the ``/ws`` subprotocol.
+
+Each frame starts with a one byte message kind, a ``uint64`` sequence number
+(``0`` when unnumbered) and a ``uint32`` record count.  If the kind has the
+:data:`HAS_TIME` bit set a ``float64`` server time follows.  Then come
+fixed-size little-endian records, so field names are never sent:
+
+``SNAPSHOT`` / ``UPDATE`` record
+    ``uint32 timer_id, uint8 flags, float64 duration, float64 remaining,
+    float64 created_at, float64 start_at``
+``REMOVE`` record
+    ``uint32 timer_id``
+
+``flags`` holds :data:`RUNNING`, :data:`FINISHED` and :data:`HAS_START`.
+A timer is 37 bytes instead of roughly 150 bytes of JSON. Messages with
+fields this layout cannot carry are sent as JSON instead.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+SUBPROTOCOL = "mytimer.bin.v2"
+
+SNAPSHOT = 0
+UPDATE = 1
+REMOVE = 2
+
+RUNNING = 1
+FINISHED = 2
+HAS_START = 4
+
+# Set in the kind byte when the header is followed by the server time.
+HAS_TIME = 0x80
+
+_HEADER = struct.Struct("<BQI")
+_TIME = struct.Struct("<d")
+_RECORD = struct.Struct("<IBdddd")
+_ID = struct.Struct("<I")
+
+_FIELDS = frozenset(("duration", "remaining", "running", "finished", "created_at", "start_at"))
+_REMOVE_KEYS = frozenset(("type", "timer_id", "seq", "server_time"))
+_UPDATE_KEYS = _REMOVE_KEYS | _FIELDS
+_SNAPSHOT_KEYS = frozenset(("type", "seq", "server_time", "timers"))
+
+
+def _header(kind: int, seq: int, count: int, server_time: Optional[float]) -> bytes:
+    if server_time is None:
+        return _HEADER.pack(kind, seq, count)
+    return _HEADER.pack(kind | HAS_TIME, seq, count) + _TIME.pack(server_time)
+
+
+def _pack_timer(timer_id: Any, info: Dict[str, Any]) -> bytes:
+    start_at = info.get("start_at")
+    flags = (
+        (RUNNING if info.get("running") else 0)
+        | (FINISHED if info.get("finished") else 0)
+        | (HAS_START if start_at is not None else 0)
+    )
+    return _RECORD.pack(
+        int(timer_id),
+        flags,
+        info["duration"],
+        info.get("remaining", info["duration"]),
+        info.get("created_at", 0.0),
+        start_at if start_at is not None else 0.0,
+    )
+
+
+def _unpack_timer(buffer: bytes, offset: int) -> Tuple[str, Dict[str, Any]]:
+    tid, flags, duration, remaining, created_at, start_at = _RECORD.unpack_from(
+        buffer, offset
+    )
+    return str(tid), {
+        "duration": duration,
+        "remaining": remaining,
+        "running": bool(flags & RUNNING),
+        "finished": bool(flags & FINISHED),
+        "created_at": created_at,
+        "start_at": start_at if flags & HAS_START else None,
+    }
+
+
+def encode_timers(
+    kind: int,
+    timers: Iterable[Tuple[Any, Dict[str, Any]]],
+    seq: int = 0,
+    server_time: Optional[float] = None,
+) -> bytes:
+    """Encode ``(timer_id, payload)`` pairs as a ``SNAPSHOT`` or ``UPDATE`` frame."""
+    records = [_pack_timer(tid, info) for tid, info in timers]
+    return _header(kind, seq, len(records), server_time) + b"".join(records)
+
+
+def encode_remove(
+    timer_ids: Iterable[Any], seq: int = 0, server_time: Optional[float] = None
+) -> bytes:
+    """Encode a ``REMOVE`` frame for ``timer_ids``."""
+    ids = [_ID.pack(int(tid)) for tid in timer_ids]
+    return _header(REMOVE, seq, len(ids), server_time) + b"".join(ids)
+
+
+def encode_message(data: Any) -> Optional[bytes]:
+    """Encode a timer snapshot or typed update, or return ``None``.
+
+    Control messages such as acknowledgements and errors, and messages with
+    fields the frame layout has no room for, are sent as JSON text frames
+    instead.
+    """
+    if not isinstance(data, dict):
+        return None
+    kind = data.get("type")
+    seq = data.get("seq", 0)
+    server_time = data.get("server_time")
+    try:
+        if kind == "update" and data.keys() <= _UPDATE_KEYS:
+            return encode_timers(UPDATE, [(data["timer_id"], data)], seq, server_time)
+        if kind == "remove" and data.keys() <= _REMOVE_KEYS:
+            return encode_remove([data["timer_id"]], seq, server_time)
+        if kind == "snapshot" and data.keys() <= _SNAPSHOT_KEYS:
+            timers = data["timers"]
+            if all(info.keys() <= _FIELDS for info in timers.values()):
+                return encode_timers(SNAPSHOT, timers.items(), seq, server_time)
+            return None
+        if kind is not None:
+            return None
+        if all(info.keys() <= _FIELDS for info in data.values()):
+            return encode_timers(SNAPSHOT, data.items())
+    except (KeyError, TypeError, ValueError, AttributeError, struct.error):
+        pass
+    return None
+
+
+def decode_message(frame: bytes) -> Any:
+    """Decode ``frame`` into the JSON-equivalent message structure.
+
+    Snapshots become ``{timer_id: payload}`` dicts (or typed ``snapshot``
+    messages when numbered or timestamped) and updates become
+    ``{"type": "update", "timer_id": ..., **payload}``. A multi-record update
+    decodes to a list of such messages.
+    """
+    kind, seq, count = _HEADER.unpack_from(frame, 0)
+    offset = _HEADER.size
+    extra: Dict[str, Any] = {"seq": seq} if seq else {}
+    if kind & HAS_TIME:
+        kind &= ~HAS_TIME
+        (extra["server_time"],) = _TIME.unpack_from(frame, offset)
+        offset += _TIME.size
+    if kind == REMOVE:
+        ids = [
+            str(_ID.unpack_from(frame, offset + i * _ID.size)[0]) for i in range(count)
+        ]
+        messages = [{"type": "remove", "timer_id": tid, **extra} for tid in ids]
+        return messages[0] if count == 1 else messages
+    timers = [
+        _unpack_timer(frame, offset + i * _RECORD.size) for i in range(count)
+    ]
+    if kind == SNAPSHOT:
+        if extra:
+            return {"type": "snapshot", **extra, "timers": dict(timers)}
+        return dict(timers)
+    if kind == UPDATE:
+        messages = [
+            {"type": "update", "timer_id": tid, **info, **extra} for tid, info in timers
+        ]
+        return messages[0] if count == 1 else messages
+    raise ValueError(f"unknown frame kind: {kind}")
@@ -0,0 +1,69 @@
+"""NTP-style estimation of the offset between a client and the server clock.
+
+A client records ``t0`` when sending a ping and ``t3`` when the pong arrives;
+the server answers with ``t1`` (receive) and ``t2`` (send) from its own clock.
+For one exchange::
+
+    offset = ((t1 - t0) + (t2 - t3)) / 2
+    delay  = (t3 - t0) - (t2 - t1)
+
+Samples with the smallest round trip delay are the least distorted by
+queueing, so the estimator keeps a short window of samples, picks the one
+with the lowest delay and smooths its offset into the running estimate.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Deque, Tuple
+
+DEFAULT_WINDOW = 8
+
+
+class ClockOffset:
+    """Running estimate of ``server_time - local_time`` in seconds."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW, smoothing: float = 0.3) -> None:
+        self.offset = 0.0
+        self.delay = 0.0
+        self.smoothing = smoothing
+        self.samples = 0
+        self.updated_at: float | None = None
+        self._window: Deque[Tuple[float, float]] = deque(maxlen=window)
+
+    @property
+    def synced(self) -> bool:
+        """Return ``True`` once at least one sample was taken."""
+        return self.samples > 0
+
+    def add_sample(self, t0: float, t1: float, t2: float, t3: float) -> float:
+        """Add one ping/pong exchange and return the updated offset.
+
+        Raises
+        ------
+        ValueError
+            If the timestamps give a negative round trip delay.
+        """
+        delay = (t3 - t0) - (t2 - t1)
+        if delay < 0:
+            raise ValueError("inconsistent ping/pong timestamps")
+        self._window.append((delay, ((t1 - t0) + (t2 - t3)) / 2))
+        best_delay, best_offset = min(self._window)
+        if self.samples == 0:
+            self.offset = best_offset
+        else:
+            self.offset += self.smoothing * (best_offset - self.offset)
+        self.delay = best_delay
+        self.samples += 1
+        self.updated_at = t3
+        return self.offset
+
+    def now(self) -> float:
+        """Return the current time on the server clock."""
+        return time.time() + self.offset
+
+
+def pong(t0: float, received_at: float) -> dict:
+    """Return the server reply to a ping sent at client time ``t0``."""
+    return {"type": "pong", "t0": t0, "t1": received_at, "t2": time.time()}
@@ -0,0 +1,80 @@
+"""Size-aware deflate compression of WebSocket frames.
+
+Frames at or above a byte threshold are deflated once per broadcast and sent
+as binary messages tagged with a one byte prefix; smaller frames go out raw so
+frequent small deltas do not pay compression CPU. The prefixes do not collide
+with :mod:`mytimer.core.binary_codec` frame kinds.
+"""
+
+from __future__ import annotations
+
+import time
+import zlib
+from typing import Dict, Optional, Union
+
+DEFLATE_TEXT = 0xFE
+DEFLATE_BINARY = 0xFD
+
+DEFAULT_THRESHOLD = 1024
+
+
+class FrameCompressor:
+    """Compress frames above ``threshold`` bytes and keep tuning statistics."""
+
+    def __init__(self, threshold: int = DEFAULT_THRESHOLD, level: int = 6) -> None:
+        self.threshold = threshold
+        self.level = level
+        self.frames = 0
+        self.attempts = 0
+        self.compressed_frames = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def compress(self, payload: Union[str, bytes]) -> Optional[bytes]:
+        """Return the compressed frame for ``payload`` or ``None`` to send it raw."""
+        self.frames += 1
+        data = payload.encode("utf-8") if isinstance(payload, str) else payload
+        if len(data) < self.threshold:
+            return None
+        self.attempts += 1
+        start = time.thread_time()
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        body = compressor.compress(data) + compressor.flush()
+        self.cpu_seconds += time.thread_time() - start
+        if len(body) + 1 >= len(data):
+            return None
+        self.compressed_frames += 1
+        self.bytes_in += len(data)
+        self.bytes_out += len(body) + 1
+        prefix = DEFLATE_TEXT if isinstance(payload, str) else DEFLATE_BINARY
+        return bytes((prefix,)) + body
+
+    def stats(self) -> Dict[str, float]:
+        """Return counters describing compression effectiveness and cost."""
+        return {
+            "threshold": self.threshold,
+            "frames": self.frames,
+            "attempts": self.attempts,
+            "compressed_frames": self.compressed_frames,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": self.bytes_out / self.bytes_in if self.bytes_in else 1.0,
+            "cpu_seconds": self.cpu_seconds,
+            "cpu_seconds_per_frame": (
+                self.cpu_seconds / self.attempts if self.attempts else 0.0
+            ),
+        }
+
+
+def is_compressed(frame: bytes) -> bool:
+    """Return ``True`` if ``frame`` was produced by :meth:`FrameCompressor.compress`."""
+    return bool(frame) and frame[0] in (DEFLATE_TEXT, DEFLATE_BINARY)
+
+
+def decompress_frame(frame: bytes) -> Union[str, bytes]:
+    """Inflate a compressed ``frame`` back to its original text or bytes."""
+    data = zlib.decompress(frame[1:], -zlib.MAX_WBITS)
+    if frame[0] == DEFLATE_TEXT:
+        return data.decode("utf-8")
+    return data
@@ -0,0 +1,114 @@
+"""Optional timing instrumentation for :class:`~mytimer.core.timer_manager.TimerManager`.
+
+Instrumentation is attached with :meth:`TimerManager.set_instrumentation`,
+which wraps the instrumented methods on that manager instance only. A manager
+without instrumentation runs the plain class methods, so disabled
+instrumentation costs nothing.
+"""
+
+from __future__ import annotations
+
+import functools
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Sequence
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+LATENESS_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+
+# ``TimerManager`` methods timed when instrumentation is enabled.
+INSTRUMENTED_OPERATIONS = (
+    "tick",
+    "expire_due",
+    "_run_callbacks",
+    "save_state",
+    "load_state",
+    "pause_timer",
+    "resume_timer",
+    "pause_all",
+    "resume_all",
+)
+
+
+class Histogram:
+    """Fixed-bucket histogram compatible with the Prometheus data model."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record a single ``value``."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Return count, sum, mean and cumulative bucket counts."""
+        cumulative = 0
+        buckets: Dict[str, int] = {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "buckets": buckets,
+        }
+
+
+def operation_name(method: str) -> str:
+    """Return the reported name of an instrumented method."""
+    return method.lstrip("_")
+
+
+class EngineStats:
+    """Per-operation call counts, timing histograms and finish lateness."""
+
+    def __init__(self) -> None:
+        self.operations: Dict[str, Histogram] = {
+            operation_name(name): Histogram() for name in INSTRUMENTED_OPERATIONS
+        }
+        self.finish_lateness = Histogram(LATENESS_BUCKETS)
+
+    def observe(self, operation: str, seconds: float) -> None:
+        """Record that ``operation`` took ``seconds``."""
+        hist = self.operations.get(operation)
+        if hist is None:
+            hist = self.operations[operation] = Histogram()
+        hist.observe(seconds)
+
+    def observe_lateness(self, seconds: float) -> None:
+        """Record how late a timer was marked finished."""
+        self.finish_lateness.observe(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all statistics as a JSON-serialisable dict."""
+        return {
+            "operations": {
+                name: hist.summary() for name, hist in self.operations.items()
+            },
+            "finish_lateness": self.finish_lateness.summary(),
+        }
+
+
+def timed(operation: str, func: Callable[..., Any], stats: EngineStats) -> Callable[..., Any]:
+    """Wrap ``func`` so each call is recorded in ``stats`` as ``operation``."""
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.observe(operation, time.perf_counter() - start)
+
+    return wrapper
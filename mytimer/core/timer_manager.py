@@ -3,13 +3,16 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Dict, Callable, Awaitable, List
+from typing import Dict, Callable, Awaitable, List, Tuple
 import asyncio
 import contextlib
+import heapq
 import json
 import time
 from pathlib import Path
 
+from .instrumentation import INSTRUMENTED_OPERATIONS, EngineStats, operation_name, timed
+
 
 @dataclass
 class Timer:
@@ -21,6 +24,9 @@ class Timer:
     finished: bool = False
     created_at: float = field(default_factory=time.time)
     start_at: float | None = field(default_factory=time.time)
+    # Seconds between the deadline and the moment the timer was marked
+    # finished; only meaningful once ``finished`` is set.
+    lateness: float = field(default=0.0, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         if self.duration <= 0:
@@ -31,10 +37,44 @@ class Timer:
         elif not self.running:
             self.start_at = None
 
+    def to_dict(self) -> dict:
+        """Return the persistent fields as JSON-serialisable data."""
+        return {
+            "duration": self.duration,
+            "remaining": self.remaining,
+            "running": self.running,
+            "finished": self.finished,
+            "created_at": self.created_at,
+            "start_at": self.start_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Timer":
+        """Rebuild a timer from :meth:`to_dict` output."""
+        return cls(
+            duration=data.get("duration", 0),
+            remaining=data.get("remaining", 0),
+            running=data.get("running", True),
+            finished=data.get("finished", False),
+            created_at=data.get("created_at", time.time()),
+            start_at=data.get("start_at"),
+        )
+
     def remaining_now(self) -> float:
         """Return the current remaining time."""
         return self.remaining
 
+    def remaining_at(self, now: float | None = None) -> float:
+        """Return the remaining time derived from the wall clock at ``now``.
+
+        Unlike :meth:`remaining_now` this does not rely on :meth:`tick` having
+        updated ``remaining`` and is used when timers are not ticked.
+        """
+        if self.running and not self.finished and self.start_at is not None:
+            now = time.time() if now is None else now
+            return max(0.0, self.duration - (now - self.start_at))
+        return self.remaining
+
     def tick(self, seconds: float) -> None:
         """Simulate elapsing ``seconds`` of time for compatibility."""
         if seconds < 0:
@@ -56,23 +96,59 @@ class Timer:
             if self.start_at is not None:
                 self.start_at -= seconds
         if self.running and self.remaining_now() <= 0:
+            if self.start_at is not None:
+                self.lateness = max(0.0, time.time() - (self.start_at + self.duration))
             self.remaining = 0
             self.finished = True
             self.running = False
             self.start_at = None
+
+    def deadline(self) -> float | None:
+        """Return the wall-clock time the timer finishes, if it is running."""
+        if self.running and not self.finished and self.start_at is not None:
+            return self.start_at + self.duration
+        return None
                 
 
 class TimerManager:
-    """Manage multiple :class:`Timer` instances."""
+    """Manage multiple :class:`Timer` instances.
+
+    Deadlines of running timers are kept in a min-heap for
+    :meth:`expire_due` and :meth:`next_deadline`. Entries are not removed
+    when a timer is paused, removed or changed; they are checked against the
+    timer when they reach the top. Code that sets ``start_at``, ``running``
+    or ``duration`` directly, or stores timers in :attr:`timers` itself,
+    calls :meth:`reschedule` afterwards.
+    """
     def __init__(self) -> None:
         """Initialize the manager with an empty timer registry."""
         self.timers: Dict[int, Timer] = {}
         self._next_id = 1
+        self._deadlines: List[Tuple[float, int]] = []
         self._tick_callbacks: List[Callable[[int, Timer], Awaitable[None] | None]] = []
         self._finish_callbacks: List[Callable[[int, Timer], Awaitable[None] | None]] = []
         self._auto_task: asyncio.Task[None] | None = None
         self._auto_interval = 1.0
         self._auto_running = False
+        self.instrumentation: EngineStats | None = None
+        # Optional source of timer ids shared with other processes.
+        self.id_allocator: Callable[[], int] | None = None
+
+    def set_instrumentation(self, instrumentation: EngineStats | None) -> None:
+        """Time the hot paths of this manager into ``instrumentation``.
+
+        The instrumented methods are wrapped on this instance only; passing
+        ``None`` restores the plain methods.
+        """
+        for name in INSTRUMENTED_OPERATIONS:
+            self.__dict__.pop(name, None)
+        self.instrumentation = instrumentation
+        if instrumentation is None:
+            return
+        for name in INSTRUMENTED_OPERATIONS:
+            setattr(
+                self, name, timed(operation_name(name), getattr(self, name), instrumentation)
+            )
 
     def register_on_tick(self, callback: Callable[[int, Timer], Awaitable[None] | None]) -> None:
         """Register a callback triggered after each timer ``tick``."""
@@ -90,8 +166,7 @@ class TimerManager:
         down to zero but avoids exposing negative remaining times.
         """
 
-        timer_id = self._next_id
-        self._next_id += 1
+        timer_id = self._allocate_id()
 
         now = time.time()
         if duration <= 0:
@@ -112,6 +187,30 @@ class TimerManager:
             )
 
         self.timers[timer_id] = timer
+        self.reschedule(timer_id)
+        return timer_id
+
+    def add_timer(self, timer: Timer, timer_id: int | None = None) -> int:
+        """Insert an existing ``timer`` and return its identifier.
+
+        Without ``timer_id`` a new id is allocated; otherwise the timer is
+        stored under ``timer_id``, replacing any timer with that id.
+        """
+        if timer_id is None:
+            timer_id = self._allocate_id()
+        else:
+            self._next_id = max(self._next_id, timer_id + 1)
+        self.timers[timer_id] = timer
+        self.reschedule(timer_id)
+        return timer_id
+
+    def _allocate_id(self) -> int:
+        if self.id_allocator is not None:
+            timer_id = self.id_allocator()
+            self._next_id = max(self._next_id, timer_id + 1)
+        else:
+            timer_id = self._next_id
+            self._next_id += 1
         return timer_id
 
     def tick(self, seconds: float) -> None:
@@ -128,9 +227,78 @@ class TimerManager:
         for tid, timer in list(self.timers.items()):
             was_finished = timer.finished
             timer.tick(seconds)
+            self.reschedule(tid)
             self._run_callbacks(self._tick_callbacks, tid, timer)
             if not was_finished and timer.finished:
-                self._run_callbacks(self._finish_callbacks, tid, timer)
+                self._finished(tid, timer)
+
+    def expire_due(self, now: float | None = None) -> List[int]:
+        """Finish running timers whose deadline has passed.
+
+        Unlike :meth:`tick` this does not fast-forward timers; it only marks
+        timers whose ``start_at + duration`` lies in the past as finished and
+        runs the finish callbacks. Returns the ids of the expired timers.
+        """
+        now = time.time() if now is None else now
+        expired: List[int] = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, tid = heapq.heappop(self._deadlines)
+            timer = self.timers.get(tid)
+            if timer is None or timer.deadline() != deadline:
+                self.reschedule(tid)
+                continue
+            timer.lateness = now - deadline
+            timer.remaining = 0
+            timer.finished = True
+            timer.running = False
+            timer.start_at = None
+            expired.append(tid)
+            self._finished(tid, timer)
+        return expired
+
+    def settle(self, timer_id: int | None = None, now: float | None = None) -> None:
+        """Store the wall-clock remaining time of ``timer_id`` or all timers.
+
+        Servers that do not tick call this before pausing so the paused
+        timers keep the time that actually elapsed.
+        """
+        if timer_id is not None:
+            timer = self.timers.get(timer_id)
+            timers = [timer] if timer else []
+        else:
+            timers = list(self.timers.values())
+        for timer in timers:
+            timer.remaining = timer.remaining_at(now)
+
+    def next_deadline(self) -> float | None:
+        """Return the wall-clock time at which the next running timer finishes."""
+        while self._deadlines:
+            deadline, tid = self._deadlines[0]
+            timer = self.timers.get(tid)
+            if timer is not None and timer.deadline() == deadline:
+                return deadline
+            heapq.heappop(self._deadlines)
+            self.reschedule(tid)
+        return None
+
+    def reschedule(self, timer_id: int) -> None:
+        """Track the current deadline of ``timer_id``, if it is running."""
+        timer = self.timers.get(timer_id)
+        deadline = None if timer is None else timer.deadline()
+        if deadline is None:
+            return
+        heapq.heappush(self._deadlines, (deadline, timer_id))
+        if len(self._deadlines) > 2 * len(self.timers) + 64:
+            # Mostly stale entries; rebuild from the timers.
+            self._rebuild_deadlines()
+
+    def _rebuild_deadlines(self) -> None:
+        self._deadlines = [
+            (deadline, tid)
+            for tid, timer in self.timers.items()
+            if (deadline := timer.deadline()) is not None
+        ]
+        heapq.heapify(self._deadlines)
 
     def pause_timer(self, timer_id: int) -> None:
         """Pause the specified timer."""
@@ -147,6 +315,7 @@ class TimerManager:
             elapsed = timer.duration - timer.remaining
             timer.start_at = time.time() - elapsed
             timer.running = True
+            self.reschedule(timer_id)
 
     def remove_timer(self, timer_id: int) -> None:
         """Remove a timer from the registry."""
@@ -162,15 +331,17 @@ class TimerManager:
                 
     def resume_all(self) -> None:
         """Resume all non-finished timers."""
-        for timer in self.timers.values():
+        for tid, timer in self.timers.items():
             if not timer.finished and not timer.running:
                 elapsed = timer.duration - timer.remaining
                 timer.start_at = time.time() - elapsed
                 timer.running = True
+                self.reschedule(tid)
 
     def remove_all(self) -> None:
         """Remove all timers from the manager."""
         self.timers.clear()
+        self._deadlines = []
 
     def reset_all(self) -> None:
         """Reset all timers to their initial duration and resume them."""
@@ -179,11 +350,17 @@ class TimerManager:
             timer.running = True
             timer.finished = False
             timer.start_at = time.time()
+        self._rebuild_deadlines()
 
     def running_count(self) -> int:
         """Return the number of running timers."""
         return sum(1 for t in self.timers.values() if t.running and not t.finished)
 
+    def _finished(self, tid: int, timer: Timer) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation.observe_lateness(timer.lateness)
+        self._run_callbacks(self._finish_callbacks, tid, timer)
+
     def _run_callbacks(self, cbs: List[Callable[[int, Timer], Awaitable[None] | None]], tid: int, timer: Timer) -> None:
         """Invoke callbacks with ``tid`` and ``timer`` safely."""
         for cb in cbs:
@@ -204,25 +381,29 @@ class TimerManager:
             timer.running = True
             timer.finished = False
             timer.start_at = time.time()
+            self.reschedule(timer_id)
 
 
+    def export_state(self) -> dict:
+        """Return all timers and the next id as JSON-serialisable data."""
+        return {
+            "next_id": self._next_id,
+            "timers": {str(tid): t.to_dict() for tid, t in self.timers.items()},
+        }
+
+    def restore_state(self, data: dict) -> None:
+        """Replace all timers with ``data`` from :meth:`export_state`."""
+        self.timers.clear()
+        timers_data = data.get("timers", {})
+        for tid_str, tdata in timers_data.items():
+            self.timers[int(tid_str)] = Timer.from_dict(tdata)
+        self._next_id = data.get("next_id", max(self.timers.keys(), default=0) + 1)
+        self._rebuild_deadlines()
+
     def save_state(self, path: str | Path) -> None:
         """Persist current timers to a JSON file."""
         file_path = Path(path)
-        data = {
-            "next_id": self._next_id,
-            "timers": {
-                str(tid): {
-                    "duration": t.duration,
-                    "remaining": t.remaining,
-                    "running": t.running,
-                    "finished": t.finished,
-                    "created_at": t.created_at,
-                    "start_at": t.start_at,
-                }
-                for tid, t in self.timers.items()
-            },
-        }
+        data = self.export_state()
         with file_path.open("w", encoding="utf-8") as f:
             json.dump(data, f)
 
@@ -236,21 +417,7 @@ class TimerManager:
                 data = json.load(f)
         except (json.JSONDecodeError, OSError):
             return
-
-        self.timers.clear()
-        timers_data = data.get("timers", {})
-        for tid_str, tdata in timers_data.items():
-            tid = int(tid_str)
-            timer = Timer(
-                duration=tdata.get("duration", 0),
-                remaining=tdata.get("remaining", 0),
-                running=tdata.get("running", True),
-                finished=tdata.get("finished", False),
-                created_at=tdata.get("created_at", time.time()),
-                start_at=tdata.get("start_at"),
-            )
-            self.timers[tid] = timer
-        self._next_id = data.get("next_id", max(self.timers.keys(), default=0) + 1)
+        self.restore_state(data)
 
     async def _auto_loop(self) -> None:
         while self._auto_running:
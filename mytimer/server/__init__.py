@@ -1 +1,15 @@
-from .api import app
+"""MyTimer server package.
+
+``app`` is imported lazily: the entry points ``python -m
+mytimer.server.handoff``, ``relay`` and ``cluster`` configure the environment
+before the API module reads it, and importing it here would also load those
+modules a second time under ``-m``.
+"""
+
+
+def __getattr__(name: str):
+    if name == "app":
+        from .api import app
+
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,118 +3,796 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
+import json
+import logging
+import time
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from contextlib import asynccontextmanager
-from fastapi.responses import JSONResponse
-from fastapi import HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi import Depends, Header, HTTPException, Query, Request, Response
+from fastapi.routing import APIRoute
 
 from ..core.timer_manager import TimerManager
+from ..core.instrumentation import EngineStats
+from ..core.loop_monitor import LoopLagMonitor
+from ..core.clock_sync import pong
 import os
 from pathlib import Path
 from .discovery import create_discovery_server
 from .websocket_manager import WebSocketManager
-from .ticker import create_auto_ticker
+from .ticker import DeadlineWatcher, create_auto_ticker
+from .change_feed import ChangeFeed
+from . import ndjson, sse
+from .client_auth import ClientAuth
+from .profiling import Profiler
+from .cluster import ClusterNode, TimerStore
+from .rate_limit import RateLimitMiddleware, RateLimiter, TimerQuota, client_key
+from .subscriptions import STATUSES, timer_status
+from .timer_index import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, TimerIndex
+from .fast_json import JSONBytesResponse, TimerJSONCache, dumps as json_bytes
+from .unix_listener import UnixSocketListener
+from .structured_log import StructuredLogging, parse_sample_rates
+from .handoff import RESTART_RETRY_AFTER, Handoff, HandoffMiddleware
+from .replication import ReadOnlyReplicaMiddleware, Replication
+from .metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    MetricsMiddleware,
+    MetricsRegistry,
+    counter_lines,
+    gauge_lines,
+    histogram_lines,
+)
 
 STATE_FILE = os.environ.get("MYTIMER_STATE_FILE")
+# ``tick`` pushes every timer on every tick; ``transitions`` only pushes
+# create/pause/resume/reset/remove/finish and lets clients count down locally.
+PUSH_MODE = os.environ.get("MYTIMER_PUSH_MODE", "tick")
+TRANSITIONS_ONLY = PUSH_MODE == "transitions"
 manager = TimerManager()
+# Engine timing is on by default; set ``MYTIMER_ENGINE_STATS=0`` to disable it.
+engine_stats = EngineStats() if os.environ.get("MYTIMER_ENGINE_STATS", "1") != "0" else None
+manager.set_instrumentation(engine_stats)
 if STATE_FILE:
     manager.load_state(Path(STATE_FILE))
-ws_manager = WebSocketManager()
+# ``0`` means unlimited connections / no heartbeats / no idle reaping.
+WS_MAX_CONNECTIONS = int(os.environ.get("MYTIMER_WS_MAX_CONNECTIONS", "0"))
+WS_HEARTBEAT_INTERVAL = float(os.environ.get("MYTIMER_WS_HEARTBEAT_INTERVAL", "20"))
+WS_DEAD_TIMEOUT = float(os.environ.get("MYTIMER_WS_DEAD_TIMEOUT", "60"))
+WS_IDLE_TIMEOUT = float(os.environ.get("MYTIMER_WS_IDLE_TIMEOUT", "0"))
+ws_manager = WebSocketManager(
+    max_connections=WS_MAX_CONNECTIONS,
+    heartbeat_interval=WS_HEARTBEAT_INTERVAL,
+    dead_timeout=WS_DEAD_TIMEOUT,
+    idle_timeout=WS_IDLE_TIMEOUT,
+)
 websockets = ws_manager._websockets  # backward compatibility for tests
+change_feed = ChangeFeed()
+timer_index = TimerIndex(manager.timers)
+change_feed.add_listener(lambda version, timer_ids: timer_index.update(timer_ids))
+metrics = MetricsRegistry()
+profiler = Profiler()
+# Callbacks blocking the loop longer than this are logged with their stack;
+# ``0`` disables the lag probe.
+LOOP_LAG_THRESHOLD = float(os.environ.get("MYTIMER_LOOP_LAG_THRESHOLD", "0.1"))
+loop_monitor = LoopLagMonitor(threshold=LOOP_LAG_THRESHOLD)
+# Admin endpoints accept only ``MYTIMER_ADMIN_TOKEN``; without it they are
+# unreachable.
+admin_auth = ClientAuth()
+if os.environ.get("MYTIMER_ADMIN_TOKEN"):
+    admin_auth.register_device(os.environ["MYTIMER_ADMIN_TOKEN"])
+# Devices registered through ``POST /devices`` are rate limited per token
+# instead of per IP address.
+device_auth = ClientAuth()
+
+# Requests per second per client (``0`` disables limiting), bucket size, and
+# the maximum number of unfinished timers per client (``0`` for no cap).
+RATE_LIMIT = float(os.environ.get("MYTIMER_RATE_LIMIT", "0"))
+RATE_BURST = float(os.environ.get("MYTIMER_RATE_BURST", str(max(1.0, 2 * RATE_LIMIT))))
+MAX_TIMERS_PER_CLIENT = int(os.environ.get("MYTIMER_MAX_TIMERS_PER_CLIENT", "0"))
+# ``/tick`` touches every timer, so it drains the bucket faster.
+RATE_COSTS = {("POST", "/tick"): 5.0}
+rate_limiter = RateLimiter(RATE_LIMIT, RATE_BURST) if RATE_LIMIT > 0 else None
+timer_quota = (
+    TimerQuota(MAX_TIMERS_PER_CLIENT, manager.timers) if MAX_TIMERS_PER_CLIENT > 0 else None
+)
+if timer_quota is not None:
+    # Finishing, resetting and removing timers move them in and out of quota.
+    change_feed.add_listener(lambda version, timer_ids: timer_quota.refresh(timer_ids))
+
+MAX_LONG_POLL_TIMEOUT = 60.0
+# ``GET /timers`` returns pre-encoded bodies unless ``MYTIMER_FAST_JSON=0``.
+FAST_JSON = os.environ.get("MYTIMER_FAST_JSON", "1") != "0"
+# Timers per ``snapshot_chunk`` message and the order statuses are streamed in.
+SNAPSHOT_CHUNK_SIZE = 500
+SNAPSHOT_STATUS_ORDER = {"running": 0, "paused": 1, "finished": 2}
+# Invalid lines reported back by ``POST /timers/import``.
+MAX_IMPORT_ERRORS = 100
 
 discovery = create_discovery_server()
 auto_ticker = create_auto_ticker(manager)
+deadline_watcher = DeadlineWatcher(manager)
+
+
+
+def _on_timer_event(tid: int, timer) -> None:
+    seq = change_feed.record(tid)
+    _publish_update(tid, seq)
+
+
+def _on_timer_tick(tid: int, timer) -> None:
+    if TRANSITIONS_ONLY:
+        # Ticks are not transitions; the caller of ``/tick`` broadcasts once.
+        change_feed.record(tid)
+        return
+    _on_timer_event(tid, timer)
+
+
+manager.register_on_tick(_on_timer_tick)
+manager.register_on_finish(_on_timer_event)
+
+
+def _on_remote_change(timer_ids: list[int]) -> None:
+    """Fan out timers changed by another worker to this worker's clients."""
+    seq = change_feed.record(*timer_ids)
+    deadline_watcher.poke()
+    _push_remote(seq, timer_ids)
+
+
+def _push_remote(seq: int, timer_ids: list[int]) -> None:
+    _publish_changes(seq, *timer_ids)
+    for timer_id in timer_ids:
+        if timer_id not in manager.timers:
+            ws_manager.subscriptions.forget_timer(timer_id)
+
+
+async def _start_timekeeping() -> None:
+    if TRANSITIONS_ONLY:
+        await deadline_watcher.start()
+    else:
+        await auto_ticker.start()
+
+
+async def _stop_timekeeping() -> None:
+    await auto_ticker.stop()
+    await deadline_watcher.stop()
+
+
+# ``python -m mytimer.server.cluster`` runs several workers that share state
+# through ``MYTIMER_STATE_DB`` and announce changes on this socket.
+CLUSTER_SOCKET = os.environ.get("MYTIMER_CLUSTER_SOCKET")
+cluster = (
+    ClusterNode(
+        manager,
+        change_feed,
+        TimerStore(os.environ.get("MYTIMER_STATE_DB", "mytimer.db")),
+        CLUSTER_SOCKET,
+        on_remote_change=_on_remote_change,
+        on_leader=_start_timekeeping,
+        on_follower=_stop_timekeeping,
+    )
+    if CLUSTER_SOCKET
+    else None
+)
+if cluster is not None:
+    # Ticks advance every worker without writing each running timer.
+    auto_ticker.tick = cluster.tick
+
+
+def _on_replicated_snapshot() -> None:
+    """Re-index and push the state a leader sent in full."""
+    timer_index.rebuild()
+    timer_json.invalidate(())
+    _publish_state()
+
+
+def _on_replicated_change(seq: int, timer_ids: list[int]) -> None:
+    _push_remote(seq, timer_ids)
+
 
-manager.register_on_tick(lambda tid, t: asyncio.create_task(broadcast_update(tid)))
-manager.register_on_finish(lambda tid, t: asyncio.create_task(broadcast_update(tid)))
+# Leader/follower replication over TCP, see ``replication``.  Followers
+# mirror ``MYTIMER_REPLICATE_FROM`` and refuse writes until promoted; relays
+# (``python -m mytimer.server.relay``) mirror the ``/ws`` of
+# ``MYTIMER_RELAY_FROM`` the same way.  Both ends of a stream share
+# ``MYTIMER_REPLICATION_TOKEN``, which defaults to the admin token.
+REPLICATION_LISTEN = os.environ.get("MYTIMER_REPLICATION_LISTEN")
+REPLICATE_FROM = os.environ.get("MYTIMER_REPLICATE_FROM")
+RELAY_FROM = os.environ.get("MYTIMER_RELAY_FROM")
+REPLICATION_TOKEN = os.environ.get("MYTIMER_REPLICATION_TOKEN") or os.environ.get(
+    "MYTIMER_ADMIN_TOKEN"
+)
+if REPLICATE_FROM and RELAY_FROM:
+    raise RuntimeError("set either MYTIMER_REPLICATE_FROM or MYTIMER_RELAY_FROM, not both")
+if cluster is not None and (REPLICATION_LISTEN or REPLICATE_FROM or RELAY_FROM):
+    raise RuntimeError("replication cannot be combined with cluster mode")
+if (REPLICATION_LISTEN or REPLICATE_FROM) and not REPLICATION_TOKEN:
+    raise RuntimeError("replication needs MYTIMER_REPLICATION_TOKEN or MYTIMER_ADMIN_TOKEN")
+replication = Replication(
+    manager,
+    change_feed,
+    listen=REPLICATION_LISTEN,
+    leader=REPLICATE_FROM or RELAY_FROM,
+    token=REPLICATION_TOKEN,
+    api_port=int(os.environ["MYTIMER_API_PORT"]) if "MYTIMER_API_PORT" in os.environ else None,
+    on_snapshot=_on_replicated_snapshot,
+    on_change=_on_replicated_change,
+    on_promote=_start_timekeeping,
+    on_demote=_stop_timekeeping,
+)
+
+log = logging.getLogger("mytimer.server")
+# JSON logs written by a background thread; ``-`` writes them to stderr.
+LOG_FILE = os.environ.get("MYTIMER_LOG_FILE")
+structured_logging = (
+    StructuredLogging(
+        None if LOG_FILE == "-" else LOG_FILE,
+        level=logging.getLevelName(os.environ.get("MYTIMER_LOG_LEVEL", "INFO").upper()),
+        sample_rates=parse_sample_rates(
+            os.environ.get("MYTIMER_LOG_SAMPLE", "tick=0.01,broadcast=0.01")
+        ),
+        max_bytes=int(os.environ.get("MYTIMER_LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+        backups=int(os.environ.get("MYTIMER_LOG_BACKUPS", "5")),
+    )
+    if LOG_FILE
+    else None
+)
+
+# Socket and state handoff to a replacement process, see ``handoff.main``.
+handoff = Handoff()
+
+# Optional Unix domain socket served alongside TCP for local clients.
+UNIX_SOCKET = os.environ.get("MYTIMER_UNIX_SOCKET")
+unix_listener = UnixSocketListener(UNIX_SOCKET) if UNIX_SOCKET else None
+
+
+def _collect_metrics():
+    """Yield gauges and WebSocket counters computed at scrape time."""
+    counts = dict.fromkeys(STATUSES, 0)
+    for timer in manager.timers.values():
+        counts[timer_status(timer)] += 1
+    yield from gauge_lines(
+        "mytimer_timers",
+        "Timers by state.",
+        (({"state": state}, count) for state, count in counts.items()),
+    )
+    yield from gauge_lines(
+        "mytimer_websocket_connections",
+        "Open WebSocket connections.",
+        [({}, len(ws_manager._websockets))],
+    )
+    pending, deepest = ws_manager.pending_sends()
+    yield from gauge_lines(
+        "mytimer_websocket_pending_sends",
+        "WebSocket sends awaiting the transport across all connections.",
+        [({}, pending)],
+    )
+    yield from gauge_lines(
+        "mytimer_websocket_pending_sends_max",
+        "Largest number of pending sends on a single connection.",
+        [({}, deepest)],
+    )
+    yield from counter_lines(
+        "mytimer_websocket_messages_sent_total",
+        "WebSocket messages delivered.",
+        [({}, ws_manager.messages_sent)],
+    )
+    yield from counter_lines(
+        "mytimer_websocket_bytes_sent_total",
+        "WebSocket payload bytes delivered.",
+        [({}, ws_manager.bytes_sent)],
+    )
+    yield from counter_lines(
+        "mytimer_websocket_refused_total",
+        "WebSocket connections refused at the connection cap.",
+        [({}, ws_manager.refused)],
+    )
+    yield from counter_lines(
+        "mytimer_websocket_reaped_total",
+        "WebSocket connections closed by the server for being dead or idle.",
+        [({"reason": reason}, count) for reason, count in ws_manager.reaped.items()],
+    )
+    yield from histogram_lines(
+        "mytimer_websocket_fanout_duration_seconds",
+        "Time to deliver one message to all of its recipients.",
+        [({}, ws_manager.fanout_seconds)],
+    )
+    yield from histogram_lines(
+        "mytimer_event_loop_lag_seconds",
+        "Delay between when the loop probe was due and when it ran.",
+        [({}, loop_monitor.histogram)],
+    )
+    yield from counter_lines(
+        "mytimer_event_loop_stalls_total",
+        "Times a callback blocked the event loop longer than the threshold.",
+        [({}, loop_monitor.stalls)],
+    )
+    if replication.source is not None:
+        yield from gauge_lines(
+            "mytimer_replication_followers",
+            "Followers connected to this server's replication stream.",
+            [({}, replication.source.followers)],
+        )
+        yield from counter_lines(
+            "mytimer_replication_followers_dropped_total",
+            "Followers disconnected for falling too far behind.",
+            [({}, replication.source.dropped)],
+        )
+    if structured_logging is not None:
+        yield from counter_lines(
+            "mytimer_log_records_dropped_total",
+            "Log records dropped because the writer queue was full.",
+            [({}, structured_logging.dropped)],
+        )
+        yield from counter_lines(
+            "mytimer_log_records_sampled_out_total",
+            "High-frequency log records skipped by sampling.",
+            [({}, structured_logging.sampled_out)],
+        )
+    if engine_stats is not None:
+        yield from histogram_lines(
+            "mytimer_engine_operation_duration_seconds",
+            "Time spent in TimerManager operations.",
+            (
+                ({"operation": name}, hist)
+                for name, hist in engine_stats.operations.items()
+            ),
+        )
+        yield from histogram_lines(
+            "mytimer_timer_finish_lateness_seconds",
+            "Delay between a timer's deadline and when it was marked finished.",
+            [({}, engine_stats.finish_lateness)],
+        )
+
+
+metrics.add_collector(_collect_metrics)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if structured_logging is not None:
+        structured_logging.start()
+    if handoff.taking_over:
+        _restore_handoff_state(await handoff.receive_state())
+    metrics.preallocate(
+        route.path for route in app.routes if isinstance(route, APIRoute)
+    )
     await discovery.start()
-    await auto_ticker.start()
+    await ws_manager.start_reaper()
+    if LOOP_LAG_THRESHOLD > 0:
+        await loop_monitor.start()
+    if cluster is not None:
+        await cluster.start()
+    await replication.start()
+    # In a cluster only the leader advances timers; followers never do.
+    if (cluster is None or cluster.is_leader) and not replication.is_follower:
+        await _start_timekeeping()
+    if unix_listener is not None:
+        await unix_listener.start(app)
+    if cluster is None:
+        # Cluster workers share their state through the database instead.
+        await handoff.serve(
+            _export_handoff_state, _resume_after_handoff, _drain_after_handoff
+        )
+    handoff.ready()
     try:
         yield
     finally:
-        if STATE_FILE:
+        await handoff.close()
+        if unix_listener is not None:
+            await unix_listener.stop()
+        # After a handoff the state file belongs to the new process.
+        if STATE_FILE and not handoff.handed_over:
             manager.save_state(Path(STATE_FILE))
-        await auto_ticker.stop()
+        await _stop_timekeeping()
+        await loop_monitor.stop()
+        if cluster is not None:
+            await cluster.stop()
+        await replication.stop()
+        await ws_manager.stop_reaper()
         await discovery.stop()
+        if structured_logging is not None:
+            structured_logging.stop()
+
+
+async def _export_handoff_state() -> dict:
+    """Stop timekeeping and return what a replacement process needs."""
+    await _stop_timekeeping()
+    await discovery.stop()
+    # The new process listens on the replication address and reconnects.
+    await replication.stop()
+    if unix_listener is not None:
+        # The new process binds the path before it reports ready.
+        unix_listener.detach()
+    state = {"timers": manager.export_state(), "feed": change_feed.export()}
+    if timer_quota is not None:
+        state["owners"] = timer_quota.owners()
+    return state
+
+
+def _restore_handoff_state(state: dict) -> None:
+    manager.restore_state(state["timers"])
+    change_feed.restore(state["feed"])
+    timer_index.rebuild()
+    timer_json.invalidate(())
+    if timer_quota is not None:
+        for timer_id, owner in state.get("owners", {}).items():
+            timer_quota.assign(int(timer_id), owner)
+
+
+async def _resume_after_handoff() -> None:
+    """Undo :func:`_export_handoff_state` after a failed reload."""
+    await discovery.start()
+    if unix_listener is not None:
+        await unix_listener.stop()
+        await unix_listener.start(app)
+    await replication.start()
+    if not replication.is_follower:
+        await _start_timekeeping()
+
+
+def _drain_after_handoff() -> None:
+    # Long-polls return at once and SSE streams end; their clients reconnect
+    # to the new process with the same epoch and version.
+    change_feed.release_waiters()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    RateLimitMiddleware,
+    is_device=lambda token: device_auth.validate(token) is not None,
+    limiter=rate_limiter,
+    quota=timer_quota,
+    costs=RATE_COSTS,
+)
+app.add_middleware(MetricsMiddleware, registry=metrics)
+app.add_middleware(HandoffMiddleware, handoff=handoff)
+app.add_middleware(ReadOnlyReplicaMiddleware, replication=replication)
+
+
+TIMER_FIELDS = ("duration", "remaining", "running", "finished", "created_at", "start_at")
+
+
+def _timer_payload(timer) -> dict:
+    """Return the public JSON representation of ``timer``."""
+    remaining = timer.remaining_at() if TRANSITIONS_ONLY else timer.remaining_now()
+    return {
+        "duration": timer.duration,
+        "remaining": remaining,
+        "running": timer.running,
+        "finished": timer.finished or remaining <= 0,
+        "created_at": timer.created_at,
+        "start_at": timer.start_at,
+    }
+
+
+def _payload_is_static(timer) -> bool:
+    """Return ``True`` if ``timer``'s payload only changes when it mutates."""
+    return not TRANSITIONS_ONLY or not timer.running or timer.finished
+
+
+timer_json = TimerJSONCache(manager.timers, _timer_payload, _payload_is_static)
+change_feed.add_listener(lambda version, timer_ids: timer_json.invalidate(timer_ids))
 
 
 async def broadcast_state() -> None:
     """Send the current timer state to all connected WebSocket clients."""
+    _publish_state()
 
+
+def _publish_state() -> None:
     data = {
-        timer_id: {
-            "duration": timer.duration,
-            "remaining": timer.remaining_now(),
-            "running": timer.running,
-            "finished": timer.finished or timer.remaining_now() <= 0,
-            "created_at": timer.created_at,
-            "start_at": timer.start_at,
-        }
+        timer_id: _timer_payload(timer)
         for timer_id, timer in manager.timers.items()
     }
-    await ws_manager.broadcast_json(data)
+    ws_manager.publish_snapshot(
+        data,
+        ((timer_id, timer_status(timer)) for timer_id, timer in manager.timers.items()),
+        change_feed.version,
+    )
+    log.info(
+        "broadcast snapshot",
+        extra={"event": "broadcast", "timers": len(data), "seq": change_feed.version},
+    )
+
+
+def _update_message(timer_id: int, timer, seq: int) -> dict:
+    return {
+        "type": "update",
+        "timer_id": str(timer_id),
+        "seq": seq,
+        "server_time": time.time(),
+        **_timer_payload(timer),
+    }
+
+
+def _remove_message(timer_id: int, seq: int) -> dict:
+    return {
+        "type": "remove",
+        "timer_id": str(timer_id),
+        "seq": seq,
+        "server_time": time.time(),
+    }
+
+
+async def push_changes(seq: int, *timer_ids: int) -> None:
+    """Notify WebSocket clients that ``timer_ids`` changed at version ``seq``.
+
+    In ``transitions`` push mode a single changed timer is sent as one
+    ``update`` or ``remove`` message; otherwise, and for bulk operations, the
+    full state is broadcast.
+    """
+    _publish_changes(seq, *timer_ids)
+
+
+def _publish_changes(seq: int, *timer_ids: int) -> None:
+    # Messages are queued without yielding to the loop, so clients receive
+    # them in the order the change feed numbered them.
+    if TRANSITIONS_ONLY and len(timer_ids) == 1:
+        timer_id = timer_ids[0]
+        if timer_id in manager.timers:
+            _publish_update(timer_id, seq)
+        else:
+            ws_manager.publish(
+                _remove_message(timer_id, seq),
+                timer_id,
+                ws_manager.subscriptions.last_status(timer_id),
+            )
+        return
+    _publish_state()
+
 
+async def broadcast_update(timer_id: int, seq: int | None = None) -> None:
+    """Push the state of ``timer_id`` numbered with change feed version ``seq``."""
+    _publish_update(timer_id, seq)
 
-async def broadcast_update(timer_id: int) -> None:
+
+def _publish_update(timer_id: int, seq: int | None = None) -> None:
     timer = manager.timers.get(timer_id)
     if not timer:
         return
-    await ws_manager.broadcast_json(
-        {
-            "type": "update",
-            "timer_id": str(timer_id),
-            "duration": timer.duration,
-            "remaining": timer.remaining_now(),
-            "running": timer.running,
-            "finished": timer.finished or timer.remaining_now() <= 0,
-            "created_at": timer.created_at,
-            "start_at": timer.start_at,
-        }
+    if seq is None:
+        seq = change_feed.version
+    ws_manager.publish(
+        _update_message(timer_id, timer, seq),
+        timer_id,
+        timer_status(timer),
+    )
+    log.info(
+        "broadcast update",
+        extra={"event": "broadcast", "timer_id": timer_id, "seq": seq},
     )
 
 
 @app.post("/timers")
-async def create_timer(duration: float):
+async def create_timer(duration: float, request: Request):
     """Create a new timer with the given duration in seconds."""
+    return await _create_timer(duration, request.state.client_key)
 
+
+async def _create_timer(duration: float, client: str) -> dict:
+    """Create a timer owned by ``client`` for REST and WebSocket commands."""
     if duration <= 0:
         raise HTTPException(status_code=400, detail="Duration must be positive")
 
     timer_id = manager.create_timer(duration)
-    await broadcast_state()
+    if timer_quota is not None:
+        timer_quota.assign(timer_id, client)
+    seq = change_feed.record(timer_id)
+    deadline_watcher.poke()
+    log.info(
+        "timer created",
+        extra={"event": "timer.create", "timer_id": timer_id, "duration": duration},
+    )
+    await push_changes(seq, timer_id)
     return {"timer_id": timer_id}
 
 
 @app.get("/timers")
-async def list_timers():
-    """Return the state of all existing timers."""
+async def list_timers(
+    response: Response,
+    status: str | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    fields: str | None = None,
+    fmt: str | None = Query(None, alias="format"),
+):
+    """Return the state of all existing timers, or one page of them.
+
+    Without query parameters every timer is returned. Any of ``status``,
+    ``limit``, ``cursor``, ``fields`` or ``format`` selects a page of at most
+    ``limit`` timers ordered by id, served from :class:`TimerIndex`; pass the
+    returned ``next_cursor`` back to continue. ``fields`` is a comma
+    separated projection and ``format=columnar`` returns one array per field.
+    """
+    response.headers["X-Timer-Version"] = str(change_feed.version)
+    response.headers["X-Timer-Epoch"] = change_feed.epoch
+    if status is limit is cursor is fields is fmt is None:
+        if FAST_JSON:
+            return JSONBytesResponse(timer_json.body(), headers=dict(response.headers))
+        return {
+            timer_id: _timer_payload(timer)
+            for timer_id, timer in manager.timers.items()
+        }
+
+    if fmt not in (None, "objects", "columnar"):
+        raise HTTPException(status_code=400, detail="format must be 'objects' or 'columnar'")
+    selected = TIMER_FIELDS
+    if fields is not None:
+        selected = tuple(f for f in fields.split(",") if f)
+        unknown = set(selected).difference(TIMER_FIELDS)
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"unknown field: {', '.join(sorted(unknown))}"
+            )
+    try:
+        after = int(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    try:
+        ids, next_cursor = timer_index.page(status, after, limit or DEFAULT_PAGE_SIZE)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    next_cursor = None if next_cursor is None else str(next_cursor)
+    if FAST_JSON and fields is None and fmt != "columnar":
+        timers = b",".join(
+            timer_json.fragment(timer_id, manager.timers[timer_id]) for timer_id in ids
+        )
+        return JSONBytesResponse(
+            b'{"timers":{' + timers + b'},"next_cursor":' + json_bytes(next_cursor) + b"}",
+            headers=dict(response.headers),
+        )
+    payloads = [_timer_payload(manager.timers[timer_id]) for timer_id in ids]
+    if fmt == "columnar":
+        return {
+            "ids": ids,
+            "columns": {f: [p[f] for p in payloads] for f in selected},
+            "next_cursor": next_cursor,
+        }
     return {
-        timer_id: {
-            "duration": timer.duration,
-            "remaining": timer.remaining_now(),
-            "running": timer.running,
-            "finished": timer.finished or timer.remaining_now() <= 0,
-            "created_at": timer.created_at,
-            "start_at": timer.start_at,
+        "timers": {
+            str(timer_id): {f: p[f] for f in selected}
+            for timer_id, p in zip(ids, payloads)
+        },
+        "next_cursor": next_cursor,
+    }
+
+
+@app.get("/timers/changes")
+async def timer_changes(since: int = 0, timeout: float = 30.0, epoch: str | None = None):
+    """Long-poll for timer changes newer than version ``since``.
+
+    Returns immediately when newer changes exist, otherwise waits up to
+    ``timeout`` seconds for one. ``timers`` maps changed ids to their current
+    state, or ``null`` for removed timers. When ``reset`` is true the client's
+    version is unknown or too old and ``timers`` holds a full snapshot.
+    """
+    if timeout < 0:
+        raise HTTPException(status_code=400, detail="timeout must be non-negative")
+    if change_feed.changes_since(since, epoch) is not None:
+        await change_feed.wait(since, min(timeout, MAX_LONG_POLL_TIMEOUT))
+    changed = change_feed.changes_since(since, epoch)
+    if changed is None:
+        timers = {
+            str(timer_id): _timer_payload(timer)
+            for timer_id, timer in manager.timers.items()
         }
-        for timer_id, timer in manager.timers.items()
+    else:
+        timers = {
+            str(timer_id): (
+                _timer_payload(manager.timers[timer_id])
+                if timer_id in manager.timers
+                else None
+            )
+            for timer_id in changed
+        }
+    return {
+        "epoch": change_feed.epoch,
+        "version": change_feed.version,
+        "reset": changed is None,
+        "server_time": time.time(),
+        "timers": timers,
     }
 
 
+@app.get("/timers/export")
+async def export_timers():
+    """Stream every timer as one NDJSON line, in constant memory."""
+
+    def lookup(timer_id: int) -> dict | None:
+        timer = manager.timers.get(timer_id)
+        return _timer_payload(timer) if timer is not None else None
+
+    return StreamingResponse(
+        ndjson.export_lines(list(manager.timers), lookup),
+        media_type=ndjson.MEDIA_TYPE,
+        headers={
+            "X-Timer-Version": str(change_feed.version),
+            "X-Timer-Epoch": change_feed.epoch,
+        },
+    )
+
+
+def _import_batch(lines: list, preserve_ids: bool, errors: list, client: str) -> tuple[int, int]:
+    """Insert one batch of NDJSON lines owned by ``client``.
+
+    Returns how many timers were added and how many unfinished timers were
+    skipped because they would exceed the client's timer quota.
+    """
+    room = None
+    if timer_quota is not None:
+        room = max(0, timer_quota.limit - timer_quota.count(client))
+    added = []
+    skipped = 0
+    for timer_id, timer in ndjson.parse_batch(lines, errors, MAX_IMPORT_ERRORS):
+        if room is not None and not timer.finished:
+            if room == 0:
+                skipped += 1
+                continue
+            room -= 1
+        added.append(manager.add_timer(timer, timer_id if preserve_ids else None))
+    if timer_quota is not None:
+        for timer_id in added:
+            timer_quota.assign(timer_id, client)
+    change_feed.record(*added)
+    return len(added), skipped
+
+
+@app.post("/timers/import")
+async def import_timers(request: Request, preserve_ids: bool = False):
+    """Create timers from a streamed NDJSON body as produced by ``/timers/export``.
+
+    Lines are inserted in batches while the body is still arriving and all
+    clients receive a single broadcast at the end. With ``preserve_ids`` the
+    exported ids are kept, replacing existing timers with the same id.
+    Invalid lines are skipped and reported in ``errors``. Unfinished timers
+    count against the client's timer quota; those beyond it are skipped and
+    counted in ``over_quota``.
+    """
+    client = request.state.client_key
+    imported = 0
+    over_quota = 0
+    errors: list = []
+    batch: list = []
+    failure = None
+
+    def flush() -> None:
+        nonlocal imported, over_quota
+        added, skipped = _import_batch(batch, preserve_ids, errors, client)
+        imported += added
+        over_quota += skipped
+
+    try:
+        async for item in ndjson.iter_lines(request.stream()):
+            batch.append(item)
+            if len(batch) >= ndjson.BATCH_SIZE:
+                flush()
+                batch = []
+        flush()
+    except ValueError as exc:
+        failure = str(exc)
+    if imported:
+        deadline_watcher.poke()
+        await broadcast_state()
+    if failure is not None:
+        raise HTTPException(
+            status_code=400, detail=f"{failure}; {imported} timers were imported"
+        )
+    result = {"imported": imported, "errors": errors}
+    if timer_quota is not None:
+        result["over_quota"] = over_quota
+    return result
+
+
 @app.post("/timers/{timer_id}/pause")
 async def pause_timer(timer_id: int):
     """Pause a running timer."""
     if timer_id not in manager.timers:
         raise HTTPException(status_code=404, detail="Timer not found")
+    if TRANSITIONS_ONLY:
+        manager.settle(timer_id)
     manager.pause_timer(timer_id)
-    await broadcast_state()
+    seq = change_feed.record(timer_id)
+    await push_changes(seq, timer_id)
     return JSONResponse(status_code=200, content={"status": "paused"})
 
 
@@ -124,7 +802,9 @@ async def resume_timer(timer_id: int):
     if timer_id not in manager.timers:
         raise HTTPException(status_code=404, detail="Timer not found")
     manager.resume_timer(timer_id)
-    await broadcast_state()
+    seq = change_feed.record(timer_id)
+    deadline_watcher.poke()
+    await push_changes(seq, timer_id)
     return JSONResponse(status_code=200, content={"status": "resumed"})
 
 
@@ -134,14 +814,26 @@ async def remove_timer(timer_id: int):
     if timer_id not in manager.timers:
         raise HTTPException(status_code=404, detail="Timer not found")
     manager.remove_timer(timer_id)
-    await broadcast_state()
+    if timer_quota is not None:
+        timer_quota.release(timer_id)
+    seq = change_feed.record(timer_id)
+    log.info("timer removed", extra={"event": "timer.remove", "timer_id": timer_id})
+    await push_changes(seq, timer_id)
+    ws_manager.subscriptions.forget_timer(timer_id)
     return JSONResponse(status_code=200, content={"status": "removed"})
 
 
 @app.delete("/timers")
 async def remove_all_timers():
     """Delete all timers managed by the server."""
+    removed = list(manager.timers)
     manager.remove_all()
+    if timer_quota is not None:
+        for timer_id in removed:
+            timer_quota.release(timer_id)
+    change_feed.record(*removed)
+    for timer_id in removed:
+        ws_manager.subscriptions.forget_timer(timer_id)
     await broadcast_state()
     return {"status": "all_removed"}
 
@@ -149,7 +841,10 @@ async def remove_all_timers():
 @app.post("/timers/pause_all")
 async def pause_all_timers():
     """Pause all running timers."""
+    if TRANSITIONS_ONLY:
+        manager.settle()
     manager.pause_all()
+    change_feed.record(*manager.timers)
     await broadcast_state()
     return {"status": "all_paused"}
 
@@ -158,6 +853,8 @@ async def pause_all_timers():
 async def resume_all_timers():
     """Resume all paused timers."""
     manager.resume_all()
+    change_feed.record(*manager.timers)
+    deadline_watcher.poke()
     await broadcast_state()
     return {"status": "all_resumed"}
 
@@ -166,6 +863,8 @@ async def resume_all_timers():
 async def reset_all_timers():
     """Reset all timers to their initial durations."""
     manager.reset_all()
+    change_feed.record(*manager.timers)
+    deadline_watcher.poke()
     await broadcast_state()
     return {"status": "all_reset"}
 
@@ -175,26 +874,204 @@ async def tick(seconds: float):
     """Advance all timers by ``seconds``."""
     if seconds < 0:
         raise HTTPException(status_code=400, detail="seconds must be non-negative")
-    manager.tick(seconds)
+    if cluster is not None:
+        await cluster.tick(seconds)
+    else:
+        manager.tick(seconds)
+    deadline_watcher.poke()
+    log.info("tick", extra={"event": "tick", "seconds": seconds})
     await broadcast_state()
     return {"status": "ticked"}
 
 
+# Operations accepted as WebSocket ``command`` messages, see ``_run_ws_command``.
+WS_TIMER_COMMANDS = {"pause": pause_timer, "resume": resume_timer, "remove": remove_timer}
+WS_BULK_COMMANDS = {
+    "pause_all": pause_all_timers,
+    "resume_all": resume_all_timers,
+    "reset_all": reset_all_timers,
+    "remove_all": remove_all_timers,
+}
+# REST route whose rate limit cost a command shares.
+WS_COMMAND_ROUTES = {"create": ("POST", "/timers"), "tick": ("POST", "/tick")}
+
+
+@app.get("/time")
+async def server_time(t0: float):
+    """Answer a clock sync ping sent at client time ``t0``.
+
+    Returns ``t0`` with the server receive (``t1``) and send (``t2``) times.
+    """
+    return pong(t0, time.time())
+
+
 @app.get("/status")
 async def server_status():
     """Return basic server status information."""
     return {
         "timers": len(manager.timers),
         "running": manager.running_count(),
+        "push_mode": PUSH_MODE,
+        "server_time": time.time(),
+    }
+
+
+async def event_stream(since: int, epoch: str | None, request: Request | None = None):
+    """Yield SSE messages for every change after ``since``.
+
+    Each subscriber only holds its own feed position; deltas are rebuilt from
+    the shared :class:`ChangeFeed` so no per-subscriber queue is kept.
+    """
+    while True:
+        changed = change_feed.changes_since(since, epoch)
+        version = change_feed.version
+        event_id = sse.format_event_id(change_feed.epoch, version)
+        if changed is None:
+            snapshot = {
+                str(timer_id): _timer_payload(timer)
+                for timer_id, timer in manager.timers.items()
+            }
+            yield sse.format_event(snapshot, event_id=event_id)
+        else:
+            ordered = sorted(changed)
+            for index, timer_id in enumerate(ordered):
+                timer = manager.timers.get(timer_id)
+                if timer is None:
+                    message = _remove_message(timer_id, version)
+                else:
+                    message = _update_message(timer_id, timer, version)
+                # Only the last event of a batch carries an id so a client
+                # resuming mid-batch replays the whole batch.
+                last = index == len(ordered) - 1
+                yield sse.format_event(message, event_id=event_id if last else None)
+        since, epoch = version, change_feed.epoch
+        await change_feed.wait(since, sse.KEEPALIVE_INTERVAL)
+        if handoff.handed_over:
+            return
+        if request is not None and await request.is_disconnected():
+            return
+        if change_feed.version == since:
+            yield ": keepalive\n\n"
+
+
+@app.get("/events")
+async def events(
+    request: Request,
+    last_event_id: str | None = Header(None, alias="Last-Event-ID"),
+):
+    """Stream timer updates as Server-Sent Events.
+
+    The first message is a full snapshot unless ``Last-Event-ID`` refers to a
+    version still held by the change feed, in which case only the missed
+    updates are replayed.
+    """
+    epoch, since = sse.parse_last_event_id(last_event_id)
+    return StreamingResponse(
+        event_stream(since, epoch, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/ws/stats")
+async def websocket_stats():
+    """Return WebSocket connection counts and frame compression statistics."""
+    return {
+        "connections": len(ws_manager._websockets),
+        "max_connections": ws_manager.max_connections,
+        "refused": ws_manager.refused,
+        "reaped": ws_manager.reaped,
+        "compression": ws_manager.compressor.stats(),
     }
 
 
+@app.get("/ws/connections", dependencies=[Depends(admin_auth.dependency)])
+async def websocket_connections():
+    """Return per-connection age, idle time, traffic and queue depth."""
+    return {"connections": ws_manager.connection_stats()}
+
+
+@app.get("/replication")
+async def replication_status():
+    """Return this server's replication role, feed position and links."""
+    return replication.status()
+
+
+@app.post("/replication/promote", dependencies=[Depends(admin_auth.dependency)])
+async def promote_replica():
+    """Stop following the leader and accept writes (manual failover)."""
+    promoted = await replication.promote()
+    return {"promoted": promoted, **replication.status()}
+
+
+@app.post("/replication/follow", dependencies=[Depends(admin_auth.dependency)])
+async def follow_leader(leader: str):
+    """Replicate from ``leader`` (``host:port``, or a URL to relay), discarding local writes."""
+    if cluster is not None:
+        raise HTTPException(status_code=409, detail="Cluster workers cannot follow a leader")
+    try:
+        await replication.follow(leader)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return replication.status()
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Return server metrics in the Prometheus text exposition format."""
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.post("/devices", dependencies=[Depends(admin_auth.dependency)])
+async def register_device():
+    """Issue a device token used for per-device rate limits and quotas."""
+    token, device_id = device_auth.register_device()
+    return {"token": token, "device_id": device_id}
+
+
+@app.get("/debug/engine")
+async def engine_statistics():
+    """Return TimerManager operation counts, timings and finish lateness."""
+    if engine_stats is None:
+        return {"enabled": False}
+    return {"enabled": True, **engine_stats.snapshot()}
+
+
+@app.post("/debug/profile", dependencies=[Depends(admin_auth.dependency)])
+async def profile_server(seconds: float = 5.0, fmt: str = Query("text", alias="format")):
+    """Profile the running server for ``seconds`` and return the result.
+
+    ``format`` is ``text`` for a cProfile report sorted by cumulative time,
+    ``pstats`` for a binary dump loadable with :class:`pstats.Stats`, or
+    ``collapsed`` for sampled stacks in flamegraph format.
+    """
+    try:
+        output, fmt = await profiler.profile(seconds, fmt)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    if fmt == "pstats":
+        return Response(
+            content=output,
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": 'attachment; filename="mytimer.prof"'},
+        )
+    headers = {}
+    if fmt == "collapsed":
+        headers["Content-Disposition"] = 'attachment; filename="mytimer.folded"'
+    return Response(content=output, media_type="text/plain", headers=headers)
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket):
     """WebSocket endpoint for real-time timer updates."""
-    await ws_manager.connect(ws)
+    if not await ws_manager.connect(ws):
+        return
+    if ws_manager.is_sequenced(ws):
+        await _send_resume(ws)
     # send current timer state immediately after connection if any timers exist
-    if manager.timers:
+    elif manager.timers:
             await ws_manager.send_json(
             ws,
             {
@@ -211,8 +1088,266 @@ async def websocket_endpoint(ws: WebSocket):
         )
     try:
         while True:
-            await ws.receive_text()
+            text = await ws.receive_text()
+            received_at = time.time()
+            try:
+                message = json.loads(text)
+            except json.JSONDecodeError:
+                ws_manager.touch(ws)
+                await ws_manager.send_json(ws, {"type": "error", "detail": "Invalid JSON"})
+                continue
+            heartbeat = isinstance(message, dict) and message.get("type") == "heartbeat"
+            ws_manager.touch(ws, heartbeat)
+            if heartbeat:
+                continue
+            await handle_ws_message(ws, message, received_at)
     except WebSocketDisconnect:
         pass
     finally:
         ws_manager.disconnect(ws)
+
+
+async def _send_resume(ws: WebSocket) -> None:
+    """Greet a numbered client and bring it up to date.
+
+    Messages are numbered with the change feed version. A client that passes
+    ``since`` and ``epoch`` of the last message it saw gets only the timers
+    changed after it; if that history was evicted, or the server restarted,
+    it receives a full snapshot instead.
+    """
+    try:
+        since = int(ws.query_params.get("since", -1))
+    except ValueError:
+        since = -1
+    changed = change_feed.changes_since(since, ws.query_params.get("epoch"))
+    seq = change_feed.version
+    await ws_manager.send_json(
+        ws,
+        {
+            "type": "hello",
+            "epoch": change_feed.epoch,
+            "seq": seq,
+            "resumed": changed is not None,
+            "push_mode": PUSH_MODE,
+            "commands": True,
+            "server_time": time.time(),
+        },
+    )
+    if changed is None:
+        if ws.query_params.get("snapshot") == "chunked":
+            await _send_chunked_snapshot(ws, seq)
+        else:
+            await ws_manager.send_snapshot(ws, _snapshot_for(ws), seq)
+        return
+    for timer_id in sorted(changed):
+        timer = manager.timers.get(timer_id)
+        if timer is None:
+            message = _remove_message(timer_id, seq)
+        else:
+            message = _update_message(timer_id, timer, seq)
+        await ws_manager.send_json(ws, message)
+
+
+def _snapshot_rank(timer_id: int, timer) -> tuple:
+    """Sort key putting running timers that expire soonest first."""
+    status = timer_status(timer)
+    remaining = timer.remaining_at() if TRANSITIONS_ONLY else timer.remaining_now()
+    return (SNAPSHOT_STATUS_ORDER[status], remaining, timer_id)
+
+
+async def _send_chunked_snapshot(ws: WebSocket, seq: int) -> None:
+    """Stream the snapshot for ``ws`` in ordered chunks.
+
+    ``snapshot_begin`` announces the number of timers, each
+    ``snapshot_chunk`` holds up to :data:`SNAPSHOT_CHUNK_SIZE` timers (running
+    ones expiring soonest first, then paused, then finished) and
+    ``snapshot_end`` closes the stream. Payloads are read when their chunk is
+    sent and the loop is yielded between chunks, so live ``update`` and
+    ``remove`` messages interleave with the chunks and never carry older
+    state than a later chunk; timers removed meanwhile are skipped.
+    """
+    subs = ws_manager.subscriptions
+    if subs.is_filtered(ws):
+        timers, statuses = subs.topics(ws)
+        wanted_ids, wanted_statuses = set(timers), set(statuses)
+        keys = [
+            _snapshot_rank(tid, t)
+            for tid, t in manager.timers.items()
+            if tid in wanted_ids or timer_status(t) in wanted_statuses
+        ]
+    else:
+        keys = [_snapshot_rank(tid, t) for tid, t in manager.timers.items()]
+    await ws_manager.send_json(
+        ws,
+        {"type": "snapshot_begin", "seq": seq, "total": len(keys), "server_time": time.time()},
+    )
+    # Select the first chunk in O(n) so it goes out before the full sort.
+    first = heapq.nsmallest(SNAPSHOT_CHUNK_SIZE, keys)
+    chunks = [first]
+    if len(keys) > len(first):
+        sent = {key[-1] for key in first}
+        rest = sorted(key for key in keys if key[-1] not in sent)
+        chunks.extend(
+            rest[start:start + SNAPSHOT_CHUNK_SIZE]
+            for start in range(0, len(rest), SNAPSHOT_CHUNK_SIZE)
+        )
+    index = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if ws not in ws_manager._websockets:
+            return
+        timers = {}
+        for key in chunk:
+            timer = manager.timers.get(key[-1])
+            if timer is not None:
+                timers[key[-1]] = _timer_payload(timer)
+        await ws_manager.send_json(
+            ws, {"type": "snapshot_chunk", "seq": seq, "index": index, "timers": timers}
+        )
+        index += 1
+        await asyncio.sleep(0)
+    await ws_manager.send_json(ws, {"type": "snapshot_end", "seq": seq, "chunks": index})
+
+
+def _subscription_topics(message: dict) -> tuple[list[int], list[str]]:
+    """Return the timer ids and statuses of a ``subscribe``/``unsubscribe``.
+
+    Raises
+    ------
+    ValueError
+        If a field is not a list, or a timer id is not an integer.
+    """
+    timers = message.get("timers", [])
+    statuses = message.get("status", [])
+    if not isinstance(timers, list) or not isinstance(statuses, list):
+        raise ValueError("timers and status must be lists")
+    for tid in timers:
+        if isinstance(tid, bool) or not isinstance(tid, int):
+            raise ValueError(f"invalid timer id: {tid!r}")
+    return timers, [str(status) for status in statuses]
+
+
+async def handle_ws_message(
+    ws: WebSocket, message, received_at: float | None = None
+) -> None:
+    """Dispatch a JSON message received from a WebSocket client.
+
+    ``subscribe`` and ``unsubscribe`` take optional ``timers`` (ids) and
+    ``status`` (``running``/``paused``/``finished``) lists. Once subscribed a
+    client only receives updates for those topics; an ``unsubscribe`` without
+    topics restores the default of receiving everything.
+
+    ``{"type": "ping", "t0": <client time>}`` is answered with a ``pong``
+    carrying ``t0`` plus the server receive (``t1``) and send (``t2``) times
+    for clock offset estimation.
+    """
+    kind = message.get("type") if isinstance(message, dict) else None
+    if kind == "command":
+        await ws_manager.send_json(ws, await _run_ws_command(ws, message))
+    elif kind == "ping":
+        t0 = message.get("t0")
+        if not isinstance(t0, (int, float)):
+            await ws_manager.send_json(ws, {"type": "error", "detail": "ping requires numeric t0"})
+            return
+        await ws_manager.send_json(ws, pong(t0, received_at or time.time()))
+    elif kind in {"subscribe", "unsubscribe"}:
+        try:
+            timers, statuses = _subscription_topics(message)
+            if kind == "subscribe":
+                ws_manager.subscribe(ws, timers, statuses)
+            else:
+                ws_manager.unsubscribe(ws, timers, statuses)
+        except ValueError as exc:
+            await ws_manager.send_json(ws, {"type": "error", "detail": str(exc)})
+            return
+        timers, statuses = ws_manager.subscriptions.topics(ws)
+        await ws_manager.send_json(
+            ws,
+            {
+                "type": "subscribed",
+                "filtered": ws_manager.subscriptions.is_filtered(ws),
+                "timers": timers,
+                "status": statuses,
+            },
+        )
+        await ws_manager.send_snapshot(ws, _snapshot_for(ws), change_feed.version)
+    else:
+        await ws_manager.send_json(
+            ws, {"type": "error", "detail": f"Unknown message type: {kind}"}
+        )
+
+
+async def _dispatch_ws_command(op, args: dict, client: str):
+    if op == "create":
+        return await _create_timer(float(args["duration"]), client)
+    if op in WS_TIMER_COMMANDS:
+        return await WS_TIMER_COMMANDS[op](int(args["timer_id"]))
+    if op in WS_BULK_COMMANDS:
+        return await WS_BULK_COMMANDS[op]()
+    if op == "tick":
+        return await tick(float(args["seconds"]))
+    raise HTTPException(status_code=400, detail=f"Unknown command: {op}")
+
+
+async def _run_ws_command(ws: WebSocket, message: dict) -> dict:
+    """Execute a ``command`` message and return its ``ack``.
+
+    ``{"type": "command", "id": <any>, "op": <name>, "args": {...}}`` runs
+    the same code as the matching REST endpoint. Commands from one connection
+    run in the order they were sent, but clients do not have to wait for an
+    ack before sending the next one; the ``id`` is echoed back so acks can
+    be matched. Rate limits and timer quotas apply as for REST requests.
+    """
+    ack = {"type": "ack", "id": message.get("id")}
+    client = client_key(ws.scope, lambda token: device_auth.validate(token) is not None)
+    op = message.get("op")
+    args = message.get("args") or {}
+    try:
+        if not isinstance(args, dict):
+            raise TypeError("args must be an object")
+        if handoff.frozen:
+            ack["retry_after"] = RESTART_RETRY_AFTER
+            raise HTTPException(status_code=503, detail="Server is restarting")
+        if replication.is_follower:
+            ack["leader"] = replication.leader_url
+            raise HTTPException(
+                status_code=403, detail="Read-only replica; send writes to the leader"
+            )
+        if rate_limiter is not None:
+            wait = rate_limiter.acquire(client, RATE_COSTS.get(WS_COMMAND_ROUTES.get(op), 1.0))
+            if wait:
+                ack["retry_after"] = wait
+                raise HTTPException(status_code=429, detail="Rate limit exceeded")
+        if op == "create" and timer_quota is not None:
+            wait = timer_quota.retry_after(client)
+            if wait is not None:
+                ack["retry_after"] = wait
+                raise HTTPException(
+                    status_code=429, detail=f"Timer quota of {timer_quota.limit} reached"
+                )
+        result = await _dispatch_ws_command(op, args, client)
+    except HTTPException as exc:
+        return {**ack, "ok": False, "status": exc.status_code, "detail": exc.detail}
+    except (KeyError, TypeError, ValueError):
+        return {**ack, "ok": False, "status": 400, "detail": "Invalid command arguments"}
+    if isinstance(result, Response):
+        result = json.loads(result.body)
+    return {**ack, "ok": True, "result": result}
+
+
+def _snapshot_for(ws: WebSocket) -> dict:
+    """Return the current snapshot restricted to ``ws``'s subscriptions."""
+    subs = ws_manager.subscriptions
+    if not subs.is_filtered(ws):
+        return {
+            timer_id: _timer_payload(timer)
+            for timer_id, timer in manager.timers.items()
+        }
+    timers, statuses = subs.topics(ws)
+    wanted_ids, wanted_statuses = set(timers), set(statuses)
+    return {
+        timer_id: _timer_payload(timer)
+        for timer_id, timer in manager.timers.items()
+        if timer_id in wanted_ids or timer_status(timer) in wanted_statuses
+    }
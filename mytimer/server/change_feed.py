@@ -0,0 +1,125 @@
+"""Versioned change log backing the long-poll ``/timers/changes`` endpoint."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import uuid
+from collections import deque
+from typing import Callable, Deque, List, Optional, Set, Tuple
+
+
+class ChangeFeed:
+    """Record which timers changed at which version.
+
+    Every mutation bumps a monotonically increasing version number. Only the
+    ``(version, timer_id)`` pairs are retained so memory stays bounded by
+    ``history`` regardless of how large the timer payloads are; the current
+    timer state is looked up when a delta is served.
+    """
+
+    def __init__(self, history: int = 10000) -> None:
+        self.epoch = uuid.uuid4().hex
+        self.version = 0
+        self._log: Deque[Tuple[int, int]] = deque(maxlen=history)
+        # Oldest version from which the retained log is still complete.
+        self._oldest = 0
+        self._waiters: Set[asyncio.Future[None]] = set()
+        self._listeners: List[Callable[[int, Tuple[int, ...]], None]] = []
+
+    def add_listener(self, listener: Callable[[int, Tuple[int, ...]], None]) -> None:
+        """Call ``listener(version, timer_ids)`` after every recorded change."""
+        self._listeners.append(listener)
+
+    def record(self, *timer_ids: int) -> int:
+        """Register a change for ``timer_ids`` and wake pending waiters."""
+        for tid in timer_ids:
+            self._append(self.version + 1, tid)
+        self._notify(timer_ids)
+        return self.version
+
+    def record_at(self, version: int, *timer_ids: int) -> int:
+        """Register ``timer_ids`` as changed by ``version`` of another feed.
+
+        Used by replicas that continue a leader's feed: all ids are logged at
+        ``version``, so clients resuming from any version in between receive
+        every id of the batch.
+        """
+        if version < self.version:
+            raise ValueError(f"version {version} is older than {self.version}")
+        for tid in timer_ids:
+            self._append(version, tid)
+        self.version = version
+        self._notify(timer_ids)
+        return self.version
+
+    def _append(self, version: int, timer_id: int) -> None:
+        self.version = version
+        if len(self._log) == self._log.maxlen:
+            self._oldest = self._log[0][0]
+        self._log.append((version, timer_id))
+
+    def _notify(self, timer_ids: Tuple[int, ...]) -> None:
+        if timer_ids:
+            self.release_waiters()
+            for listener in self._listeners:
+                listener(self.version, timer_ids)
+
+    def release_waiters(self) -> None:
+        """Wake every pending :meth:`wait` call, changed or not."""
+        waiters, self._waiters = self._waiters, set()
+        for fut in waiters:
+            if not fut.done():
+                fut.set_result(None)
+
+    def export(self) -> dict:
+        """Return the epoch, version and retained history as plain data."""
+        return {
+            "epoch": self.epoch,
+            "version": self.version,
+            "oldest": self._oldest,
+            "log": list(self._log),
+        }
+
+    def restore(self, data: dict) -> None:
+        """Continue the feed exported by another process with :meth:`export`.
+
+        Clients holding a version of that feed can then resume here as if
+        they had never left.
+        """
+        self.epoch = data["epoch"]
+        self.version = data["version"]
+        self._oldest = data["oldest"]
+        self._log.clear()
+        self._log.extend((version, tid) for version, tid in data["log"])
+        if len(data["log"]) > len(self._log):
+            self._oldest = self._log[0][0] if self._log else self.version
+
+    def changes_since(self, since: int, epoch: Optional[str] = None) -> Optional[Set[int]]:
+        """Return ids changed after ``since`` or ``None`` if a snapshot is needed.
+
+        A snapshot is required when ``since`` refers to history that has been
+        evicted, lies in the future, or belongs to another server instance.
+        """
+        if epoch is not None and epoch != self.epoch:
+            return None
+        if since < self._oldest or since > self.version:
+            return None
+        changed: Set[int] = set()
+        for version, tid in reversed(self._log):
+            if version <= since:
+                break
+            changed.add(tid)
+        return changed
+
+    async def wait(self, since: int, timeout: float) -> None:
+        """Block until a version newer than ``since`` exists or ``timeout`` expires."""
+        if self.version != since:
+            return
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.add(fut)
+        try:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(fut, timeout)
+        finally:
+            self._waiters.discard(fut)
@@ -0,0 +1,598 @@
+"""Multi-worker server mode with shared timer state.
+
+Running ``python -m mytimer.server.cluster --workers 4`` starts a small
+pub/sub hub on a Unix socket and then ``uvicorn`` with several worker
+processes. Each worker keeps its in-memory :class:`TimerManager` as a cache of
+a shared SQLite database in WAL mode:
+
+* every local mutation recorded in the worker's change feed is merged into the
+  database and announced on the hub; fields another worker changed since this
+  worker last saw the timer are kept rather than overwritten;
+* every worker reloads announced timers from the database and fans the change
+  out to its own WebSocket, SSE and long-poll clients.
+
+The hub also elects one worker as leader; only the leader runs the auto ticker
+or deadline watcher so timers are advanced exactly once. When the leader
+exits, the next worker is promoted.
+
+Ticks are not written per timer. The database keeps the total number of
+seconds timers were ticked by and every row's ``start_at`` as if it had never
+been ticked; a tick only adds to the total and announces it, and each worker
+shifts its running timers by what it has not applied yet. Timers a tick
+finishes are written like any other change.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from collections import deque
+from typing import (
+    Awaitable,
+    Callable,
+    Collection,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from ..core.timer_manager import Timer, TimerManager
+from .change_feed import ChangeFeed
+
+logger = logging.getLogger(__name__)
+
+# A timer as stored in the database: id followed by the Timer fields.
+Row = Tuple[int, float, float, int, int, float, Optional[float]]
+
+
+def _merge(base: Optional[Row], current: Optional[Row], ours: Optional[Row]) -> Optional[Row]:
+    """Combine this worker's change of a timer with the one in the database.
+
+    ``base`` is the row the worker's copy was derived from. Fields the worker
+    did not change keep the value another worker wrote in the meantime, so a
+    pause on one worker and a tick on the leader both survive. A timer
+    removed on either side stays removed.
+    """
+    if ours is None or (current is None and base is not None):
+        return None
+    if base is None or current is None or current == base:
+        return ours
+    return tuple(o if o != b else c for o, b, c in zip(ours, base, current))  # type: ignore[return-value]
+
+
+def _row(tid: int, timer: Timer, ticked: float = 0.0) -> Row:
+    return (
+        tid,
+        timer.duration,
+        timer.remaining,
+        int(timer.running),
+        int(timer.finished),
+        timer.created_at,
+        None if timer.start_at is None else timer.start_at + ticked,
+    )
+
+
+class TimerStore:
+    """Authoritative timer state shared by all workers through SQLite.
+
+    The blocking methods :meth:`reserve_ids`, :meth:`write` and :meth:`read`
+    may run in a worker thread; :meth:`rows` and :meth:`apply` touch the
+    :class:`TimerManager` and belong on the event loop.
+
+    ``ticked`` is the tick total the local timers are advanced by; rows are
+    stored with it added back to ``start_at``.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = str(path)
+        self._conn = sqlite3.connect(
+            self.path, isolation_level=None, timeout=10.0, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        self.ticked = 0.0
+        # Row each local timer was last loaded as or written from.
+        self._synced: Dict[int, Optional[Row]] = {}
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS timers ("
+            "id INTEGER PRIMARY KEY, duration REAL NOT NULL, remaining REAL NOT NULL, "
+            "running INTEGER NOT NULL, finished INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, start_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('next_id', 1)")
+        self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('ticked', 0)")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @contextlib.contextmanager
+    def _immediate(self):
+        """Run a write transaction that holds the database lock from the start."""
+        conn = self._conn
+        with self._lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def reserve_ids(self, count: int) -> range:
+        """Atomically allocate ``count`` timer ids unique across all workers."""
+        with self._immediate() as conn:
+            (next_id,) = conn.execute(
+                "SELECT value FROM meta WHERE key = 'next_id'"
+            ).fetchone()
+            conn.execute(
+                "UPDATE meta SET value = ? WHERE key = 'next_id'", (next_id + count,)
+            )
+        return range(next_id, next_id + count)
+
+    def reserve_id(self) -> int:
+        """Atomically allocate a timer id unique across all workers."""
+        return self.reserve_ids(1)[0]
+
+    def add_ticked(self, seconds: float) -> float:
+        """Atomically add ``seconds`` to the tick total and return the new total."""
+        with self._immediate() as conn:
+            conn.execute(
+                "UPDATE meta SET value = value + ? WHERE key = 'ticked'", (seconds,)
+            )
+            (total,) = conn.execute(
+                "SELECT value FROM meta WHERE key = 'ticked'"
+            ).fetchone()
+        return float(total)
+
+    def read_ticked(self) -> float:
+        """Return the seconds timers were ticked by across all workers."""
+        with self._lock:
+            (total,) = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'ticked'"
+            ).fetchone()
+        return float(total)
+
+    def rows(self, manager: TimerManager, timer_ids: Iterable[int]) -> Dict[int, Optional[Row]]:
+        """Return the rows of ``timer_ids``; ids ``manager`` no longer has map to ``None``."""
+        timers = manager.timers
+        return {
+            tid: None if (timer := timers.get(tid)) is None else _row(tid, timer, self.ticked)
+            for tid in timer_ids
+        }
+
+    def write(self, rows: Dict[int, Optional[Row]]) -> Dict[int, Optional[Row]]:
+        """Merge ``rows`` into the database and return the rows now stored.
+
+        Reading, merging and writing happen in one ``BEGIN IMMEDIATE``
+        transaction, so a concurrent change by another worker is either
+        fully before or fully after it.
+        """
+        merged: Dict[int, Optional[Row]] = {}
+        with self._immediate() as conn:
+            for tid, ours in rows.items():
+                current = conn.execute("SELECT * FROM timers WHERE id = ?", (tid,)).fetchone()
+                base = self._synced.get(tid, current)
+                row = merged[tid] = _merge(base, current, ours)
+                if row is None:
+                    conn.execute("DELETE FROM timers WHERE id = ?", (tid,))
+                    self._synced.pop(tid, None)
+                else:
+                    conn.execute("INSERT OR REPLACE INTO timers VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+                    self._synced[tid] = ours
+            upserted = [row[0] for row in merged.values() if row is not None]
+            if upserted:
+                # Keep ids inserted with explicit values (imports) out of
+                # the range handed out by :meth:`reserve_ids`.
+                conn.execute(
+                    "UPDATE meta SET value = MAX(value, ?) WHERE key = 'next_id'",
+                    (max(upserted) + 1,),
+                )
+        return merged
+
+    def read(self, timer_ids: Optional[Iterable[int]] = None) -> Tuple[Dict[int, Optional[Row]], int]:
+        """Return the rows of ``timer_ids`` (or every timer) and the next free id."""
+        with self._lock:
+            conn = self._conn
+            if timer_ids is None:
+                rows: Dict[int, Optional[Row]] = {
+                    row[0]: row for row in conn.execute("SELECT * FROM timers")
+                }
+            else:
+                rows = {
+                    tid: conn.execute("SELECT * FROM timers WHERE id = ?", (tid,)).fetchone()
+                    for tid in timer_ids
+                }
+            (next_id,) = conn.execute(
+                "SELECT value FROM meta WHERE key = 'next_id'"
+            ).fetchone()
+        return rows, next_id
+
+    def apply(
+        self,
+        manager: TimerManager,
+        rows: Dict[int, Optional[Row]],
+        next_id: Optional[int] = None,
+        skip: Collection[int] = (),
+    ) -> List[int]:
+        """Put ``rows`` into ``manager`` and return the ids whose timer changed.
+
+        Ids in ``skip`` have local changes that are not written yet; they are
+        left alone and merged when they are.
+        """
+        changed = []
+        with self._lock:
+            for tid, row in rows.items():
+                if tid in skip:
+                    continue
+                if row is None:
+                    self._synced.pop(tid, None)
+                    if manager.timers.pop(tid, None) is not None:
+                        changed.append(tid)
+                    continue
+                self._synced[tid] = row
+                current = manager.timers.get(tid)
+                if current is not None and _row(tid, current, self.ticked) == row:
+                    continue
+                manager.timers[tid] = Timer(
+                    duration=row[1],
+                    remaining=row[2],
+                    running=bool(row[3]),
+                    finished=bool(row[4]),
+                    created_at=row[5],
+                    start_at=None if row[6] is None else row[6] - self.ticked,
+                )
+                manager.reschedule(tid)
+                changed.append(tid)
+        if next_id is not None:
+            manager._next_id = max(manager._next_id, next_id)
+        return changed
+
+    def save(self, manager: TimerManager, timer_ids: Iterable[int]) -> None:
+        """Write ``timer_ids`` from ``manager``; ids it no longer has are deleted."""
+        self.apply(manager, self.write(self.rows(manager, timer_ids)))
+
+    def load(self, manager: TimerManager, timer_ids: Optional[Iterable[int]] = None) -> None:
+        """Refresh ``timer_ids`` (or every timer) in ``manager`` from the database."""
+        rows, next_id = self.read(timer_ids)
+        if timer_ids is None:
+            rows.update({tid: None for tid in manager.timers if tid not in rows})
+        self.apply(manager, rows, next_id)
+
+
+# Timer ids each worker reserves from the database at a time.
+ID_BLOCK = 16
+# Seconds between attempts to reach the hub again, doubling up to the max.
+RECONNECT_MIN = 0.2
+RECONNECT_MAX = 5.0
+
+
+class ClusterHub:
+    """Relay change announcements between workers and elect a leader."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._workers: List[asyncio.StreamWriter] = []
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self) -> None:
+        """Listen on the Unix socket, replacing a stale socket file."""
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+
+    async def stop(self) -> None:
+        """Close the socket and all worker connections."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for writer in self._workers:
+            writer.close()
+        self._workers.clear()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+    def _send(self, writer: asyncio.StreamWriter, message: dict) -> None:
+        writer.write(json.dumps(message).encode() + b"\n")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._workers.append(writer)
+        self._send(writer, {"type": "hello", "leader": self._workers[0] is writer})
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for other in self._workers:
+                    if other is not writer:
+                        other.write(line)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            was_leader = bool(self._workers) and self._workers[0] is writer
+            if writer in self._workers:
+                self._workers.remove(writer)
+            writer.close()
+            if was_leader and self._workers:
+                self._send(self._workers[0], {"type": "leader"})
+
+
+class ClusterNode:
+    """Worker side of the cluster: persist, announce and apply timer changes.
+
+    Parameters
+    ----------
+    on_remote_change:
+        Called with the ids changed by another worker after they were reloaded
+        into ``manager``. Changes it records in ``change_feed`` are not
+        announced again.
+    on_leader:
+        Awaited when this worker becomes the leader after startup.
+    on_follower:
+        Awaited when a reconnected worker is no longer the leader.
+
+    If the hub connection drops, the worker keeps serving from its cache,
+    reconnects with backoff and then reloads every timer from the database,
+    since announcements sent meanwhile were lost.
+    """
+
+    def __init__(
+        self,
+        manager: TimerManager,
+        change_feed: ChangeFeed,
+        store: TimerStore,
+        socket_path: str,
+        on_remote_change: Callable[[List[int]], None],
+        on_leader: Callable[[], Awaitable[None]],
+        on_follower: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> None:
+        self.manager = manager
+        self.change_feed = change_feed
+        self.store = store
+        self.socket_path = socket_path
+        self.on_remote_change = on_remote_change
+        self.on_leader = on_leader
+        self.on_follower = on_follower
+        self.is_leader = False
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task[None]] = None
+        self._pending: Set[int] = set()
+        self._flush_task: Optional[asyncio.Task[None]] = None
+        self._applying = False
+        # Database work runs in threads; this keeps writes and reloads in order.
+        self._io_lock = asyncio.Lock()
+        self._ids: Deque[int] = deque()
+        self._refill: Optional[asyncio.Task[None]] = None
+        manager.id_allocator = self._allocate_id
+        change_feed.add_listener(self._on_local_change)
+
+    async def start(self) -> None:
+        """Load shared state and join the hub."""
+        self.store.ticked = await asyncio.to_thread(self.store.read_ticked)
+        rows, next_id = await asyncio.to_thread(self.store.read)
+        self.store.apply(self.manager, rows, next_id)
+        self._ids.extend(await asyncio.to_thread(self.store.reserve_ids, ID_BLOCK))
+        await self._connect()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush pending changes and leave the hub."""
+        await self._flush()
+        for task in (self._task, self._refill):
+            if task is not None:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        self._task = self._refill = None
+        self._disconnect()
+
+    async def _connect(self) -> None:
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        try:
+            hello = json.loads(await reader.readline())
+        except BaseException:
+            writer.close()
+            raise
+        self._reader, self._writer = reader, writer
+        self.is_leader = bool(hello.get("leader"))
+
+    def _disconnect(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    def _send(self, message: dict) -> None:
+        """Announce ``message`` to the other workers if the hub is reachable."""
+        if self._writer is not None and not self._writer.is_closing():
+            self._writer.write(json.dumps(message).encode() + b"\n")
+
+    async def tick(self, seconds: float) -> None:
+        """Advance the timers of every worker by ``seconds``."""
+        async with self._io_lock:
+            total = await asyncio.to_thread(self.store.add_ticked, seconds)
+            finished = self._advance(total)
+        self._send({"type": "tick", "total": total})
+        if finished:
+            self._pending.update(finished)
+            self._schedule_flush()
+
+    def _advance(self, total: float) -> List[int]:
+        """Tick local timers up to ``total`` and return the ids that finished.
+
+        Ticks are announced as running totals, so a late or repeated
+        announcement is ignored and a missed one is caught up by the next.
+        """
+        seconds = total - self.store.ticked
+        if seconds <= 0:
+            return []
+        timers = self.manager.timers
+        running = [tid for tid, timer in timers.items() if timer.running]
+        self.store.ticked = total
+        # Clients are notified by the tick callbacks; the rows stay as stored.
+        self._applying = True
+        try:
+            self.manager.tick(seconds)
+        finally:
+            self._applying = False
+        return [tid for tid in running if tid in timers and timers[tid].finished]
+    def _allocate_id(self) -> int:
+        """Hand out an id from the block reserved in the background."""
+        if not self._ids:
+            # More creations than a block between two refills.
+            self._ids.extend(self.store.reserve_ids(ID_BLOCK))
+        timer_id = self._ids.popleft()
+        if len(self._ids) < ID_BLOCK // 2 and self._refill is None:
+            self._refill = asyncio.get_running_loop().create_task(self._refill_ids())
+        return timer_id
+
+    async def _refill_ids(self) -> None:
+        try:
+            self._ids.extend(await asyncio.to_thread(self.store.reserve_ids, ID_BLOCK))
+        finally:
+            self._refill = None
+
+    def _on_local_change(self, version: int, timer_ids) -> None:
+        if self._applying:
+            return
+        self._pending.update(timer_ids)
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self) -> None:
+        """Persist and announce the changes batched since the last flush."""
+        async with self._io_lock:
+            self._flush_task = None
+            if not self._pending:
+                return
+            ids, self._pending = sorted(self._pending), set()
+            merged = await asyncio.to_thread(self.store.write, self.store.rows(self.manager, ids))
+            self._send({"type": "changed", "ids": ids})
+            # Fields another worker changed meanwhile were kept; adopt them.
+            self._notify(self.store.apply(self.manager, merged, skip=self._pending))
+
+    async def _run(self) -> None:
+        delay = RECONNECT_MIN
+        while True:
+            try:
+                if self._reader is None:
+                    was_leader = self.is_leader
+                    await self._connect()
+                    logger.info("reconnected to cluster hub %s", self.socket_path)
+                    await self._reload()
+                    if self.is_leader and not was_leader:
+                        await self.on_leader()
+                    elif was_leader and not self.is_leader and self.on_follower is not None:
+                        await self.on_follower()
+                delay = RECONNECT_MIN
+                await self._read_loop()
+                logger.warning("cluster hub %s closed the connection", self.socket_path)
+            except (OSError, ValueError, KeyError) as exc:
+                logger.warning("cluster hub %s unreachable: %s", self.socket_path, exc)
+            self._disconnect()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX)
+
+    async def _read_loop(self) -> None:
+        assert self._reader is not None
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                return
+            message = json.loads(line)
+            kind = message.get("type")
+            if kind == "changed":
+                await self.apply_remote(message["ids"])
+            elif kind == "tick":
+                async with self._io_lock:
+                    self._advance(float(message["total"]))
+            elif kind == "leader":
+                self.is_leader = True
+                await self.on_leader()
+
+    async def _reload(self) -> None:
+        """Catch up with every change announced while the hub was unreachable."""
+        async with self._io_lock:
+            total = await asyncio.to_thread(self.store.read_ticked)
+            rows, next_id = await asyncio.to_thread(self.store.read)
+            self._advance(total)
+            rows.update({tid: None for tid in self.manager.timers if tid not in rows})
+            self._notify(self.store.apply(self.manager, rows, next_id, skip=self._pending))
+
+    async def apply_remote(self, timer_ids: List[int]) -> None:
+        """Reload ``timer_ids`` changed by another worker and notify clients."""
+        async with self._io_lock:
+            rows, next_id = await asyncio.to_thread(self.store.read, timer_ids)
+            self._notify(self.store.apply(self.manager, rows, next_id, skip=self._pending))
+
+    def _notify(self, timer_ids: List[int]) -> None:
+        if not timer_ids:
+            return
+        self._applying = True
+        try:
+            self.on_remote_change(timer_ids)
+        finally:
+            self._applying = False
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Start the hub and ``uvicorn`` with several workers."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run MyTimer with several worker processes")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=8000, help="Bind port")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--db", default="mytimer.db", help="Shared SQLite state file")
+    parser.add_argument("--socket", default=None, help="Unix socket path for the hub")
+    args = parser.parse_args(argv)
+
+    socket_path = args.socket or os.path.join(
+        tempfile.gettempdir(), f"mytimer-{os.getpid()}.sock"
+    )
+    hub = ClusterHub(socket_path)
+    ready = threading.Event()
+
+    async def run_hub() -> None:
+        await hub.start()
+        ready.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=asyncio.run, args=(run_hub(),), daemon=True).start()
+    ready.wait()
+
+    os.environ["MYTIMER_CLUSTER_SOCKET"] = socket_path
+    os.environ["MYTIMER_STATE_DB"] = str(Path(args.db).resolve())
+    os.environ["MYTIMER_API_PORT"] = str(args.port)
+    try:
+        uvicorn.run(
+            "mytimer.server.api:app", host=args.host, port=args.port, workers=args.workers
+        )
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Pre-encoded JSON bodies for the hottest read endpoints.
+
+Returning a plain ``dict`` from a FastAPI endpoint runs response validation
+and ``jsonable_encoder`` over it before ``json.dumps``. For ``GET /timers``
+this is repeated for every timer on every request although timers rarely
+change between two polls. :class:`TimerJSONCache` keeps the encoded
+``"<id>":{...}`` fragment of each timer and the joined body, and both are only
+rebuilt after the change feed reports that a timer mutated.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from fastapi.responses import Response
+
+# Same encoder settings as ``fastapi.responses.JSONResponse``.
+_encode = json.JSONEncoder(
+    ensure_ascii=False, allow_nan=False, separators=(",", ":")
+).encode
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` exactly like ``JSONResponse`` does."""
+    return _encode(content).encode("utf-8")
+
+
+class JSONBytesResponse(Response):
+    """Response whose body is already encoded JSON."""
+
+    media_type = "application/json"
+
+
+class TimerJSONCache:
+    """Cache encoded timer payloads until the timer changes.
+
+    Parameters
+    ----------
+    payload:
+        Builds the public dict for one timer.
+    cacheable:
+        Returns ``False`` for timers whose payload depends on the current time
+        (running timers when the server does not tick); those are encoded on
+        every request.
+    """
+
+    def __init__(
+        self,
+        timers: Mapping[int, Any],
+        payload: Callable[[Any], Dict[str, Any]],
+        cacheable: Callable[[Any], bool] = lambda timer: True,
+    ) -> None:
+        self._timers = timers
+        self._payload = payload
+        self._cacheable = cacheable
+        self._fragments: Dict[int, Tuple[Any, bytes]] = {}
+        self._body: Optional[bytes] = None
+        self._body_size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, timer_ids: Iterable[int]) -> None:
+        """Drop the cached encodings of ``timer_ids``."""
+        for tid in timer_ids:
+            self._fragments.pop(tid, None)
+        self._body = None
+
+    def fragment(self, timer_id: int, timer: Any) -> bytes:
+        """Return ``"<id>":{...}`` for ``timer``."""
+        cached = self._fragments.get(timer_id)
+        if cached is not None and cached[0] is timer:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        encoded = b'"%d":' % timer_id + dumps(self._payload(timer))
+        if self._cacheable(timer):
+            self._fragments[timer_id] = (timer, encoded)
+        return encoded
+
+    def body(self) -> bytes:
+        """Return the encoded ``{id: payload}`` object of all timers."""
+        if self._body is not None and self._body_size == len(self._timers):
+            self.hits += 1
+            return self._body
+        parts: List[bytes] = []
+        complete = True
+        for tid, timer in self._timers.items():
+            parts.append(self.fragment(tid, timer))
+            complete = complete and tid in self._fragments
+        body = b"{" + b",".join(parts) + b"}"
+        if complete:
+            self._body = body
+            self._body_size = len(self._timers)
+        if len(self._fragments) > 2 * len(self._timers) + 1024:
+            # Drop fragments of timers that were removed behind our back.
+            self._fragments = {
+                tid: entry for tid, entry in self._fragments.items() if tid in self._timers
+            }
+        return body
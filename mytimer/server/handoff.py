@@ -0,0 +1,315 @@
+"""Zero-downtime restarts by handing the listening socket to a new process.
+
+``python -m mytimer.server.handoff --port 8000`` runs the API like
+``uvicorn`` but also opens a control socket next to it.  Starting the same
+command with ``--takeover`` while the first process runs performs a reload:
+
+1. the new process connects to the control socket and receives the listening
+   TCP socket as a file descriptor (``SCM_RIGHTS``), so the port is never
+   closed and no connection is refused;
+2. during its startup the new process asks for the state.  The old process
+   freezes (mutations answer ``503``, timekeeping stops), sends its timers,
+   change feed epoch, version and history, and waits;
+3. once the new process has restored the state it replies ``ready`` and
+   starts accepting.  Only then does the old process stop accepting, close
+   its WebSockets with code 1012 (service restart) and drain in-flight
+   requests before exiting.
+
+Because the change feed continues with the same epoch and version, clients
+reconnect and resume (``/ws?since=...&epoch=...``, long-poll, SSE
+``Last-Event-ID``) instead of downloading every timer again.  If the new
+process disconnects before ``ready``, the old one unfreezes and carries on.
+
+Messages on the control socket are JSON lines.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import socket
+import tempfile
+from typing import Awaitable, Callable, Optional
+
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Mutations still answered by a frozen server get this response.
+RESTART_RETRY_AFTER = 1
+# Safe methods keep working while the state is being handed over.
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# Time to wait for the new process to restore the state and report ready.
+READY_TIMEOUT = 30.0
+# Seconds in-flight requests may take to finish once the old process drains.
+DEFAULT_GRACEFUL_TIMEOUT = 10.0
+
+
+def control_socket_path(port: int) -> str:
+    """Return the control socket path of the server on TCP ``port``."""
+    return os.path.join(tempfile.gettempdir(), f"mytimer-{port}.handoff")
+
+
+class HandoffError(RuntimeError):
+    """The running server could not hand over its socket or state."""
+
+
+def _send_line(sock: socket.socket, message: dict) -> None:
+    sock.sendall(json.dumps(message).encode() + b"\n")
+
+
+class Handoff:
+    """Both sides of a reload: serving the control socket and taking over.
+
+    The launcher sets :attr:`server` (the running :class:`uvicorn.Server`)
+    before the app starts; without it the control socket is not opened, so
+    servers run directly by ``uvicorn`` are unaffected.
+    """
+
+    def __init__(self) -> None:
+        self.server = None
+        self.path: Optional[str] = None
+        # Set while mutations must be rejected because the state was exported.
+        self.frozen = False
+        # Set once another process took over; the old one is only draining.
+        self.handed_over = False
+        self._control: Optional[asyncio.AbstractServer] = None
+        self._listen_fd: Optional[int] = None
+        self._lock = asyncio.Lock()
+        # New side: control connection to the process being replaced.
+        self._predecessor: Optional[socket.socket] = None
+        self._reader = None
+
+    # -- old process -----------------------------------------------------
+
+    async def serve(
+        self,
+        export: Callable[[], Awaitable[dict]],
+        resume: Callable[[], Awaitable[None]],
+        drain: Callable[[], None],
+    ) -> None:
+        """Accept reload requests on :attr:`path`.
+
+        ``export`` stops background work and returns the server state once
+        :attr:`frozen` is set; ``resume`` undoes that if the new process
+        gives up before it is ready.  ``drain`` runs after the new process
+        took over to end long-lived requests.
+        """
+        if self.server is None or self.path is None or self._control is not None:
+            return
+        self._export = export
+        self._resume = resume
+        self._drain = drain
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+        self._control = await asyncio.start_unix_server(self._handle, path=self.path)
+        os.chmod(self.path, 0o600)
+
+    async def close(self) -> None:
+        """Stop accepting reload requests."""
+        if self._control is not None:
+            self._control.close()
+            await self._control.wait_closed()
+            self._control = None
+            if not self.handed_over and self.path is not None:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(self.path)
+        if self._predecessor is not None:
+            self._predecessor.close()
+            self._predecessor = None
+
+    def _listening_fd(self) -> int:
+        if self._listen_fd is None:
+            raise HandoffError("server has no listening socket to hand over")
+        return self._listen_fd
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                op = json.loads(line).get("op")
+                if self.handed_over:
+                    raise HandoffError("this server has already been replaced")
+                if op == "socket":
+                    self._send_socket(writer)
+                elif op == "state":
+                    await self._hand_over(reader, writer)
+                    return
+                else:
+                    writer.write(json.dumps({"error": f"unknown op {op!r}"}).encode() + b"\n")
+                    await writer.drain()
+        except (OSError, ValueError, HandoffError) as exc:
+            logger.warning("reload request failed: %s", exc)
+        finally:
+            writer.close()
+
+    def _send_socket(self, writer: asyncio.StreamWriter) -> None:
+        transport_sock = writer.get_extra_info("socket")
+        # The transport's socket wrapper does not expose ``sendmsg``.
+        with socket.socket(fileno=os.dup(transport_sock.fileno())) as sock:
+            sock.setblocking(True)
+            socket.send_fds(sock, [b'{"ok": true}\n'], [self._listening_fd()])
+
+    async def _hand_over(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if self._lock.locked() or self.handed_over:
+            raise HandoffError("a reload is already in progress")
+        async with self._lock:
+            self.frozen = True
+            try:
+                state = await self._export()
+            except Exception:
+                self.frozen = False
+                await self._resume()
+                raise
+            try:
+                writer.write(json.dumps(state, separators=(",", ":")).encode() + b"\n")
+                await writer.drain()
+                line = await asyncio.wait_for(reader.readline(), READY_TIMEOUT)
+                ready = bool(line) and json.loads(line).get("op") == "ready"
+            except (ConnectionError, asyncio.TimeoutError, ValueError):
+                ready = False
+            if not ready:
+                logger.warning("new server did not take over; resuming")
+                self.frozen = False
+                await self._resume()
+                return
+            self.handed_over = True
+            logger.info("handed over to the new server; draining")
+            # Stop accepting right away; connections queue for the new process.
+            for server in self.server.servers:
+                server.close()
+            self._drain()
+            self.server.should_exit = True
+
+    # -- new process -----------------------------------------------------
+
+    def take_over(self, path: str, timeout: float = 5.0) -> socket.socket:
+        """Connect to the server at ``path`` and return its listening socket.
+
+        Raises
+        ------
+        HandoffError
+            If nothing listens on ``path`` or it does not send a socket.
+        """
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.settimeout(timeout)
+        try:
+            conn.connect(path)
+            _send_line(conn, {"op": "socket"})
+            msg, fds, _flags, _addr = socket.recv_fds(conn, 1024, 1)
+        except OSError as exc:
+            conn.close()
+            raise HandoffError(f"cannot reach the running server at {path}: {exc}") from exc
+        if not fds:
+            conn.close()
+            raise HandoffError(f"no socket received from {path}: {msg!r}")
+        conn.settimeout(None)
+        self._predecessor = conn
+        self._reader = conn.makefile("rb")
+        return socket.socket(fileno=fds[0])
+
+    @property
+    def taking_over(self) -> bool:
+        return self._predecessor is not None
+
+    async def receive_state(self) -> dict:
+        """Ask the process being replaced for its state (it freezes now)."""
+        assert self._predecessor is not None
+
+        def request() -> dict:
+            _send_line(self._predecessor, {"op": "state"})
+            line = self._reader.readline()
+            if not line:
+                raise HandoffError("the running server closed the control connection")
+            return json.loads(line)
+
+        return await asyncio.to_thread(request)
+
+    def ready(self) -> None:
+        """Tell the old process the state is restored so it can drain."""
+        if self._predecessor is None:
+            return
+        with contextlib.suppress(OSError):
+            _send_line(self._predecessor, {"op": "ready"})
+        self._reader.close()
+        self._predecessor.close()
+        self._predecessor = None
+
+
+class HandoffMiddleware:
+    """ASGI middleware answering mutations with ``503`` while frozen."""
+
+    def __init__(self, app, handoff: Handoff) -> None:
+        self.app = app
+        self.handoff = handoff
+
+    async def __call__(self, scope, receive, send) -> None:
+        if (
+            scope["type"] == "http"
+            and self.handoff.frozen
+            and scope["method"] not in READ_METHODS
+        ):
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Server is restarting"},
+                headers={"Retry-After": str(RESTART_RETRY_AFTER), "Connection": "close"},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Run the API server, optionally taking over from a running one."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run MyTimer with reload support")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=8000, help="Bind port")
+    parser.add_argument(
+        "--takeover",
+        action="store_true",
+        help="Replace the server running on this port without downtime",
+    )
+    parser.add_argument(
+        "--control", default=None, help="Control socket path (default derived from the port)"
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=float,
+        default=DEFAULT_GRACEFUL_TIMEOUT,
+        help="Seconds to let in-flight requests finish when draining",
+    )
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("MYTIMER_API_PORT", str(args.port))
+    from . import api
+
+    handoff = api.handoff
+    handoff.path = args.control or control_socket_path(args.port)
+    if args.takeover:
+        sock = handoff.take_over(handoff.path)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    handoff._listen_fd = sock.fileno()
+
+    config = uvicorn.Config(
+        api.app, timeout_graceful_shutdown=args.graceful_timeout
+    )
+    server = uvicorn.Server(config)
+    handoff.server = server
+    server.run(sockets=[sock])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Lightweight Prometheus text-format metrics for the API server.
+
+Counters are plain integers and histograms keep a preallocated list of bucket
+counts, so recording a sample is a dict lookup plus a few integer additions.
+Everything runs on the event loop thread and therefore needs no locks.
+Derived values such as connection and timer counts are computed only when
+``/metrics`` is scraped.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from ..core.instrumentation import Histogram
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(labels: Dict[str, object]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(
+        f'{key}="{str(value)}"'.replace("\n", " ") for key, value in labels.items()
+    )
+    return "{" + inner + "}"
+
+
+def _header(name: str, kind: str, help_text: str) -> List[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+def counter_lines(
+    name: str, help_text: str, samples: Iterable[Tuple[Dict[str, object], float]]
+) -> List[str]:
+    """Render a counter family from ``(labels, value)`` samples."""
+    lines = _header(name, "counter", help_text)
+    lines.extend(f"{name}{_labels(labels)} {value}" for labels, value in samples)
+    return lines
+
+
+def gauge_lines(
+    name: str, help_text: str, samples: Iterable[Tuple[Dict[str, object], float]]
+) -> List[str]:
+    """Render a gauge family from ``(labels, value)`` samples."""
+    lines = _header(name, "gauge", help_text)
+    lines.extend(f"{name}{_labels(labels)} {value}" for labels, value in samples)
+    return lines
+
+
+def histogram_lines(
+    name: str, help_text: str, samples: Iterable[Tuple[Dict[str, object], Histogram]]
+) -> List[str]:
+    """Render a histogram family from ``(labels, histogram)`` samples."""
+    lines = _header(name, "histogram", help_text)
+    for labels, hist in samples:
+        cumulative = 0
+        for bound, count in zip(hist.buckets, hist.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {cumulative}")
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {hist.count}")
+        lines.append(f"{name}_sum{_labels(labels)} {hist.sum}")
+        lines.append(f"{name}_count{_labels(labels)} {hist.count}")
+    return lines
+
+
+class MetricsRegistry:
+    """Collect HTTP request metrics and render all registered families."""
+
+    def __init__(self) -> None:
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[str, Histogram] = {}
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+
+    def preallocate(self, routes: Iterable[str]) -> None:
+        """Create latency histograms for ``routes`` ahead of the first request."""
+        for route in routes:
+            self.latency.setdefault(route, Histogram())
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float) -> None:
+        """Count one request to ``route`` and record its latency."""
+        key = (route, method, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        hist = self.latency.get(route)
+        if hist is None:
+            hist = self.latency[route] = Histogram()
+        hist.observe(seconds)
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        """Register ``collector`` to contribute lines when rendering."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Return all metrics in Prometheus text exposition format."""
+        lines = counter_lines(
+            "mytimer_http_requests_total",
+            "HTTP requests by route, method and status.",
+            (
+                ({"route": route, "method": method, "status": status}, count)
+                for (route, method, status), count in sorted(self.requests.items())
+            ),
+        )
+        lines += histogram_lines(
+            "mytimer_http_request_duration_seconds",
+            "HTTP request latency by route.",
+            (({"route": route}, hist) for route, hist in sorted(self.latency.items())),
+        )
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request counts and latency."""
+
+    def __init__(self, app, registry: MetricsRegistry) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.registry.observe_request(
+                route, scope["method"], status, time.perf_counter() - start
+            )
@@ -0,0 +1,144 @@
+"""Streaming NDJSON export and import of timers.
+
+Each line holds one timer as ``{"id": ..., "duration": ..., ...}`` using the
+same fields as ``GET /timers``. Both directions work on a bounded number of
+lines at a time so exporting or importing millions of timers needs memory
+proportional to one batch rather than to the whole data set.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List, Tuple
+
+from ..core.timer_manager import Timer
+
+MEDIA_TYPE = "application/x-ndjson"
+# Timers encoded per chunk on export and inserted per batch on import.
+BATCH_SIZE = 1000
+# Longest accepted line; guards against a body without newlines.
+MAX_LINE_BYTES = 64 * 1024
+
+_dumps = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def encode_batch(records: Iterable[Dict[str, Any]]) -> bytes:
+    """Return ``records`` as NDJSON, one line per record."""
+    return "".join(_dumps(record) + "\n" for record in records).encode()
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """Split a streamed body into ``(line_number, line)`` pairs.
+
+    Blank lines are skipped. Only the incomplete trailing line is buffered
+    between chunks.
+
+    Raises
+    ------
+    ValueError
+        If a line exceeds :data:`MAX_LINE_BYTES`.
+    """
+    buffer = b""
+    lineno = 0
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            lineno += 1
+            if line.strip():
+                yield lineno, line
+        if len(buffer) > MAX_LINE_BYTES:
+            raise ValueError(f"line {lineno + 1} exceeds {MAX_LINE_BYTES} bytes")
+    if buffer.strip():
+        yield lineno + 1, buffer
+
+
+def timer_from_record(record: Any, now: float | None = None) -> Tuple[int | None, Timer]:
+    """Build a :class:`Timer` from one decoded NDJSON record.
+
+    Returns the record's ``id`` (``None`` if absent) together with the timer.
+    Running timers without ``start_at`` are anchored so they keep their
+    ``remaining`` time from ``now``.
+
+    Raises
+    ------
+    ValueError
+        If the record is not an object or has invalid fields: numbers must be
+        finite, ``duration`` positive and ``remaining`` within
+        ``[0, duration]``.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("record must be a JSON object")
+    now = time.time() if now is None else now
+    try:
+        duration = float(record["duration"])
+        remaining = float(record.get("remaining", duration))
+        created_at = float(record.get("created_at", now))
+        start_at = record.get("start_at")
+        start_at = None if start_at is None else float(start_at)
+        timer_id = record.get("id")
+        timer_id = None if timer_id is None else int(timer_id)
+    except KeyError:
+        raise ValueError("missing 'duration'") from None
+    except (TypeError, ValueError):
+        raise ValueError("invalid field value") from None
+    if not all(map(math.isfinite, (duration, remaining, created_at, start_at or 0.0))):
+        raise ValueError("field values must be finite numbers")
+    if duration <= 0:
+        raise ValueError("'duration' must be positive")
+    if not 0 <= remaining <= duration:
+        raise ValueError("'remaining' must be between 0 and 'duration'")
+    running = bool(record.get("running", True))
+    finished = bool(record.get("finished", False))
+    if running and not finished and start_at is None:
+        start_at = now - (duration - remaining)
+    timer = Timer(
+        duration=duration,
+        remaining=remaining,
+        running=running,
+        finished=finished,
+        created_at=created_at,
+        start_at=start_at,
+    )
+    return timer_id, timer
+
+
+def parse_batch(
+    lines: List[Tuple[int, bytes]],
+    errors: List[Dict[str, Any]],
+    max_errors: int,
+) -> List[Tuple[int | None, Timer]]:
+    """Decode a batch of lines, appending failures to ``errors``."""
+    now = time.time()
+    parsed = []
+    for lineno, line in lines:
+        try:
+            parsed.append(timer_from_record(json.loads(line), now))
+        except ValueError as exc:  # JSONDecodeError is a ValueError
+            if len(errors) < max_errors:
+                errors.append({"line": lineno, "error": str(exc)})
+    return parsed
+
+
+async def export_lines(
+    timer_ids: List[int],
+    lookup: Callable[[int], Dict[str, Any] | None],
+    batch_size: int = BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    """Yield NDJSON chunks for ``timer_ids``, skipping timers removed meanwhile.
+
+    ``lookup`` returns the payload of a timer or ``None``; it is called lazily
+    so only one chunk of payloads exists at a time.
+    """
+    for start in range(0, len(timer_ids), batch_size):
+        records = []
+        for tid in timer_ids[start:start + batch_size]:
+            payload = lookup(tid)
+            if payload is not None:
+                records.append({"id": tid, **payload})
+        if records:
+            yield encode_batch(records)
@@ -0,0 +1,129 @@
+"""On-demand profiling of the running server process.
+
+Two collectors are available. ``cProfile`` traces every function call on the
+event loop thread for the requested window and can be returned as a text
+report or as a binary dump readable with :class:`pstats.Stats`. The stack
+sampler inspects the event loop thread from a helper thread at a fixed
+interval and returns collapsed stacks suitable for ``flamegraph.pl`` or
+speedscope. Nothing is collected outside a profiling window.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+from collections import Counter
+from typing import Optional, Tuple, Union
+
+MAX_PROFILE_SECONDS = 60.0
+DEFAULT_SAMPLE_INTERVAL = 0.005
+FORMATS = ("text", "pstats", "collapsed")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", code.co_filename)
+    return f"{module}:{code.co_name}"
+
+
+class StackSampler:
+    """Periodically record the stack of one thread as collapsed stacks."""
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_SAMPLE_INTERVAL) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Begin sampling in a daemon thread."""
+        self._thread = threading.Thread(
+            target=self._run, name="mytimer-stack-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the helper thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Return samples as ``frame;frame;frame count`` lines."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class Profiler:
+    """Run one profiling window at a time on the current event loop."""
+
+    def __init__(self, max_seconds: float = MAX_PROFILE_SECONDS) -> None:
+        self.max_seconds = max_seconds
+        self.active = False
+
+    async def profile(self, seconds: float, fmt: str = "text") -> Tuple[Union[str, bytes], str]:
+        """Profile the process for ``seconds`` and return ``(output, fmt)``.
+
+        Raises
+        ------
+        ValueError
+            If ``seconds`` or ``fmt`` is invalid.
+        RuntimeError
+            If another profiling window is already running.
+        """
+        if not 0 < seconds <= self.max_seconds:
+            raise ValueError(f"seconds must be between 0 and {self.max_seconds:g}")
+        if fmt not in FORMATS:
+            raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+        if self.active:
+            raise RuntimeError("a profile is already running")
+        self.active = True
+        try:
+            if fmt == "collapsed":
+                return await self._sample(seconds), fmt
+            profile = await self._trace(seconds)
+            if fmt == "pstats":
+                profile.create_stats()
+                return marshal.dumps(profile.stats), fmt
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(50)
+            return out.getvalue(), fmt
+        finally:
+            self.active = False
+
+    async def _trace(self, seconds: float) -> cProfile.Profile:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as exc:  # another profiler owns the hook
+            raise RuntimeError(str(exc)) from exc
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+        return profile
+
+    async def _sample(self, seconds: float) -> str:
+        sampler = StackSampler(threading.get_ident())
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await asyncio.to_thread(sampler.stop)
+        return sampler.collapsed()
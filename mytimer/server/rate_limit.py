@@ -0,0 +1,218 @@
+"""Per-client token-bucket rate limiting and timer quotas.
+
+Clients are identified by a registered ``X-Auth-Token`` device token or, for
+anonymous or unknown tokens, by their IP address. Each client owns a token
+bucket refilled at ``rate`` tokens per second up to ``burst``; every request
+takes one token (or the cost configured for its path). Checking a request is
+a dict lookup plus a little arithmetic, and the least recently seen buckets
+are evicted once ``max_clients`` is reached.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Set, Tuple
+
+from fastapi.responses import JSONResponse
+
+# Retry hint when a client's active timers are all paused.
+DEFAULT_QUOTA_RETRY_AFTER = 60.0
+
+
+class TokenBucket:
+    """Tokens available to one client."""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float) -> None:
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateLimiter:
+    """Token buckets keyed by client identity."""
+
+    def __init__(self, rate: float, burst: float | None = None, max_clients: int = 10000) -> None:
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, 2 * rate)
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def acquire(self, key: str, cost: float = 1.0, now: float | None = None) -> float:
+        """Take ``cost`` tokens for ``key``.
+
+        Returns ``0`` when the request is allowed, otherwise the number of
+        seconds until enough tokens will be available.
+        """
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_clients:
+                self._buckets.popitem(last=False)
+            bucket = self._buckets[key] = TokenBucket(self.burst, now)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+        if bucket.tokens >= cost:
+            bucket.tokens -= cost
+            return 0.0
+        return (cost - bucket.tokens) / self.rate
+
+
+class TimerQuota:
+    """Cap the number of unfinished timers each client may own.
+
+    Each client's unfinished timers are kept in a set that :meth:`refresh`
+    updates as timers change, so checking the quota costs O(active timers)
+    rather than O(every timer the client ever created).
+    """
+
+    def __init__(self, limit: int, timers: Mapping[int, Any]) -> None:
+        self.limit = limit
+        self._timers = timers
+        self._owners: Dict[int, str] = {}
+        # Owned timers not known to be finished, per client.
+        self._active: Dict[str, Set[int]] = {}
+
+    def assign(self, timer_id: int, key: str) -> None:
+        """Record that ``key`` created ``timer_id``."""
+        self.release(timer_id)
+        self._owners[timer_id] = key
+        self.refresh((timer_id,))
+
+    def release(self, timer_id: int) -> None:
+        """Forget the owner of a removed timer."""
+        key = self._owners.pop(timer_id, None)
+        if key is not None:
+            self._deactivate(key, timer_id)
+
+    def refresh(self, timer_ids: Iterable[int]) -> None:
+        """Re-check ``timer_ids`` after they finished, restarted or were removed."""
+        for tid in timer_ids:
+            key = self._owners.get(tid)
+            if key is None:
+                continue
+            timer = self._timers.get(tid)
+            if timer is None:
+                self.release(tid)
+            elif timer.finished:
+                self._deactivate(key, tid)
+            else:
+                self._active.setdefault(key, set()).add(tid)
+
+    def _deactivate(self, key: str, timer_id: int) -> None:
+        active = self._active.get(key)
+        if active is not None:
+            active.discard(timer_id)
+            if not active:
+                del self._active[key]
+
+    def owners(self) -> Dict[int, str]:
+        """Return a copy of the timer id to owner mapping."""
+        return dict(self._owners)
+
+    def count(self, key: str) -> int:
+        """Return how many unfinished timers ``key`` owns."""
+        return len(self._active_timers(key))
+
+    def retry_after(self, key: str, now: float | None = None) -> Optional[float]:
+        """Return ``None`` if ``key`` may create a timer, else seconds to wait."""
+        if len(self._active.get(key, ())) < self.limit:
+            return None
+        active = self._active_timers(key)
+        if len(active) < self.limit:
+            return None
+        now = time.time() if now is None else now
+        deadlines = [
+            timer.start_at + timer.duration - now
+            for timer in active
+            if timer.running and timer.start_at is not None
+        ]
+        return max(0.0, min(deadlines)) if deadlines else DEFAULT_QUOTA_RETRY_AFTER
+
+    def _active_timers(self, key: str) -> list:
+        # Timers finished without a refresh (for example by a direct
+        # ``TimerManager`` call) are dropped here.
+        active = self._active.get(key)
+        if not active:
+            return []
+        timers = []
+        for tid in list(active):
+            timer = self._timers.get(tid)
+            if timer is None:
+                self.release(tid)
+            elif timer.finished:
+                self._deactivate(key, tid)
+            else:
+                timers.append(timer)
+        return timers
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def client_key(scope, is_device: Callable[[str], bool]) -> str:
+    """Return the rate-limit identity of the client sending ``scope``."""
+    token = _header(scope, b"x-auth-token")
+    if token and is_device(token):
+        return f"device:{token}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+def _too_many(detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"detail": detail},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class RateLimitMiddleware:
+    """ASGI middleware enforcing :class:`RateLimiter` and :class:`TimerQuota`.
+
+    The client identity is stored as ``request.state.client_key`` so endpoints
+    can attribute created timers to it.
+    """
+
+    def __init__(
+        self,
+        app,
+        is_device: Callable[[str], bool],
+        limiter: RateLimiter | None = None,
+        quota: TimerQuota | None = None,
+        costs: Mapping[Tuple[str, str], float] | None = None,
+    ) -> None:
+        self.app = app
+        self.is_device = is_device
+        self.limiter = limiter
+        self.quota = quota
+        self.costs = dict(costs or {})
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        key = client_key(scope, self.is_device)
+        scope.setdefault("state", {})["client_key"] = key
+        route = (scope["method"], scope["path"])
+        if self.limiter is not None:
+            wait = self.limiter.acquire(key, self.costs.get(route, 1.0))
+            if wait:
+                await _too_many("Rate limit exceeded", wait)(scope, receive, send)
+                return
+        if self.quota is not None and route == ("POST", "/timers"):
+            wait = self.quota.retry_after(key)
+            if wait is not None:
+                await _too_many(
+                    f"Timer quota of {self.quota.limit} reached", wait
+                )(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
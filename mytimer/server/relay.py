@@ -0,0 +1,225 @@
+"""Edge relays re-serving an upstream server's timers to local clients.
+
+``python -m mytimer.server.relay --upstream http://origin:8000 --port 8100``
+runs the regular API as a read-only follower whose only link to the origin
+is one numbered ``/ws`` connection.  The relay mirrors the upstream timers
+and change feed (same epoch and version) and serves ``/ws``, ``GET /timers``,
+long-poll and SSE to its own clients, so the origin sees one connection per
+relay however many displays hang off it.  The upstream may itself be a relay,
+which lets fan-out grow as a tree.
+
+Unlike :class:`~mytimer.server.replication.ReplicationFollower` a relay needs
+no replication port on the upstream; it uses the same WebSocket protocol as
+any other client and resumes with ``since``/``epoch`` after a reconnect.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit, urlunsplit
+
+import websockets
+
+from ..core.timer_manager import Timer, TimerManager
+from .change_feed import ChangeFeed
+
+logger = logging.getLogger(__name__)
+
+# Reconnect delays after the upstream connection was lost.
+RECONNECT_MIN = 0.2
+RECONNECT_MAX = 5.0
+OPEN_TIMEOUT = 10.0
+# Removed timers whose removal version is remembered for late updates.
+MAX_TOMBSTONES = 10000
+
+_WS_SCHEMES = {"http": "ws", "https": "wss", "ws": "ws", "wss": "wss"}
+
+
+def upstream_urls(upstream: str) -> Tuple[str, str]:
+    """Return the ``/ws`` URL and the HTTP base URL of ``upstream``.
+
+    ``upstream`` may be the server's base URL (``http://host:8000``) or its
+    WebSocket URL (``ws://host:8000/ws``).
+    """
+    parts = urlsplit(upstream)
+    if parts.scheme not in _WS_SCHEMES or not parts.netloc:
+        raise ValueError(f"expected an http:// or ws:// URL, got {upstream!r}")
+    path = parts.path.rstrip("/")
+    if path.endswith("/ws"):
+        path = path[: -len("/ws")]
+    http_scheme = "https" if _WS_SCHEMES[parts.scheme] == "wss" else "http"
+    ws_url = urlunsplit((_WS_SCHEMES[parts.scheme], parts.netloc, f"{path}/ws", "", ""))
+    return ws_url, urlunsplit((http_scheme, parts.netloc, path, "", ""))
+
+
+class RelayFollower:
+    """Mirror an upstream server through its ``/ws`` endpoint.
+
+    Has the same interface and callbacks as
+    :class:`~mytimer.server.replication.ReplicationFollower`, so
+    :class:`~mytimer.server.replication.Replication` uses it for leaders
+    given as URLs.
+    """
+
+    def __init__(
+        self,
+        manager: TimerManager,
+        change_feed: ChangeFeed,
+        leader: str,
+        on_snapshot: Callable[[], None],
+        on_change: Callable[[int, List[int]], None],
+    ) -> None:
+        self.manager = manager
+        self.change_feed = change_feed
+        self.leader = leader
+        self.ws_url, self.leader_url = upstream_urls(leader)
+        self.on_snapshot = on_snapshot
+        self.on_change = on_change
+        self.connected = False
+        self.last_contact: Optional[float] = None
+        self.snapshots = 0
+        self._task: Optional[asyncio.Task[None]] = None
+        # Set from ``hello`` until the snapshot of a new epoch arrived.
+        self._new_epoch: Optional[str] = None
+        # Upstream version each timer's state (or removal) was taken from.
+        self._seqs: Dict[int, int] = {}
+        self._tombstones: "OrderedDict[int, int]" = OrderedDict()
+
+    async def start(self) -> None:
+        """Start relaying; connection failures are retried in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Disconnect from the upstream, keeping the mirrored state."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        self.connected = False
+
+    async def _run(self) -> None:
+        delay = RECONNECT_MIN
+        while True:
+            try:
+                await self._follow()
+                delay = RECONNECT_MIN
+            except (OSError, ValueError, KeyError, asyncio.TimeoutError,
+                    websockets.WebSocketException) as exc:
+                logger.warning("relay from %s interrupted: %s", self.ws_url, exc)
+            finally:
+                self.connected = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX)
+
+    async def _follow(self) -> None:
+        feed = self.change_feed
+        query = urlencode({"seq": 1, "since": feed.version, "epoch": feed.epoch})
+        async with websockets.connect(
+            f"{self.ws_url}?{query}", max_size=None, open_timeout=OPEN_TIMEOUT
+        ) as ws:
+            async for text in ws:
+                self.last_contact = time.time()
+                message = json.loads(text)
+                if message.get("type") == "heartbeat":
+                    # Numbered connections that stay silent are reaped.
+                    await ws.send(json.dumps({"type": "heartbeat"}))
+                else:
+                    self._apply(message)
+
+    def _apply(self, message: dict) -> None:
+        kind = message.get("type")
+        if kind == "hello":
+            self.connected = True
+            if not message.get("resumed"):
+                self._new_epoch = message["epoch"]
+            logger.info("relaying %s at version %s", self.ws_url, message["seq"])
+        elif kind == "snapshot":
+            if self._new_epoch is not None:
+                self._replace(message["timers"], self._new_epoch, message["seq"])
+            else:
+                self._merge(message["timers"], message["seq"])
+        elif kind == "update":
+            self._record(message["seq"], {message["timer_id"]: message})
+        elif kind == "remove":
+            self._record(message["seq"], {message["timer_id"]: None})
+
+    def _replace(self, timers: dict, epoch: str, seq: int) -> None:
+        """Start over from the first snapshot of an upstream feed."""
+        self.manager.restore_state({"timers": timers})
+        self.change_feed.restore({"epoch": epoch, "version": seq, "oldest": seq, "log": []})
+        self._seqs = {int(tid): seq for tid in timers}
+        self._tombstones.clear()
+        self._new_epoch = None
+        self.snapshots += 1
+        self.on_snapshot()
+
+    def _merge(self, timers: dict, seq: int) -> None:
+        """Apply a broadcast snapshot as the changes it implies."""
+        changes = {tid: None for tid in map(str, self.manager.timers) if tid not in timers}
+        changes.update(timers)
+        self._record(seq, changes)
+
+    def _record(self, seq: int, changes: dict) -> None:
+        """Apply ``changes`` made at upstream version ``seq``.
+
+        Messages may arrive out of version order, e.g. from an upstream that
+        sends updates from separate tasks.  Each timer keeps the newest state
+        seen for it, and the feed version never goes back.
+        """
+        timers = self.manager.timers
+        ids = []
+        for tid_str, data in changes.items():
+            tid = int(tid_str)
+            if max(self._seqs.get(tid, -1), self._tombstones.get(tid, -1)) > seq:
+                continue
+            if data is None:
+                self._seqs.pop(tid, None)
+                self._tombstones[tid] = seq
+                self._tombstones.move_to_end(tid)
+                if len(self._tombstones) > MAX_TOMBSTONES:
+                    self._tombstones.popitem(last=False)
+                if timers.pop(tid, None) is not None:
+                    ids.append(tid)
+                continue
+            self._seqs[tid] = seq
+            self._tombstones.pop(tid, None)
+            timer = Timer.from_dict(data)
+            if timers.get(tid) != timer:
+                timers[tid] = timer
+                self.manager.reschedule(tid)
+                ids.append(tid)
+        version = max(self.change_feed.version, seq)
+        self.change_feed.record_at(version, *ids)
+        if ids:
+            self.on_change(version, ids)
+
+
+def main(argv: Optional[list] = None) -> None:
+    """Run a relay of ``--upstream`` on ``--port``."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Relay a MyTimer server to local clients")
+    parser.add_argument(
+        "--upstream", required=True, help="Origin or relay to follow, e.g. http://origin:8000"
+    )
+    parser.add_argument("--host", default="0.0.0.0", help="Bind address")
+    parser.add_argument("--port", type=int, default=8100, help="Bind port")
+    args = parser.parse_args(argv)
+    os.environ["MYTIMER_RELAY_FROM"] = args.upstream
+    from . import api
+
+    uvicorn.run(api.app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
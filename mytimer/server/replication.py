@@ -0,0 +1,529 @@
+"""Leader/follower replication of the timer state over TCP.
+
+A leader started with ``MYTIMER_REPLICATION_LISTEN=host:port`` streams its
+ordered mutations to follower processes started with
+``MYTIMER_REPLICATE_FROM=host:port``.  Followers keep a hot copy of every
+timer and continue the leader's change feed with the same epoch and version,
+so they serve ``GET /timers``, long-poll, SSE and ``/ws`` subscriptions
+exactly like the leader would; writes are refused with ``403`` and a pointer
+to the leader.  ``POST /replication/promote`` turns a follower into a leader
+after the old one failed, and ``POST /replication/follow`` points a server at
+another leader.
+
+The protocol is JSON lines.  A follower opens the connection with
+``{"type": "follow", "token": ..., "epoch": ..., "version": ...}`` naming the
+shared replication token and the feed position it already holds.  The leader answers with ``hello`` and then either the
+missed ``change`` messages, if its history still covers that position, or a
+full ``snapshot``.  Afterwards every batch of mutations recorded during one
+event loop iteration becomes one ``change`` message carrying the new version
+and the changed timers (``null`` for removed ones).  ``ping`` messages keep
+idle connections alive so followers notice a dead leader.  A malformed
+``follow`` request or a wrong token is answered with ``{"type": "error",
+"detail": ...}`` and the connection is closed.  A listen address without a
+host binds to the loopback interface.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hmac
+import json
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi.responses import JSONResponse
+
+from ..core.timer_manager import Timer, TimerManager
+from .change_feed import ChangeFeed
+from .handoff import READ_METHODS
+from .relay import RelayFollower
+
+logger = logging.getLogger(__name__)
+
+# Seconds between keep-alive pings; a follower that hears nothing for
+# ``PING_TIMEOUT`` reconnects.
+PING_INTERVAL = 5.0
+PING_TIMEOUT = 3 * PING_INTERVAL
+# Bytes a follower may fall behind before the leader drops it; it reconnects
+# and catches up from the change feed history or a snapshot.
+MAX_FOLLOWER_BUFFER = 8 * 1024 * 1024
+# Reconnect delays of a follower that lost its leader.
+RECONNECT_MIN = 0.2
+RECONNECT_MAX = 5.0
+# Largest line a follower accepts; snapshots of big servers are one line.
+MAX_MESSAGE_SIZE = 1024 * 1024 * 1024
+# Interface a listen address without a host binds to.
+DEFAULT_LISTEN_HOST = "127.0.0.1"
+# Routes a follower refuses to change; everything else, such as device
+# registration or profiling, is local to each server.
+TIMER_WRITE_PATHS = ("/timers", "/tick")
+
+
+def parse_address(address: str, default_host: Optional[str] = None) -> Tuple[str, int]:
+    """Split ``host:port`` (``[v6]:port`` for IPv6) into its parts.
+
+    With ``default_host`` a bare ``port`` is accepted as well.
+    """
+    if default_host is not None and address.isdigit():
+        return default_host, int(address)
+    host, sep, port = address.rpartition(":")
+    if not sep or not host or not port.isdigit():
+        raise ValueError(f"expected host:port, got {address!r}")
+    return host.strip("[]"), int(port)
+
+
+def _encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class ReplicationSource:
+    """Leader side: stream change feed batches to followers presenting ``token``."""
+
+    def __init__(
+        self,
+        manager: TimerManager,
+        change_feed: ChangeFeed,
+        host: str,
+        port: int,
+        token: str,
+        api_port: Optional[int] = None,
+    ) -> None:
+        self.manager = manager
+        self.change_feed = change_feed
+        self.host = host
+        self.port = port
+        self.token = token
+        self.api_port = api_port
+        # Connected followers and the write buffer size at which each is dropped.
+        self._followers: Dict[asyncio.StreamWriter, int] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._ping_task: Optional[asyncio.Task[None]] = None
+        self._pending: Set[int] = set()
+        self._flush_scheduled = False
+        self.dropped = 0
+        change_feed.add_listener(self._on_change)
+
+    @property
+    def followers(self) -> int:
+        return len(self._followers)
+
+    async def start(self) -> None:
+        """Listen for followers."""
+        if self._server is not None:
+            return
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, reuse_address=True
+        )
+        self._ping_task = asyncio.create_task(self._ping_loop())
+
+    async def stop(self) -> None:
+        """Stop listening and disconnect every follower."""
+        if self._ping_task is not None:
+            self._ping_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._ping_task
+            self._ping_task = None
+        if self._server is not None:
+            self._server.close()
+            self.disconnect_all()
+            await self._server.wait_closed()
+            self._server = None
+
+    def disconnect_all(self) -> None:
+        """Close every follower connection; they reconnect and resynchronise."""
+        for writer in list(self._followers):
+            self._drop(writer)
+
+    def _drop(self, writer: asyncio.StreamWriter) -> None:
+        self._followers.pop(writer, None)
+        writer.close()
+
+    def _on_change(self, version: int, timer_ids) -> None:
+        if not self._followers:
+            return
+        self._pending.update(timer_ids)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+
+    def _change_message(self, timer_ids: Iterable[int]) -> dict:
+        timers = self.manager.timers
+        return {
+            "type": "change",
+            "version": self.change_feed.version,
+            "next_id": self.manager._next_id,
+            "timers": {
+                str(tid): timers[tid].to_dict() if tid in timers else None
+                for tid in timer_ids
+            },
+        }
+
+    def _flush(self) -> None:
+        """Send the changes batched during this loop iteration to all followers."""
+        self._flush_scheduled = False
+        if not self._pending:
+            return
+        ids, self._pending = sorted(self._pending), set()
+        data = _encode(self._change_message(ids))
+        for writer, limit in list(self._followers.items()):
+            if writer.transport.get_write_buffer_size() > limit:
+                logger.warning(
+                    "dropping follower %s: too far behind", writer.get_extra_info("peername")
+                )
+                self.dropped += 1
+                self._drop(writer)
+            else:
+                writer.write(data)
+
+    async def _ping_loop(self) -> None:
+        while True:
+            await asyncio.sleep(PING_INTERVAL)
+            data = _encode({"type": "ping", "version": self.change_feed.version})
+            for writer in list(self._followers):
+                writer.write(data)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        feed = self.change_feed
+        try:
+            request = json.loads(await asyncio.wait_for(reader.readline(), PING_TIMEOUT))
+            if not isinstance(request, dict) or request.get("type") != "follow":
+                raise ValueError("expected a follow request")
+            token = request.get("token")
+            if not isinstance(token, str) or not hmac.compare_digest(
+                token.encode(), self.token.encode()
+            ):
+                raise ValueError("invalid replication token")
+            epoch = request.get("epoch")
+            if epoch is not None and not isinstance(epoch, str):
+                raise ValueError("epoch must be a string")
+            # No await from here on: the catch-up below and the registration
+            # happen in one step so no change falls between them.
+            changed = feed.changes_since(int(request.get("version", -1)), epoch)
+        except (OSError, ValueError, TypeError, OverflowError, asyncio.TimeoutError) as exc:
+            logger.warning("rejected replication connection: %s", exc)
+            with contextlib.suppress(OSError):
+                writer.write(_encode({"type": "error", "detail": str(exc)}))
+                writer.close()
+                await writer.wait_closed()
+            return
+        writer.write(
+            _encode({"type": "hello", "epoch": feed.epoch, "version": feed.version,
+                     "api_port": self.api_port})
+        )
+        if changed is None:
+            writer.write(
+                _encode({"type": "snapshot", "epoch": feed.epoch, "version": feed.version,
+                         "state": self.manager.export_state()})
+            )
+        elif changed:
+            writer.write(_encode(self._change_message(sorted(changed))))
+        self._followers[writer] = writer.transport.get_write_buffer_size() + MAX_FOLLOWER_BUFFER
+        try:
+            # Followers only send the handshake; this detects when they leave.
+            while await reader.read(4096):
+                pass
+        except OSError:
+            pass
+        finally:
+            self._drop(writer)
+
+
+class ReplicationFollower:
+    """Follower side: mirror a leader into ``manager`` and ``change_feed``.
+
+    Parameters
+    ----------
+    on_snapshot:
+        Called after the whole state was replaced by a leader snapshot.
+    on_change:
+        Called with the version and the ids of timers changed by the leader
+        after they were applied and recorded in ``change_feed``.
+    token:
+        Shared replication token the leader expects.
+    """
+
+    def __init__(
+        self,
+        manager: TimerManager,
+        change_feed: ChangeFeed,
+        leader: str,
+        on_snapshot: Callable[[], None],
+        on_change: Callable[[int, List[int]], None],
+        token: Optional[str] = None,
+    ) -> None:
+        self.manager = manager
+        self.change_feed = change_feed
+        self.leader = leader
+        self.token = token
+        self.host, self.port = parse_address(leader)
+        self.on_snapshot = on_snapshot
+        self.on_change = on_change
+        self.connected = False
+        self.leader_api_port: Optional[int] = None
+        self.last_contact: Optional[float] = None
+        self.snapshots = 0
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def leader_url(self) -> Optional[str]:
+        """HTTP address of the leader's API, once it introduced itself."""
+        if self.leader_api_port is None:
+            return None
+        host = f"[{self.host}]" if ":" in self.host else self.host
+        return f"http://{host}:{self.leader_api_port}"
+
+    async def start(self) -> None:
+        """Start following; connection failures are retried in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop following, keeping the replicated state."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        self.connected = False
+
+    async def _run(self) -> None:
+        delay = RECONNECT_MIN
+        while True:
+            try:
+                await self._follow()
+                delay = RECONNECT_MIN
+            except (OSError, ValueError, KeyError, asyncio.TimeoutError) as exc:
+                logger.warning("replication from %s interrupted: %s", self.leader, exc)
+            finally:
+                self.connected = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX)
+
+    async def _follow(self) -> None:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, limit=MAX_MESSAGE_SIZE),
+            PING_TIMEOUT,
+        )
+        try:
+            feed = self.change_feed
+            writer.write(
+                _encode({"type": "follow", "token": self.token, "epoch": feed.epoch,
+                         "version": feed.version})
+            )
+            while True:
+                line = await asyncio.wait_for(reader.readline(), PING_TIMEOUT)
+                if not line:
+                    return
+                self.last_contact = time.time()
+                self._apply(json.loads(line))
+        finally:
+            writer.close()
+
+    def _apply(self, message: dict) -> None:
+        kind = message.get("type")
+        if kind == "error":
+            raise ValueError(f"leader refused to replicate: {message.get('detail')}")
+        if kind == "hello":
+            self.leader_api_port = message.get("api_port")
+            self.connected = True
+            logger.info("following %s at version %s", self.leader, message["version"])
+        elif kind == "snapshot":
+            self.manager.restore_state(message["state"])
+            self.change_feed.restore(
+                {"epoch": message["epoch"], "version": message["version"],
+                 "oldest": message["version"], "log": []}
+            )
+            self.snapshots += 1
+            self.on_snapshot()
+        elif kind == "change":
+            version = message["version"]
+            if version < self.change_feed.version:
+                return
+            timers = self.manager.timers
+            ids = []
+            for tid_str, data in message["timers"].items():
+                tid = int(tid_str)
+                if data is None:
+                    timers.pop(tid, None)
+                else:
+                    timers[tid] = Timer.from_dict(data)
+                    self.manager.reschedule(tid)
+                ids.append(tid)
+            self.manager._next_id = max(self.manager._next_id, message.get("next_id", 0))
+            self.change_feed.record_at(version, *ids)
+            self.on_change(version, ids)
+
+
+class Replication:
+    """Role of this server and the replication links it maintains.
+
+    Every server is a leader unless it follows another one, either over a
+    replication stream or as a relay of another server's ``/ws``.  A leader with a
+    ``listen`` address accepts followers; so does a follower, which lets
+    followers be chained.  Both ends of a replication stream share
+    ``token``; listening requires one.  ``on_promote`` and ``on_demote``
+    start and stop timekeeping when the role changes.
+    """
+
+    def __init__(
+        self,
+        manager: TimerManager,
+        change_feed: ChangeFeed,
+        *,
+        listen: Optional[str] = None,
+        leader: Optional[str] = None,
+        token: Optional[str] = None,
+        api_port: Optional[int] = None,
+        on_snapshot: Callable[[], None],
+        on_change: Callable[[int, List[int]], None],
+        on_promote: Callable[[], Awaitable[None]],
+        on_demote: Callable[[], Awaitable[None]],
+    ) -> None:
+        self.manager = manager
+        self.change_feed = change_feed
+        self.listen = listen
+        self.token = token
+        if listen and not token:
+            raise ValueError("a replication listen address needs a replication token")
+        self.source = (
+            ReplicationSource(
+                manager,
+                change_feed,
+                *parse_address(listen, DEFAULT_LISTEN_HOST),
+                token,
+                api_port=api_port,
+            )
+            if listen
+            else None
+        )
+        self.on_snapshot = on_snapshot
+        self.on_change = on_change
+        self.on_promote = on_promote
+        self.on_demote = on_demote
+        self.follower: Optional[ReplicationFollower | RelayFollower] = None
+        if leader:
+            self.set_leader(leader)
+        self.promoted_at: Optional[float] = None
+
+    @property
+    def is_follower(self) -> bool:
+        return self.follower is not None
+
+    @property
+    def leader_url(self) -> Optional[str]:
+        return self.follower.leader_url if self.follower is not None else None
+
+    def _follower(self, leader: str):
+        # URLs name an upstream ``/ws`` to relay, ``host:port`` a replication stream.
+        if "://" in leader:
+            return RelayFollower(
+                self.manager, self.change_feed, leader, self._on_snapshot, self.on_change
+            )
+        return ReplicationFollower(
+            self.manager, self.change_feed, leader, self._on_snapshot, self.on_change,
+            token=self.token,
+        )
+
+    def _on_snapshot(self) -> None:
+        # Our own followers hold positions in the replaced feed.
+        if self.source is not None:
+            self.source.disconnect_all()
+        self.on_snapshot()
+
+    def set_leader(self, leader: str) -> None:
+        """Follow ``leader`` once started; for launchers configuring the app."""
+        self.follower = self._follower(leader)
+
+    async def start(self) -> None:
+        if self.source is not None:
+            await self.source.start()
+        if self.follower is not None:
+            await self.follower.start()
+
+    async def stop(self) -> None:
+        if self.follower is not None:
+            await self.follower.stop()
+        if self.source is not None:
+            await self.source.stop()
+
+    async def promote(self) -> bool:
+        """Stop following and become a leader; return ``False`` if already one."""
+        if self.follower is None:
+            return False
+        follower, self.follower = self.follower, None
+        await follower.stop()
+        self.promoted_at = time.time()
+        logger.info("promoted to leader at version %s", self.change_feed.version)
+        await self.on_promote()
+        return True
+
+    async def follow(self, leader: str) -> None:
+        """Follow ``leader`` from now on, replacing the current leader if any.
+
+        ``leader`` is a replication address (``host:port``) or the URL of a
+        server or relay to mirror through its ``/ws`` endpoint.
+        """
+        follower = self._follower(leader)
+        if self.follower is not None:
+            await self.follower.stop()
+        else:
+            await self.on_demote()
+        self.follower = follower
+        await follower.start()
+
+    def status(self) -> dict:
+        follower = self.follower
+        status = {
+            "role": "follower" if follower is not None else "leader",
+            "epoch": self.change_feed.epoch,
+            "version": self.change_feed.version,
+            "listen": self.listen,
+            "followers": self.source.followers if self.source is not None else 0,
+        }
+        if follower is not None:
+            status.update(
+                leader=follower.leader,
+                leader_url=follower.leader_url,
+                connected=follower.connected,
+                last_contact=follower.last_contact,
+                snapshots=follower.snapshots,
+            )
+        elif self.promoted_at is not None:
+            status["promoted_at"] = self.promoted_at
+        return status
+
+
+class ReadOnlyReplicaMiddleware:
+    """ASGI middleware refusing timer writes with ``403`` while following a leader.
+
+    Only :data:`TIMER_WRITE_PATHS` are refused; admin and local endpoints,
+    including ``/replication`` to promote a follower, stay writable.
+    """
+
+    def __init__(self, app, replication: Replication) -> None:
+        self.app = app
+        self.replication = replication
+
+    async def __call__(self, scope, receive, send) -> None:
+        if (
+            scope["type"] == "http"
+            and self.replication.is_follower
+            and scope["method"] not in READ_METHODS
+            and _is_timer_write_path(scope["path"])
+        ):
+            response = JSONResponse(
+                status_code=403,
+                content={
+                    "detail": "Read-only replica; send writes to the leader",
+                    "leader": self.replication.leader_url,
+                },
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+def _is_timer_write_path(path: str) -> bool:
+    return any(path == prefix or path.startswith(prefix + "/") for prefix in TIMER_WRITE_PATHS)
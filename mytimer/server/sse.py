@@ -0,0 +1,39 @@
+"""Helpers for the Server-Sent Events stream served at ``/events``."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Optional, Tuple
+
+KEEPALIVE_INTERVAL = 15.0
+
+
+def format_event(data: Any, event: Optional[str] = None, event_id: Optional[str] = None) -> str:
+    """Encode ``data`` as a single ``text/event-stream`` message."""
+    lines = []
+    if event is not None:
+        lines.append(f"event: {event}")
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def format_event_id(epoch: str, version: int) -> str:
+    """Return the ``Last-Event-ID`` value for ``version`` of ``epoch``."""
+    return f"{epoch}:{version}"
+
+
+def parse_last_event_id(value: Optional[str]) -> Tuple[Optional[str], int]:
+    """Split a ``Last-Event-ID`` header into ``(epoch, version)``.
+
+    Missing or malformed values yield ``(None, -1)`` which never matches the
+    change feed and therefore triggers a full snapshot.
+    """
+    if not value:
+        return None, -1
+    epoch, _, version = value.rpartition(":")
+    try:
+        return epoch or None, int(version)
+    except ValueError:
+        return None, -1
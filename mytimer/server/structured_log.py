@@ -0,0 +1,233 @@
+"""Structured JSON logging that never blocks the event loop.
+
+Log calls on the event loop only build a :class:`logging.LogRecord`, run the
+sampling filter and put the record on a bounded queue.  A background thread
+(:class:`logging.handlers.QueueListener`) formats each record as one JSON
+object per line and writes it to a rotating file, so disk latency, rollover
+and formatting all happen off the loop.  When the writer falls behind and the
+queue is full, records are dropped and counted rather than waited for.
+
+High-frequency events are sampled per key: a record's ``event`` attribute
+(``logger.info("...", extra={"event": "tick"})``) or, for uvicorn access
+records, the request path.  A rate of ``0.01`` keeps one record in a hundred;
+kept records carry ``"sample_rate"`` so readers can scale counts back up.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from typing import Dict, Optional
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUPS = 5
+# Loggers routed through the queue; uvicorn's own handlers write synchronously.
+LOGGERS = ("mytimer", "uvicorn", "uvicorn.error", "uvicorn.access")
+
+# Attributes every LogRecord has; anything else came from ``extra``.  uvicorn
+# adds an ANSI coloured copy of some messages that is of no use in JSON.
+_RECORD_ATTRS = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None)).keys()
+) | {"message", "asctime", "taskName", "color_message"}
+# Positional arguments of uvicorn access records.
+_ACCESS_FIELDS = ("client", "method", "path", "http_version", "status")
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse ``"tick=0.01,broadcast=0.1,/status=0.05"`` into a rate per key.
+
+    Raises
+    ------
+    ValueError
+        If an entry has no ``=`` or its rate is not within ``[0, 1]``.
+    """
+    rates: Dict[str, float] = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        key, sep, value = item.rpartition("=")
+        if not sep or not key:
+            raise ValueError(f"invalid sample rate {item!r}")
+        rate = float(value)
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f"sample rate for {key!r} must be between 0 and 1")
+        rates[key.strip()] = rate
+    return rates
+
+
+def _sample_key(record: logging.LogRecord) -> Optional[str]:
+    event = getattr(record, "event", None)
+    if event is not None:
+        return event
+    if record.name == "uvicorn.access" and isinstance(record.args, tuple):
+        if len(record.args) >= 3:
+            return str(record.args[2]).split("?", 1)[0]
+    return None
+
+
+class SamplingFilter(logging.Filter):
+    """Keep the first and then every ``1 / rate``-th record per sampling key.
+
+    Counting instead of drawing random numbers keeps the output evenly spread
+    and the decision to a dictionary lookup and an addition.
+    """
+
+    def __init__(self, rates: Dict[str, float]) -> None:
+        super().__init__()
+        self.rates = dict(rates)
+        self._every = {
+            key: round(1 / rate) if rate > 0 else 0 for key, rate in rates.items()
+        }
+        self._seen: Dict[str, int] = {}
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = _sample_key(record)
+        every = self._every.get(key) if key is not None else None
+        if every is None or every == 1:
+            return True
+        seen = self._seen.get(key, 0)
+        self._seen[key] = seen + 1
+        if every == 0 or seen % every:
+            self.sampled_out += 1
+            return False
+        record.sample_rate = self.rates[key]
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as single-line JSON objects.
+
+    ``extra`` fields are emitted as top-level keys next to ``ts``, ``level``,
+    ``logger`` and ``msg``; values JSON cannot encode are written as strings.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.name == "uvicorn.access" and isinstance(record.args, tuple):
+            entry.update(zip(_ACCESS_FIELDS, record.args))
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str, separators=(",", ":"))
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of waiting for space."""
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock implementation formats the message here, on the calling
+        # thread; the listener's formatter does that work instead.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StructuredLogging:
+    """Route server logs through a queue to a JSON writer thread.
+
+    ``path`` of ``None`` writes to stderr instead of a rotating file.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        *,
+        level: int = logging.INFO,
+        sample_rates: Optional[Dict[str, float]] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backups: int = DEFAULT_BACKUPS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ) -> None:
+        self.path = path
+        self.level = level
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.sampler = SamplingFilter(sample_rates or {})
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.handler = NonBlockingQueueHandler(self.queue)
+        self.handler.addFilter(self.sampler)
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._writer: Optional[logging.Handler] = None
+        self._saved: Dict[str, tuple] = {}
+
+    @property
+    def dropped(self) -> int:
+        return self.handler.dropped
+
+    @property
+    def sampled_out(self) -> int:
+        return self.sampler.sampled_out
+
+    def _make_writer(self) -> logging.Handler:
+        if self.path is None:
+            writer: logging.Handler = logging.StreamHandler(sys.stderr)
+        else:
+            writer = logging.handlers.RotatingFileHandler(
+                self.path,
+                maxBytes=self.max_bytes,
+                backupCount=self.backups,
+                encoding="utf-8",
+            )
+        writer.setFormatter(JSONFormatter())
+        return writer
+
+    def start(self) -> None:
+        """Attach the queue handler to the server loggers and start writing."""
+        if self._listener is not None:
+            return
+        self._writer = self._make_writer()
+        self._listener = logging.handlers.QueueListener(
+            self.queue, self._writer, respect_handler_level=True
+        )
+        self._listener.start()
+        for name in LOGGERS:
+            log = logging.getLogger(name)
+            self._saved[name] = (list(log.handlers), log.propagate, log.level)
+            log.handlers = [self.handler]
+            log.propagate = False
+            if name == "mytimer":
+                log.setLevel(self.level)
+
+    def stop(self) -> None:
+        """Restore the previous handlers and flush queued records to disk."""
+        if self._listener is None:
+            return
+        for name, (handlers, propagate, level) in self._saved.items():
+            log = logging.getLogger(name)
+            log.handlers = handlers
+            log.propagate = propagate
+            log.setLevel(level)
+        self._saved.clear()
+        # Wait for the writer to drain what is queued, then stop it.
+        deadline = time.monotonic() + 5.0
+        while not self.queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self._listener.stop()
+        self._listener = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
@@ -0,0 +1,149 @@
+"""Topic subscription index used to route WebSocket updates."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+STATUSES = ("running", "paused", "finished")
+
+
+def timer_status(timer: Any) -> str:
+    """Return the status class (``running``/``paused``/``finished``) of ``timer``."""
+    if timer.finished or timer.remaining_now() <= 0:
+        return "finished"
+    return "running" if timer.running else "paused"
+
+
+class SubscriptionIndex:
+    """Map timer ids and status classes to the connections interested in them.
+
+    Connections that never subscribed are *unfiltered* and receive every
+    update; they are not tracked here. Lookups cost O(interested connections)
+    rather than O(all connections).
+    """
+
+    def __init__(self) -> None:
+        self._by_timer: Dict[int, Set[Hashable]] = {}
+        self._by_status: Dict[str, Set[Hashable]] = {s: set() for s in STATUSES}
+        self._topics: Dict[Hashable, Tuple[Set[int], Set[str]]] = {}
+        # Status each timer had when it was last sent to clients so
+        # subscribers of the old status learn that a timer left their class.
+        self._last_status: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._topics)
+
+    def is_filtered(self, conn: Hashable) -> bool:
+        """Return ``True`` if ``conn`` only receives subscribed topics."""
+        return conn in self._topics
+
+    def topics(self, conn: Hashable) -> Tuple[List[int], List[str]]:
+        """Return the sorted timer ids and statuses ``conn`` subscribed to."""
+        timers, statuses = self._topics.get(conn, (set(), set()))
+        return sorted(timers), sorted(statuses)
+
+    def subscribe(
+        self, conn: Hashable, timers: Iterable[int] = (), statuses: Iterable[str] = ()
+    ) -> None:
+        """Add timer ids and status classes to ``conn``'s subscription.
+
+        Raises
+        ------
+        ValueError
+            If a status is not one of :data:`STATUSES`.
+        """
+        statuses = set(statuses)
+        unknown = statuses.difference(STATUSES)
+        if unknown:
+            raise ValueError(f"unknown status: {', '.join(sorted(unknown))}")
+        own_timers, own_statuses = self._topics.setdefault(conn, (set(), set()))
+        for tid in timers:
+            own_timers.add(tid)
+            self._by_timer.setdefault(tid, set()).add(conn)
+        for status in statuses:
+            own_statuses.add(status)
+            self._by_status[status].add(conn)
+
+    def unsubscribe(
+        self, conn: Hashable, timers: Iterable[int] = (), statuses: Iterable[str] = ()
+    ) -> None:
+        """Remove topics from ``conn``; without topics drop all its filters."""
+        timers = list(timers)
+        statuses = list(statuses)
+        if not timers and not statuses:
+            self.remove(conn)
+            return
+        own = self._topics.get(conn)
+        if own is None:
+            return
+        for tid in timers:
+            own[0].discard(tid)
+            self._discard_timer(tid, conn)
+        for status in statuses:
+            own[1].discard(status)
+            if status in self._by_status:
+                self._by_status[status].discard(conn)
+
+    def remove(self, conn: Hashable) -> None:
+        """Forget every subscription of ``conn``."""
+        own = self._topics.pop(conn, None)
+        if own is None:
+            return
+        for tid in own[0]:
+            self._discard_timer(tid, conn)
+        for status in own[1]:
+            self._by_status[status].discard(conn)
+
+    def recipients(self, timer_id: int, status: Optional[str]) -> Set[Hashable]:
+        """Return filtered connections interested in an update of ``timer_id``.
+
+        A ``status`` of ``None`` (a removed timer whose status was never
+        sent) reaches the subscribers of every status.
+        """
+        result = set(self._by_timer.get(timer_id, ()))
+        if status is None:
+            for conns in self._by_status.values():
+                result |= conns
+            return result
+        result |= self._by_status.get(status, set())
+        previous = self._last_status.get(timer_id)
+        if previous is not None and previous != status:
+            result |= self._by_status.get(previous, set())
+        self._last_status[timer_id] = status
+        return result
+
+    def route(self, items: Iterable[Tuple[int, str]]) -> Dict[Hashable, List[int]]:
+        """Group ``(timer_id, status)`` pairs by interested filtered connection.
+
+        Connections none of the timers are relevant to are left out.
+        """
+        routed: Dict[Hashable, List[int]] = {}
+        for tid, status in items:
+            self._last_status[tid] = status
+            for conn in self._by_timer.get(tid, ()):
+                routed.setdefault(conn, []).append(tid)
+            for conn in self._by_status[status]:
+                if tid not in self._topics[conn][0]:
+                    routed.setdefault(conn, []).append(tid)
+        return routed
+
+    def note(self, items: Iterable[Tuple[int, Optional[str]]]) -> None:
+        """Record the status of timers sent to clients without routing them."""
+        for tid, status in items:
+            if status is not None:
+                self._last_status[tid] = status
+
+    def last_status(self, timer_id: int) -> Optional[str]:
+        """Return the status ``timer_id`` was last sent with, if known."""
+        return self._last_status.get(timer_id)
+
+    def forget_timer(self, timer_id: int) -> None:
+        """Drop cached routing data for a removed timer."""
+        self._last_status.pop(timer_id, None)
+
+    def _discard_timer(self, tid: int, conn: Hashable) -> None:
+        conns = self._by_timer.get(tid)
+        if conns is not None:
+            conns.discard(conn)
+            if not conns:
+                del self._by_timer[tid]
@@ -1,21 +1,34 @@
 from __future__ import annotations
 
-"""Background task that automatically ticks timers at a fixed interval."""
+"""Background tasks that tick timers or finish them when they are due."""
 
 import asyncio
 import contextlib
+import logging
 import os
-from typing import Optional
+import time
+from typing import Awaitable, Callable, Optional
 
 from ..core.timer_manager import TimerManager
 
+log = logging.getLogger("mytimer.ticker")
+
 
 class AutoTicker:
-    """Periodically call :meth:`TimerManager.tick`."""
+    """Periodically call :meth:`TimerManager.tick`.
+
+    ``tick`` replaces the call, e.g. to advance the timers of a whole cluster.
+    """
 
-    def __init__(self, manager: TimerManager, interval: float = 1.0) -> None:
+    def __init__(
+        self,
+        manager: TimerManager,
+        interval: float = 1.0,
+        tick: Optional[Callable[[float], Awaitable[None]]] = None,
+    ) -> None:
         self.manager = manager
         self.interval = interval
+        self.tick = tick
         self._task: Optional[asyncio.Task[None]] = None
         self._running = False
 
@@ -39,10 +52,75 @@ class AutoTicker:
 
     async def _run(self) -> None:
         while self._running:
-            self.manager.tick(self.interval)
+            if self.tick is None:
+                self.manager.tick(self.interval)
+            else:
+                await self.tick(self.interval)
+            log.info("tick", extra={"event": "tick", "seconds": self.interval})
             await asyncio.sleep(self.interval)
 
 
+class DeadlineWatcher:
+    """Finish timers when they are due without periodic ticking.
+
+    The watcher sleeps until the next deadline reported by
+    :meth:`TimerManager.next_deadline` and then calls
+    :meth:`TimerManager.expire_due`. Call :meth:`poke` after creating or
+    resuming timers so an earlier deadline is picked up; it only wakes the
+    watcher if the next deadline moved before the one it sleeps until.
+    """
+
+    def __init__(self, manager: TimerManager, max_sleep: float = 60.0) -> None:
+        self.manager = manager
+        self.max_sleep = max_sleep
+        self._task: Optional[asyncio.Task[None]] = None
+        self._wake: Optional[asyncio.Event] = None
+        # Deadline the watcher sleeps until; ``None`` while no timer runs.
+        self._deadline: Optional[float] = None
+        self._running = False
+
+    async def start(self) -> None:
+        """Start watching deadlines in the background."""
+        if self._task:
+            return
+        self._wake = asyncio.Event()
+        self._running = True
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task."""
+        # ``wait_for`` may swallow the cancellation if the wake-up event was
+        # set at the same time; the flag ends the loop in that case.
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        self._task = None
+        self._wake = None
+
+    def poke(self) -> None:
+        """Re-evaluate the next deadline after timers changed."""
+        if self._wake is None or self._wake.is_set():
+            return
+        deadline = self.manager.next_deadline()
+        if deadline is not None and (self._deadline is None or deadline < self._deadline):
+            self._wake.set()
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        while self._running:
+            self.manager.expire_due()
+            deadline = self._deadline = self.manager.next_deadline()
+            if deadline is None:
+                delay = self.max_sleep
+            else:
+                delay = min(max(0.0, deadline - time.time()), self.max_sleep)
+            self._wake.clear()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), delay)
+
+
 def create_auto_ticker(manager: TimerManager) -> AutoTicker:
     """Factory creating :class:`AutoTicker` based on environment config."""
     interval = float(os.environ.get("MYTIMER_AUTO_TICK_INTERVAL", "0"))
@@ -0,0 +1,109 @@
+"""Ordered timer id indexes backing paginated ``GET /timers``.
+
+The index keeps one sorted id list for all timers and one per status class,
+so a page starting after a cursor is found with a binary search and costs
+O(page) instead of O(all timers). It is updated from the change feed; entries
+that went stale because a timer was changed without being recorded are
+corrected when a page reaches them, and a size mismatch with the manager
+(e.g. after loading state from disk) triggers a full rebuild.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .subscriptions import STATUSES, timer_status
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _discard(ids: List[int], timer_id: int) -> None:
+    pos = bisect_left(ids, timer_id)
+    if pos < len(ids) and ids[pos] == timer_id:
+        del ids[pos]
+
+
+class TimerIndex:
+    """Sorted timer ids overall and per status class."""
+
+    def __init__(
+        self,
+        timers: Mapping[int, Any],
+        status_of: Callable[[Any], str] = timer_status,
+    ) -> None:
+        self._timers = timers
+        self._status_of = status_of
+        self._status: Dict[int, str] = {}
+        self._all: List[int] = []
+        self._by_status: Dict[str, List[int]] = {s: [] for s in STATUSES}
+
+    def __len__(self) -> int:
+        return len(self._status)
+
+    def rebuild(self) -> None:
+        """Re-index every timer."""
+        self._status = {tid: self._status_of(t) for tid, t in self._timers.items()}
+        self._all = sorted(self._status)
+        self._by_status = {s: [] for s in STATUSES}
+        for tid in self._all:
+            self._by_status[self._status[tid]].append(tid)
+
+    def update(self, timer_ids: Iterable[int]) -> None:
+        """Re-index ``timer_ids`` after they were created, changed or removed."""
+        for tid in timer_ids:
+            timer = self._timers.get(tid)
+            self._move(tid, None if timer is None else self._status_of(timer))
+
+    def _move(self, timer_id: int, status: Optional[str]) -> None:
+        old = self._status.get(timer_id)
+        if old == status:
+            return
+        if old is None:
+            insort(self._all, timer_id)
+        else:
+            _discard(self._by_status[old], timer_id)
+        if status is None:
+            del self._status[timer_id]
+            _discard(self._all, timer_id)
+        else:
+            self._status[timer_id] = status
+            insort(self._by_status[status], timer_id)
+
+    def page(
+        self, status: Optional[str] = None, after: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[int], Optional[int]]:
+        """Return up to ``limit`` ids greater than ``after`` and the next cursor.
+
+        The cursor is ``None`` when no further ids follow.
+
+        Raises
+        ------
+        ValueError
+            If ``status`` is not one of :data:`STATUSES`.
+        """
+        if status is not None and status not in STATUSES:
+            raise ValueError(f"unknown status: {status}")
+        page: List[int] = []
+        while True:
+            if len(self._status) != len(self._timers):
+                self.rebuild()
+            ids = self._all if status is None else self._by_status[status]
+            pos = bisect_right(ids, after) if after is not None else 0
+            stale = False
+            while pos < len(ids) and len(page) < limit:
+                tid = ids[pos]
+                timer = self._timers.get(tid)
+                current = None if timer is None else self._status_of(timer)
+                if current != self._status[tid]:
+                    # Changed without passing through the change feed.
+                    self._move(tid, current)
+                    stale = True
+                    break
+                page.append(tid)
+                after = tid
+                pos += 1
+            if not stale:
+                break
+        return page, (after if pos < len(ids) else None)
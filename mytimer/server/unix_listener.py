@@ -0,0 +1,131 @@
+"""Serve the API on a Unix domain socket next to the TCP listener.
+
+Local tools (the CLI, the TUI, the Qt client) talk to the server many times a
+second.  Over a Unix socket those requests skip the TCP/IP stack, loopback
+routing and port lookups, which lowers per-request latency and CPU use.
+
+uvicorn only binds one address per process, so the socket is served by a
+second :class:`uvicorn.Server` inside the same event loop.  It shares the
+application object but not the lifespan: startup and shutdown still run once,
+driven by the main TCP server.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+import stat
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+
+class _SocketServer(uvicorn.Server):
+    """:class:`uvicorn.Server` that leaves signal handling to the main server."""
+
+    @contextlib.contextmanager
+    def capture_signals(self):  # uvicorn >= 0.29
+        yield
+
+    def install_signal_handlers(self) -> None:  # uvicorn < 0.29
+        pass
+
+
+def socket_in_use(path: str) -> bool:
+    """Return ``True`` if a server is accepting connections on ``path``."""
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return False
+    except OSError:
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+class UnixSocketListener:
+    """Run ``app`` on the Unix socket at ``path`` until :meth:`stop`."""
+
+    def __init__(self, path: str, *, mode: int = 0o600) -> None:
+        self.path = path
+        # Only the owner may connect by default; the socket bypasses any
+        # network level access control the TCP port might have.
+        self.mode = mode
+        self._server: uvicorn.Server | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._detached = False
+
+    @property
+    def serving(self) -> bool:
+        return self._server is not None and self._server.started
+
+    async def start(self, app) -> bool:
+        """Start serving and return whether the socket could be bound.
+
+        A socket that another live server (for example a second cluster
+        worker) is listening on is left alone instead of being replaced.
+        """
+        if self._task:
+            return self.serving
+        if socket_in_use(self.path):
+            logger.warning("Unix socket %s is already in use", self.path)
+            return False
+        # The parent is created private; the mode only applies to new
+        # directories, an existing one (e.g. a custom path) is left as is.
+        os.makedirs(os.path.dirname(self.path) or ".", mode=0o700, exist_ok=True)
+        with contextlib.suppress(FileNotFoundError):
+            # A leftover from a server that did not shut down cleanly.
+            if stat.S_ISSOCK(os.stat(self.path).st_mode):
+                os.unlink(self.path)
+        config = uvicorn.Config(
+            app, uds=self.path, lifespan="off", log_config=None, access_log=False
+        )
+        server = _SocketServer(config)
+        self._task = asyncio.create_task(server.serve())
+        while not server.started and not self._task.done():
+            await asyncio.sleep(0.01)
+        if not server.started:
+            with contextlib.suppress(BaseException):
+                await self._task
+            self._task = None
+            logger.warning("Could not listen on Unix socket %s", self.path)
+            return False
+        os.chmod(self.path, self.mode)
+        self._server = server
+        self._detached = False
+        return True
+
+    def detach(self) -> None:
+        """Stop accepting connections and give up the path, keeping open ones.
+
+        Another process may bind the path afterwards; :meth:`stop` then only
+        drains the remaining connections and leaves the new socket alone.
+        """
+        if self._server is None or self._detached:
+            return
+        for server in self._server.servers:
+            server.close()
+        self._detached = True
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+    async def stop(self) -> None:
+        """Close the socket and wait for its connections to finish."""
+        if self._task is None:
+            return
+        if self._server is not None:
+            self._server.should_exit = True
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        self._server = None
+        if not self._detached:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.path)
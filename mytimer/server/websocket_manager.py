@@ -3,50 +3,422 @@ from __future__ import annotations
 """Utility class to manage WebSocket connections and broadcast messages."""
 
 
-from typing import Set, Any
-from fastapi import WebSocket, WebSocketDisconnect
+import asyncio
+import contextlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Set, Any, Dict, Iterable, List, Optional, Tuple, Union
+from fastapi import WebSocket
+
+from ..core import binary_codec
+from ..core.frame_compression import DEFAULT_THRESHOLD, FrameCompressor
+from .metrics import Histogram
+from .subscriptions import SubscriptionIndex
+
+# Close code sent when the connection cap is reached ("try again later").
+CLOSE_TRY_AGAIN_LATER = 1013
+CLOSE_GOING_AWAY = 1001
+HEARTBEAT_MESSAGE = {"type": "heartbeat"}
+
+
+@dataclass
+class ConnectionStats:
+    """Accounting for one WebSocket connection."""
+
+    peer: str
+    connected_at: float = field(default_factory=time.time)
+    # Monotonic times of the last message of any kind and of the last one
+    # that was not a heartbeat reply.
+    last_seen: float = field(default_factory=time.monotonic)
+    last_active: float = field(default_factory=time.monotonic)
+    messages_sent: int = 0
+    bytes_sent: int = 0
+    messages_received: int = 0
+    # Monotonic time the oldest still pending send started.
+    blocked_since: Optional[float] = None
+
 
 class WebSocketManager:
-    """Manage connected WebSocket clients."""
+    """Manage connected WebSocket clients.
+
+    Every connection has a queue drained by its own writer task, so
+    messages reach each client in the order they were handed to the manager
+    and a slow client never delays the others.
+
+    Besides routing messages the manager enforces ``max_connections`` and,
+    once :meth:`start_reaper` was awaited, sends heartbeats to quiet
+    connections and closes connections that are dead (a send stuck for
+    ``dead_timeout`` seconds, or no heartbeat reply from a numbered client)
+    or idle (no client message other than heartbeats for ``idle_timeout``
+    seconds, if set).
+    """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        compress_threshold: int | None = None,
+        max_connections: int = 0,
+        heartbeat_interval: float = 20.0,
+        dead_timeout: float = 60.0,
+        idle_timeout: float = 0.0,
+    ) -> None:
         self._websockets: Set[WebSocket] = set()
+        self.subscriptions = SubscriptionIndex()
+        # Connections without subscriptions, which receive every update.
+        self._unfiltered: Set[WebSocket] = set()
+        # Connections that negotiated the binary subprotocol.
+        self._binary: Set[WebSocket] = set()
+        # Connections that asked for size-aware deflate frames.
+        self._compressed: Set[WebSocket] = set()
+        # Connections that receive numbered, typed snapshot messages.
+        self._sequenced: Set[WebSocket] = set()
+        if compress_threshold is None:
+            compress_threshold = int(
+                os.environ.get("MYTIMER_WS_COMPRESS_THRESHOLD", DEFAULT_THRESHOLD)
+            )
+        self.compressor = FrameCompressor(compress_threshold)
+        # Delivery accounting exported by ``/metrics``.
+        self.fanout_seconds = Histogram()
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        # Messages queued or being sent, per connection.
+        self._pending: Dict[WebSocket, int] = {}
+        self._queues: Dict[WebSocket, "asyncio.Queue[Tuple[Union[str, bytes], int]]"] = {}
+        self._writers: Dict[WebSocket, asyncio.Task[None]] = {}
+        self.connections: Dict[WebSocket, ConnectionStats] = {}
+        self.max_connections = max_connections
+        self.heartbeat_interval = heartbeat_interval
+        self.dead_timeout = dead_timeout
+        self.idle_timeout = idle_timeout
+        self.refused = 0
+        self.reaped: Dict[str, int] = {"dead": 0, "idle": 0}
+        self._reaper: Optional[asyncio.Task[None]] = None
+
+    async def connect(self, ws: WebSocket) -> bool:
+        """Accept and register a new WebSocket connection.
+
+        Clients offering :data:`binary_codec.SUBPROTOCOL` receive timer
+        messages as compact binary frames; everyone else gets JSON text.
+        Connecting with ``?compress=deflate`` deflates frames larger than the
+        compressor threshold, and ``?seq=1`` selects numbered messages.
 
-    async def connect(self, ws: WebSocket) -> None:
-        """Accept and register a new WebSocket connection."""
-        await ws.accept()
+        Returns ``False`` if the connection cap is reached; the client then
+        receives an error message and close code 1013.
+        """
+        if self.max_connections and len(self._websockets) >= self.max_connections:
+            self.refused += 1
+            await ws.accept()
+            with contextlib.suppress(Exception):
+                await ws.send_text(
+                    json.dumps({"type": "error", "detail": "Too many connections"})
+                )
+                await ws.close(code=CLOSE_TRY_AGAIN_LATER)
+            return False
+        if ws.query_params.get("compress") == "deflate":
+            self._compressed.add(ws)
+        if ws.query_params.get("seq") == "1":
+            self._sequenced.add(ws)
+        if binary_codec.SUBPROTOCOL in ws.scope.get("subprotocols", []):
+            await ws.accept(subprotocol=binary_codec.SUBPROTOCOL)
+            self._binary.add(ws)
+        else:
+            await ws.accept()
         self._websockets.add(ws)
+        self._unfiltered.add(ws)
+        client = ws.scope.get("client")
+        self.connections[ws] = ConnectionStats(
+            peer=f"{client[0]}:{client[1]}" if client else "unknown"
+        )
+        queue: asyncio.Queue[Tuple[Union[str, bytes], int]] = asyncio.Queue()
+        self._queues[ws] = queue
+        self._writers[ws] = asyncio.create_task(self._write_loop(ws, queue))
+        return True
 
     def disconnect(self, ws: WebSocket) -> None:
-        """Remove a WebSocket from the registry."""
+        """Remove a WebSocket from the registry and drop its unsent messages."""
         self._websockets.discard(ws)
+        self._unfiltered.discard(ws)
+        self.connections.pop(ws, None)
+        self._queues.pop(ws, None)
+        self._pending.pop(ws, None)
+        writer = self._writers.pop(ws, None)
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+        self._binary.discard(ws)
+        self._compressed.discard(ws)
+        self._sequenced.discard(ws)
+        self.subscriptions.remove(ws)
+
+    def subscribe(
+        self, ws: WebSocket, timers: Iterable[int] = (), statuses: Iterable[str] = ()
+    ) -> None:
+        """Add topics to ``ws``, see :meth:`SubscriptionIndex.subscribe`."""
+        self.subscriptions.subscribe(ws, timers, statuses)
+        self._unfiltered.discard(ws)
+
+    def unsubscribe(
+        self, ws: WebSocket, timers: Iterable[int] = (), statuses: Iterable[str] = ()
+    ) -> None:
+        """Remove topics from ``ws``, see :meth:`SubscriptionIndex.unsubscribe`."""
+        self.subscriptions.unsubscribe(ws, timers, statuses)
+        if ws in self._websockets and not self.subscriptions.is_filtered(ws):
+            self._unfiltered.add(ws)
+
+    def touch(self, ws: WebSocket, heartbeat: bool = False) -> None:
+        """Record that a message was received from ``ws``."""
+        stats = self.connections.get(ws)
+        if stats is not None:
+            stats.messages_received += 1
+            stats.last_seen = time.monotonic()
+            if not heartbeat:
+                stats.last_active = stats.last_seen
+
+    def connection_stats(self) -> List[Dict[str, Any]]:
+        """Return per-connection accounting for monitoring."""
+        now, wall = time.monotonic(), time.time()
+        return [
+            {
+                "peer": stats.peer,
+                "age": wall - stats.connected_at,
+                "idle": now - stats.last_active,
+                "last_seen": now - stats.last_seen,
+                "messages_sent": stats.messages_sent,
+                "bytes_sent": stats.bytes_sent,
+                "messages_received": stats.messages_received,
+                "queue_depth": self._pending.get(ws, 0),
+                "sequenced": ws in self._sequenced,
+                "binary": ws in self._binary,
+                "compressed": ws in self._compressed,
+            }
+            for ws, stats in self.connections.items()
+        ]
+
+    async def start_reaper(self) -> None:
+        """Start heartbeats and periodic reaping of dead or idle connections."""
+        if self._reaper is None and self.heartbeat_interval > 0:
+            self._reaper = asyncio.create_task(self._reap_loop())
+
+    async def stop_reaper(self) -> None:
+        """Stop the heartbeat task."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reaper
+            self._reaper = None
+
+    async def _reap_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            await self.reap()
+
+    async def reap(self, now: float | None = None) -> List[WebSocket]:
+        """Heartbeat quiet connections and close dead or idle ones.
+
+        Connections without ``?seq=1`` are not expected to answer heartbeats;
+        the heartbeat still exercises their socket, so a half-open one ends
+        up with a stuck send and is reaped for that.
+        """
+        now = time.monotonic() if now is None else now
+        doomed: List[Tuple[WebSocket, str]] = []
+        quiet: List[WebSocket] = []
+        for ws, stats in list(self.connections.items()):
+            blocked = stats.blocked_since is not None and now - stats.blocked_since > self.dead_timeout
+            silent = ws in self._sequenced and now - stats.last_seen > self.dead_timeout
+            if blocked or silent:
+                doomed.append((ws, "dead"))
+            elif self.idle_timeout and now - stats.last_active > self.idle_timeout:
+                doomed.append((ws, "idle"))
+            elif now - stats.last_seen >= self.heartbeat_interval:
+                quiet.append(ws)
+        for ws, reason in doomed:
+            self.reaped[reason] += 1
+            self.disconnect(ws)
+            with contextlib.suppress(Exception):
+                await asyncio.wait_for(ws.close(code=CLOSE_GOING_AWAY), 1.0)
+        if quiet:
+            self._deliver(quiet, {**HEARTBEAT_MESSAGE, "server_time": time.time()})
+        return [ws for ws, _ in doomed]
+
+    def is_sequenced(self, ws: WebSocket) -> bool:
+        """Return ``True`` if ``ws`` expects numbered snapshot messages."""
+        return ws in self._sequenced
+
+    async def send_snapshot(self, ws: WebSocket, data: Dict[Any, Any], seq: int) -> None:
+        """Send a snapshot to ``ws`` in the format it negotiated."""
+        self._deliver_snapshot([ws], data, seq)
+
+    def _deliver_snapshot(
+        self, targets: Iterable[WebSocket], data: Dict[Any, Any], seq: int
+    ) -> None:
+        legacy: List[WebSocket] = []
+        sequenced: List[WebSocket] = []
+        for ws in targets:
+            (sequenced if ws in self._sequenced else legacy).append(ws)
+        if legacy:
+            self._deliver(legacy, data)
+        if sequenced:
+            self._deliver(
+                sequenced,
+                {
+                    "type": "snapshot",
+                    "seq": seq,
+                    "server_time": time.time(),
+                    "timers": data,
+                },
+            )
+
+    def _encode(
+        self,
+        data: Any,
+        binary: bool,
+        compressed: bool,
+        cache: Dict[Tuple[bool, bool], Union[str, bytes]],
+    ) -> Union[str, bytes]:
+        key = (binary, compressed)
+        if key in cache:
+            return cache[key]
+        if compressed:
+            raw = self._encode(data, binary, False, cache)
+            message = self.compressor.compress(raw) or raw
+        elif binary:
+            message = binary_codec.encode_message(data) or self._encode(
+                data, False, False, cache
+            )
+        else:
+            message = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        cache[key] = message
+        return message
+
+    def _deliver(self, targets: Iterable[WebSocket], data: Any) -> None:
+        """Queue ``data`` for ``targets``, encoding it at most once per format."""
+        cache: Dict[Tuple[bool, bool], Union[str, bytes]] = {}
+        sizes: Dict[Tuple[bool, bool], int] = {}
+        start = time.perf_counter()
+        queued = False
+        for ws in targets:
+            if ws not in self._queues:
+                continue
+            key = (ws in self._binary, ws in self._compressed)
+            message = self._encode(data, key[0], key[1], cache)
+            size = sizes.get(key)
+            if size is None:
+                size = sizes[key] = (
+                    len(message) if isinstance(message, bytes) else len(message.encode("utf-8"))
+                )
+            self._enqueue(ws, message, size)
+            queued = True
+        if queued:
+            self.fanout_seconds.observe(time.perf_counter() - start)
+
+    def _enqueue(self, ws: WebSocket, message: Union[str, bytes], size: int) -> None:
+        queue = self._queues.get(ws)
+        if queue is None:
+            return
+        depth = self._pending.get(ws, 0)
+        self._pending[ws] = depth + 1
+        stats = self.connections.get(ws)
+        if stats is not None and not depth:
+            stats.blocked_since = time.monotonic()
+        queue.put_nowait((message, size))
+
+    async def _write_loop(
+        self, ws: WebSocket, queue: "asyncio.Queue[Tuple[Union[str, bytes], int]]"
+    ) -> None:
+        """Send the messages queued for ``ws`` one at a time, in order.
+
+        A send stuck for longer than ``dead_timeout`` is found by :meth:`reap`,
+        which closes the connection and cancels this task.
+        """
+        while True:
+            message, size = await queue.get()
+            try:
+                if isinstance(message, bytes):
+                    await ws.send_bytes(message)
+                else:
+                    await ws.send_text(message)
+            except Exception:
+                self.disconnect(ws)
+                return
+            self.messages_sent += 1
+            self.bytes_sent += size
+            stats = self.connections.get(ws)
+            if stats is not None:
+                stats.messages_sent += 1
+                stats.bytes_sent += size
+            depth = self._pending.get(ws, 1) - 1
+            if depth:
+                self._pending[ws] = depth
+                if stats is not None:
+                    stats.blocked_since = time.monotonic()
+            else:
+                self._pending.pop(ws, None)
+                if stats is not None:
+                    stats.blocked_since = None
+
+    def pending_sends(self) -> Tuple[int, int]:
+        """Return the total and the largest per-connection number of queued messages."""
+        return sum(self._pending.values()), max(self._pending.values(), default=0)
+
+    def publish(self, data: Any, timer_id: int, status: Optional[str]) -> None:
+        """Queue a single-timer update for clients interested in ``timer_id``.
+
+        Clients without subscriptions receive everything; subscribed clients
+        only receive updates for their timer ids or status classes.
+        ``status`` is ``None`` for removals of timers whose status is unknown.
+        Queuing does not wait, so callers can publish right after numbering
+        a change and messages keep the order of their sequence numbers.
+        """
+        if not self.subscriptions:
+            # Remember the status for clients that subscribe later.
+            self.subscriptions.note(((timer_id, status),))
+            self._deliver(list(self._websockets), data)
+            return
+        targets = self.subscriptions.recipients(timer_id, status)
+        targets &= self._websockets
+        self._deliver([*self._unfiltered, *targets], data)
+
+    async def publish_json(self, data: Any, timer_id: int, status: Optional[str]) -> None:
+        """Send a single-timer update, see :meth:`publish`."""
+        self.publish(data, timer_id, status)
+
+    def publish_snapshot(
+        self, data: Dict[int, Any], statuses: Iterable[Tuple[int, str]], seq: int = 0
+    ) -> None:
+        """Queue the full ``data`` snapshot, filtered per subscribed client.
+
+        Numbered clients receive ``{"type": "snapshot", "seq": ..., "timers":
+        ...}``; legacy clients receive the bare ``{timer_id: state}`` mapping.
+        """
+        if not self.subscriptions:
+            self.subscriptions.note(statuses)
+            self._deliver_snapshot(list(self._websockets), data, seq)
+            return
+        self._deliver_snapshot(list(self._unfiltered), data, seq)
+        for ws, timer_ids in self.subscriptions.route(statuses).items():
+            if ws in self._websockets:
+                self._deliver_snapshot([ws], {tid: data[tid] for tid in timer_ids}, seq)
+
+    async def broadcast_snapshot(
+        self, data: Dict[int, Any], statuses: Iterable[Tuple[int, str]], seq: int = 0
+    ) -> None:
+        """Send the full ``data`` snapshot, see :meth:`publish_snapshot`."""
+        self.publish_snapshot(data, statuses, seq)
 
     async def broadcast_json(self, data: Any) -> None:
         """Send ``data`` to all connected clients as JSON."""
-        for ws in list(self._websockets):
-            try:
-                await ws.send_json(data)
-            except WebSocketDisconnect:
-                self._websockets.discard(ws)
+        self._deliver(list(self._websockets), data)
 
     async def send_json(self, ws: WebSocket, data: Any) -> None:
         """Send ``data`` to a single ``ws`` connection as JSON."""
-        try:
-            await ws.send_json(data)
-        except WebSocketDisconnect:
-            self._websockets.discard(ws)
+        self._deliver([ws], data)
 
     async def broadcast_text(self, message: str) -> None:
         """Send a plain text ``message`` to all connected clients."""
+        size = len(message.encode("utf-8"))
         for ws in list(self._websockets):
-            try:
-                await ws.send_text(message)
-            except WebSocketDisconnect:
-                self._websockets.discard(ws)
+            self._enqueue(ws, message, size)
 
     async def send_text(self, ws: WebSocket, message: str) -> None:
         """Send a plain text ``message`` to a single ``ws`` connection."""
-        try:
-            await ws.send_text(message)
-        except WebSocketDisconnect:
-            self._websockets.discard(ws)
+        self._enqueue(ws, message, len(message.encode("utf-8")))
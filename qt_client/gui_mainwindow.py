@@ -32,7 +32,7 @@ class MainWindow(QtWidgets.QMainWindow):
         except Exception:
             return
         self.table.setRowCount(len(data))
-        now = time.time()
+        now = self.client.server_now()
         current_finished: set[str] = set()
         for row, (tid, info) in enumerate(sorted(data.items(), key=lambda x: int(x[0]))):
             tag = self.tags.get(str(tid), info.get("name", f"Timer {tid}"))
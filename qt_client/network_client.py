@@ -1,21 +1,84 @@
+import threading
 import time
 from typing import Any, Dict
 import requests
 
+from mytimer.client import local_socket
+from mytimer.core.clock_sync import ClockOffset
+
+# Delay before retrying a failed clock sync, doubled after each failure.
+CLOCK_RETRY_MIN = 5.0
+CLOCK_RETRY_MAX = 600.0
+
 
 class NetworkClient:
     """Simple REST client for the MyTimer server."""
 
-    def __init__(self, base_url: str = "http://127.0.0.1:8000") -> None:
+    def __init__(
+        self, base_url: str = "http://127.0.0.1:8000", clock_sync_interval: float = 60.0
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.session = requests.Session()
+        # Same-host servers are reached over their Unix socket when available.
+        self.unix_socket = local_socket.mount(self.session, self.base_url)
+        self.clock = ClockOffset()
+        self.clock_sync_interval = clock_sync_interval
+        self._clock_thread: threading.Thread | None = None
+        self._clock_retry_at = 0.0
+        self._clock_backoff = CLOCK_RETRY_MIN
+
+    def sync_clock(self, samples: int = 4) -> float:
+        """Estimate the server clock offset with ``/time`` pings and return it."""
+        for _ in range(samples):
+            t0 = time.time()
+            resp = self.session.get(f"{self.base_url}/time", params={"t0": t0}, timeout=5)
+            t3 = time.time()
+            resp.raise_for_status()
+            data = resp.json()
+            self.clock.add_sample(t0, data["t1"], data["t2"], t3)
+        return self.clock.offset
+
+    def server_now(self) -> float:
+        """Return the current time on the server clock."""
+        return self.clock.now()
+
+    def _refresh_clock(self) -> None:
+        """Start a background clock sync when the estimate is due for one.
+
+        ``list_timers`` runs on the GUI thread, so it never waits for
+        ``/time``; until the first sync finishes the local clock is used.
+        """
+        now = time.time()
+        updated = self.clock.updated_at
+        if updated is not None and now - updated < self.clock_sync_interval:
+            return
+        if now < self._clock_retry_at:
+            return
+        if self._clock_thread is not None and self._clock_thread.is_alive():
+            return
+        self._clock_thread = threading.Thread(
+            target=self._sync_clock_quietly, args=(4 if updated is None else 1,), daemon=True
+        )
+        self._clock_thread.start()
+
+    def _sync_clock_quietly(self, samples: int) -> None:
+        try:
+            self.sync_clock(samples)
+        except Exception:
+            # Keep the previous estimate (or the local clock) and back off,
+            # e.g. for servers without ``/time``.
+            self._clock_retry_at = time.time() + self._clock_backoff
+            self._clock_backoff = min(self._clock_backoff * 2, CLOCK_RETRY_MAX)
+        else:
+            self._clock_backoff = CLOCK_RETRY_MIN
 
     def list_timers(self) -> Dict[str, Any]:
         """Return timer state from the server with computed remaining time."""
         resp = self.session.get(f"{self.base_url}/timers", timeout=5)
         resp.raise_for_status()
         data = resp.json()
-        now = time.time()
+        self._refresh_clock()
+        now = self.server_now()
         for info in data.values():
             start = info.get("start_at")
             if start is not None:
@@ -0,0 +1,101 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from fastapi.testclient import TestClient
+
+from mytimer.client.sync_service import SyncService
+from mytimer.core import binary_codec
+from mytimer.server.api import app, manager, websockets
+
+client = TestClient(app)
+
+PAYLOAD = {
+    "duration": 5.0,
+    "remaining": 4.5,
+    "running": True,
+    "finished": False,
+    "created_at": 100.0,
+    "start_at": 99.5,
+}
+
+
+def setup_function(function):
+    manager.timers.clear()
+    manager._next_id = 1
+    websockets.clear()
+
+
+def test_snapshot_round_trip():
+    paused = dict(PAYLOAD, running=False, start_at=None)
+    frame = binary_codec.encode_message({1: PAYLOAD, 2: paused})
+    assert len(frame) == 13 + 2 * 37
+    assert binary_codec.decode_message(frame) == {"1": PAYLOAD, "2": paused}
+
+
+def test_update_and_remove_round_trip():
+    update = {"type": "update", "timer_id": "7", **PAYLOAD}
+    assert binary_codec.decode_message(binary_codec.encode_message(update)) == update
+    remove = {"type": "remove", "timer_id": "7"}
+    assert binary_codec.decode_message(binary_codec.encode_message(remove)) == remove
+
+
+def test_numbered_messages_keep_sequence():
+    update = {"type": "update", "timer_id": "7", "seq": 42, **PAYLOAD}
+    assert binary_codec.decode_message(binary_codec.encode_message(update)) == update
+    snapshot = {"type": "snapshot", "seq": 9, "timers": {"1": PAYLOAD}}
+    assert binary_codec.decode_message(binary_codec.encode_message(snapshot)) == snapshot
+
+
+def test_server_time_is_kept():
+    update = {"type": "update", "timer_id": "7", "seq": 3, "server_time": 1234.5, **PAYLOAD}
+    frame = binary_codec.encode_message(update)
+    assert len(frame) == 13 + 8 + 37
+    assert binary_codec.decode_message(frame) == update
+    remove = {"type": "remove", "timer_id": "7", "server_time": 1234.5}
+    assert binary_codec.decode_message(binary_codec.encode_message(remove)) == remove
+    snapshot = {"type": "snapshot", "seq": 9, "server_time": 1234.5, "timers": {"1": PAYLOAD}}
+    assert binary_codec.decode_message(binary_codec.encode_message(snapshot)) == snapshot
+
+
+def test_messages_with_unknown_fields_stay_json():
+    assert binary_codec.encode_message({"type": "update", "timer_id": "7", "tag": "x", **PAYLOAD}) is None
+    snapshot = {"type": "snapshot", "seq": 9, "timers": {"1": dict(PAYLOAD, tag="x")}}
+    assert binary_codec.encode_message(snapshot) is None
+    assert binary_codec.encode_message({"type": "snapshot", "seq": 9, "total": 3, "timers": {}}) is None
+
+
+def test_control_messages_stay_json():
+    assert binary_codec.encode_message({"type": "error", "detail": "x"}) is None
+    assert binary_codec.encode_message({"detail": "x"}) is None
+
+
+def test_websocket_negotiates_binary_subprotocol():
+    tid = client.post("/timers", params={"duration": 5}).json()["timer_id"]
+    with client.websocket_connect("/ws", subprotocols=[binary_codec.SUBPROTOCOL]) as ws:
+        assert ws.accepted_subprotocol == binary_codec.SUBPROTOCOL
+        snapshot = binary_codec.decode_message(ws.receive_bytes())
+        assert snapshot[str(tid)]["duration"] == 5
+        ws.send_text("not json")
+        assert ws.receive_json()["type"] == "error"
+
+
+def test_websocket_defaults_to_json():
+    client.post("/timers", params={"duration": 5})
+    with client.websocket_connect("/ws") as ws:
+        assert ws.accepted_subprotocol is None
+        assert "1" in ws.receive_json()
+
+
+def test_sync_service_decodes_binary_frames():
+    svc = SyncService("http://127.0.0.1:1", binary=True)
+    svc._handle_message(binary_codec.encode_message({3: PAYLOAD}))
+    assert svc.state["3"].remaining == pytest.approx(4.5)
+    update = {"type": "update", "timer_id": "3", **dict(PAYLOAD, remaining=2.0)}
+    svc._handle_message(binary_codec.encode_message(update))
+    assert svc.state["3"].remaining == pytest.approx(2.0)
+    svc._handle_message(binary_codec.encode_remove([3]))
+    assert "3" not in svc.state
@@ -0,0 +1,149 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from fastapi.testclient import TestClient
+
+from mytimer.client.sync_service import SyncService
+from mytimer.server.api import app, manager, websockets
+from mytimer.server.change_feed import ChangeFeed
+
+client = TestClient(app)
+
+
+def setup_function(function):
+    manager.timers.clear()
+    manager._next_id = 1
+    websockets.clear()
+
+
+def test_change_feed_tracks_versions():
+    feed = ChangeFeed()
+    assert feed.changes_since(0) == set()
+    feed.record(1)
+    feed.record(2, 1)
+    assert feed.version == 3
+    assert feed.changes_since(0) == {1, 2}
+    assert feed.changes_since(1) == {1, 2}
+    assert feed.changes_since(3) == set()
+    # future versions and foreign epochs require a snapshot
+    assert feed.changes_since(4) is None
+    assert feed.changes_since(0, epoch="other") is None
+
+
+def test_change_feed_evicted_history_requires_snapshot():
+    feed = ChangeFeed(history=2)
+    feed.record(1, 2, 3)
+    assert feed.changes_since(0) is None
+    assert feed.changes_since(1) == {2, 3}
+
+
+def test_change_feed_wait_wakes_on_record():
+    async def run():
+        feed = ChangeFeed()
+        waiter = asyncio.create_task(feed.wait(0, 5))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        feed.record(7)
+        await asyncio.wait_for(waiter, 1)
+
+    asyncio.run(run())
+
+
+def test_changes_endpoint_returns_delta():
+    resp = client.get("/timers")
+    version = int(resp.headers["X-Timer-Version"])
+    epoch = resp.headers["X-Timer-Epoch"]
+
+    tid = client.post("/timers", params={"duration": 5}).json()["timer_id"]
+    data = client.get(
+        "/timers/changes", params={"since": version, "epoch": epoch, "timeout": 0}
+    ).json()
+    assert not data["reset"]
+    assert list(data["timers"]) == [str(tid)]
+    assert data["timers"][str(tid)]["duration"] == 5
+
+    version = data["version"]
+    client.delete(f"/timers/{tid}")
+    data = client.get(
+        "/timers/changes", params={"since": version, "epoch": epoch, "timeout": 0}
+    ).json()
+    assert data["timers"] == {str(tid): None}
+
+
+def test_changes_endpoint_times_out_without_changes():
+    resp = client.get("/timers")
+    version = int(resp.headers["X-Timer-Version"])
+    start = time.monotonic()
+    data = client.get(
+        "/timers/changes", params={"since": version, "timeout": 0.2}
+    ).json()
+    assert time.monotonic() - start >= 0.2
+    assert data["timers"] == {}
+    assert data["version"] == version
+
+
+def test_changes_endpoint_unknown_epoch_returns_snapshot():
+    tid = client.post("/timers", params={"duration": 5}).json()["timer_id"]
+    data = client.get(
+        "/timers/changes", params={"since": 0, "epoch": "stale", "timeout": 0}
+    ).json()
+    assert data["reset"]
+    assert str(tid) in data["timers"]
+
+
+def test_changes_endpoint_rejects_negative_timeout():
+    resp = client.get("/timers/changes", params={"timeout": -1})
+    assert resp.status_code == 400
+
+
+@pytest.fixture()
+def server():
+    proc = subprocess.Popen(
+        ["uvicorn", "mytimer.server.api:app", "--host", "127.0.0.1", "--port", "8012"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    for _ in range(10):
+        try:
+            requests.get("http://127.0.0.1:8012/timers", timeout=1)
+            break
+        except Exception:
+            time.sleep(0.5)
+    else:
+        proc.terminate()
+        proc.wait()
+        raise RuntimeError("API server failed to start")
+    yield
+    proc.terminate()
+    proc.wait()
+
+
+@pytest.mark.asyncio
+async def test_sync_service_long_poll_transport(server):
+    svc = SyncService("http://127.0.0.1:8012", use_websocket=False, long_poll_timeout=5)
+    await svc.connect()
+    try:
+        assert not svc.local_mode
+        tid = await svc.create_timer(5)
+        for _ in range(20):
+            if str(tid) in svc.state:
+                break
+            await asyncio.sleep(0.05)
+        assert str(tid) in svc.state
+
+        await svc.remove_timer(tid)
+        for _ in range(20):
+            if str(tid) not in svc.state:
+                break
+            await asyncio.sleep(0.05)
+        assert str(tid) not in svc.state
+    finally:
+        await svc.close()
@@ -98,3 +98,42 @@ def test_cli_tui_consistency(start_server):
     else:
         pytest.fail("Timer row not found in TUI output")
 
+
+
+def test_stats_prints_engine_statistics(start_server):
+    run_cli("create", "5")
+    result = run_cli("stats")
+    data = json.loads(result.stdout)
+    assert data["enabled"] is True
+    assert "tick" in data["operations"]
+
+
+def test_export_and_import_round_trip(start_server, tmp_path):
+    run_cli("remove", "all")
+    run_cli("create", "30")
+    run_cli("create", "60")
+    path = tmp_path / "timers.ndjson"
+    assert run_cli("export", str(path)).stdout.strip() == "exported"
+    assert len(path.read_text().splitlines()) == 2
+    run_cli("remove", "all")
+    result = run_cli("import", str(path))
+    assert json.loads(result.stdout) == {"imported": 2, "errors": []}
+    durations = sorted(t["duration"] for t in requests.get(f"{BASE_URL}/timers").json().values())
+    assert durations == [30, 60]
+
+
+def test_list_filters_by_status(start_server):
+    run_cli("remove", "all")
+    first = int(run_cli("create", "30").stdout.strip())
+    second = int(run_cli("create", "30").stdout.strip())
+    run_cli("pause", str(second))
+    data = json.loads(run_cli("list", "paused").stdout.strip())
+    assert list(data) == [str(second)]
+    assert str(first) not in data
+
+
+def test_list_ndjson_streams_one_timer_per_line(start_server):
+    run_cli("remove", "all")
+    ids = {int(run_cli("create", "30").stdout.strip()) for _ in range(3)}
+    lines = run_cli("list", "--ndjson").stdout.splitlines()
+    assert {json.loads(line)["id"] for line in lines} == ids
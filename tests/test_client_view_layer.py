@@ -1,3 +1,4 @@
+import re
 import subprocess
 import sys
 import time
@@ -42,3 +43,18 @@ def test_client_view_once(start_server):
     assert result.returncode == 0
     assert str(timer_id) in result.stdout
     assert "Running:" in result.stdout
+
+
+def test_client_view_shows_one_page(start_server):
+    for _ in range(25):
+        requests.post("http://127.0.0.1:8003/timers", params={"duration": 60}, timeout=5)
+
+    result = subprocess.run(
+        [sys.executable, "-m", "mytimer.client.view_layer", "--once", "--url", "http://127.0.0.1:8003"],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0
+    assert "Page 1 (more: n)" in result.stdout
+    counts = re.search(r"Running: (\d+)  Paused: (\d+)  Finished: (\d+)", result.stdout)
+    assert sum(map(int, counts.groups())) == 20
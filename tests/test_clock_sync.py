@@ -0,0 +1,129 @@
+import asyncio
+import json
+import os
+import sys
+import time
+import types
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.client.sync_service import SyncService, TimerState
+from mytimer.core.clock_sync import ClockOffset
+from mytimer.server.api import app
+import qt_client.network_client as nc
+
+
+def test_offset_from_symmetric_exchange():
+    clock = ClockOffset()
+    # Server is 3 s ahead; 0.1 s each way.
+    assert clock.add_sample(100.0, 103.1, 103.2, 100.3) == pytest.approx(3.0)
+    assert clock.delay == pytest.approx(0.2)
+
+
+def test_prefers_low_delay_samples_and_smooths():
+    clock = ClockOffset(smoothing=0.5)
+    clock.add_sample(0.0, 3.05, 3.05, 0.1)
+    # A congested exchange with asymmetric delay is ignored in favour of the
+    # earlier low-delay sample.
+    clock.add_sample(10.0, 13.9, 13.9, 11.0)
+    assert clock.offset == pytest.approx(3.0)
+    with pytest.raises(ValueError):
+        clock.add_sample(0.0, 5.0, 6.0, 0.5)
+
+
+def test_timer_state_uses_server_clock():
+    state = TimerState(10, 10, True, False, 0.0, 1000.0)
+    assert state.remaining_now(1004.0) == pytest.approx(6.0)
+    clock = ClockOffset()
+    clock.add_sample(0.0, 3.0, 3.0, 0.0)
+    now = time.time()
+    state = TimerState(10, 10, True, False, now, now + 3.0, clock=clock)
+    assert state.remaining_now() == pytest.approx(10, abs=0.1)
+
+
+def test_server_answers_http_and_ws_pings():
+    client = TestClient(app)
+    before = time.time()
+    data = client.get("/time", params={"t0": 1.5}).json()
+    assert data["type"] == "pong" and data["t0"] == 1.5
+    assert before <= data["t1"] <= data["t2"] <= time.time()
+    with client.websocket_connect("/ws") as ws:
+        ws.send_text(json.dumps({"type": "ping", "t0": 2.5}))
+        reply = ws.receive_json()
+        assert reply["type"] == "pong" and reply["t0"] == 2.5
+        assert reply["t1"] <= reply["t2"]
+        ws.send_text(json.dumps({"type": "ping"}))
+        assert ws.receive_json()["type"] == "error"
+
+
+def test_sync_service_corrects_skew_from_pong():
+    svc = SyncService("http://127.0.0.1:9")
+    now = time.time()
+    svc._handle_data({"type": "pong", "t0": now - 0.2, "t1": now + 2.9, "t2": now + 2.9})
+    assert svc.clock.offset == pytest.approx(3.0, abs=0.05)
+    svc.state["1"] = TimerState(10, 10, True, False, now, now + 3.0)
+    assert svc.state["1"].remaining_now(svc.server_now()) == pytest.approx(10, abs=0.1)
+    asyncio.run(svc.client.aclose())
+
+
+def test_network_client_applies_offset():
+    server_offset = -5.0
+    start = time.time() + server_offset - 2
+
+    class Resp:
+        def __init__(self, data):
+            self.data = data
+
+        def json(self):
+            return self.data
+
+        def raise_for_status(self):
+            pass
+
+    def get(url, timeout, params=None):
+        if url.endswith("/time"):
+            server = time.time() + server_offset
+            return Resp({"t0": params["t0"], "t1": server, "t2": server})
+        return Resp({"1": {"duration": 10, "start_at": start}})
+
+    client = nc.NetworkClient("http://testserver")
+    client.session = types.SimpleNamespace(get=get)
+    client.list_timers()
+    # The offset is measured off the calling (GUI) thread.
+    client._clock_thread.join(5)
+    assert client.clock.offset == pytest.approx(server_offset, abs=0.05)
+    result = client.list_timers()
+    assert result["1"]["remaining"] == pytest.approx(8.0, abs=0.1)
+
+
+def test_network_client_backs_off_without_time_endpoint():
+    calls = []
+
+    class Resp:
+        def __init__(self, status, data=None):
+            self.status = status
+            self.data = data
+
+        def json(self):
+            return self.data
+
+        def raise_for_status(self):
+            if self.status != 200:
+                raise nc.requests.HTTPError(str(self.status))
+
+    def get(url, timeout, params=None):
+        if url.endswith("/time"):
+            calls.append(url)
+            return Resp(404)
+        return Resp(200, {})
+
+    client = nc.NetworkClient("http://testserver")
+    client.session = types.SimpleNamespace(get=get)
+    for _ in range(3):
+        client.list_timers()
+        client._clock_thread.join(5)
+    assert len(calls) == 1
+    assert client._clock_retry_at > time.time()
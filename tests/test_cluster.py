@@ -0,0 +1,263 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+import websockets
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.core.timer_manager import TimerManager
+from mytimer.server.change_feed import ChangeFeed
+from mytimer.server.cluster import ClusterHub, ClusterNode, TimerStore
+
+PORT = 8015
+BASE_URL = f"http://127.0.0.1:{PORT}"
+
+
+def test_store_round_trip_and_shared_ids(tmp_path):
+    db = tmp_path / "timers.db"
+    first, second = TimerStore(db), TimerStore(db)
+    assert [first.reserve_id(), second.reserve_id(), first.reserve_id()] == [1, 2, 3]
+
+    source = TimerManager()
+    source.id_allocator = first.reserve_id
+    tid = source.create_timer(10)
+    source.pause_timer(tid)
+    first.save(source, [tid])
+
+    target = TimerManager()
+    second.load(target)
+    assert target.timers[tid].duration == 10
+    assert not target.timers[tid].running
+    assert target._next_id == tid + 1
+
+    source.remove_timer(tid)
+    first.save(source, [tid])
+    second.load(target, [tid])
+    assert tid not in target.timers
+
+
+def test_store_keeps_concurrent_changes_to_one_timer(tmp_path):
+    db = tmp_path / "timers.db"
+    leader, worker = TimerStore(db), TimerStore(db)
+    ticking, pausing = TimerManager(), TimerManager()
+    ticking.id_allocator = leader.reserve_id
+    tid = ticking.create_timer(10)
+    leader.save(ticking, [tid])
+    worker.load(pausing)
+
+    # Both change the timer from the same state before seeing each other.
+    ticking.tick(3)
+    pausing.pause_timer(tid)
+    leader.save(ticking, [tid])
+    worker.save(pausing, [tid])
+
+    assert not pausing.timers[tid].running
+    assert pausing.timers[tid].remaining == pytest.approx(7, abs=0.1)
+    leader.load(ticking, [tid])
+    assert ticking.timers[tid] == pausing.timers[tid]
+
+
+def test_nodes_share_changes_and_promote_leader(tmp_path):
+    async def run():
+        hub = ClusterHub(str(tmp_path / "hub.sock"))
+        await hub.start()
+        received = asyncio.Queue()
+        promoted = asyncio.Event()
+
+        async def on_leader():
+            promoted.set()
+
+        def make_node(on_change):
+            return ClusterNode(
+                TimerManager(),
+                ChangeFeed(),
+                TimerStore(tmp_path / "timers.db"),
+                hub.path,
+                on_remote_change=on_change,
+                on_leader=on_leader,
+            )
+
+        a = make_node(lambda ids: None)
+        b = make_node(lambda ids: received.put_nowait(ids))
+        await a.start()
+        await b.start()
+        assert a.is_leader and not b.is_leader
+
+        tid = a.manager.create_timer(5)
+        a.change_feed.record(tid)
+        assert await asyncio.wait_for(received.get(), 1) == [tid]
+        assert b.manager.timers[tid].duration == 5
+
+        a.manager.remove_timer(tid)
+        a.change_feed.record(tid)
+        assert await asyncio.wait_for(received.get(), 1) == [tid]
+        assert tid not in b.manager.timers
+
+        await a.stop()
+        await asyncio.wait_for(promoted.wait(), 1)
+        assert b.is_leader
+        await b.stop()
+        await hub.stop()
+
+    asyncio.run(run())
+
+
+def _make_nodes(tmp_path, hub, count=2):
+    received = [asyncio.Queue() for _ in range(count)]
+
+    async def on_leader():
+        pass
+
+    return [
+        ClusterNode(
+            TimerManager(),
+            ChangeFeed(),
+            TimerStore(tmp_path / "timers.db"),
+            hub.path,
+            on_remote_change=queue.put_nowait,
+            on_leader=on_leader,
+        )
+        for queue in received
+    ], received
+
+
+def test_ticks_only_write_finished_timers(tmp_path):
+    async def run():
+        hub = ClusterHub(str(tmp_path / "hub.sock"))
+        await hub.start()
+        (a, b), (_, b_changes) = _make_nodes(tmp_path, hub)
+        await a.start()
+        await b.start()
+        short = a.manager.create_timer(2)
+        long = a.manager.create_timer(30)
+        a.change_feed.record(short, long)
+        await asyncio.wait_for(b_changes.get(), 1)
+        stored = a.store.read([long])[0][long]
+        start_at = b.manager.timers[long].start_at
+
+        await a.tick(3)
+        for _ in range(100):
+            if b.store.ticked == 3:
+                break
+            await asyncio.sleep(0.01)
+        # The running timer advanced on both workers but was not rewritten.
+        assert b.manager.timers[long].start_at == pytest.approx(start_at - 3)
+        assert a.manager.timers[long].start_at == pytest.approx(start_at - 3)
+        assert a.store.read([long])[0][long] == stored
+        # The timer that finished is written like any other change.
+        assert b.manager.timers[short].finished
+        for _ in range(100):
+            if a.store.read([short])[0][short][4]:
+                break
+            await asyncio.sleep(0.01)
+        assert a.store.read([short])[0][short][4] == 1
+
+        # A worker starting later derives the ticked start from the total.
+        (c,), _ = _make_nodes(tmp_path, hub, 1)
+        await c.start()
+        assert c.manager.timers[long].start_at == pytest.approx(start_at - 3)
+        for node in (a, b, c):
+            await node.stop()
+        await hub.stop()
+
+    asyncio.run(run())
+
+
+def test_nodes_reconnect_and_reload_after_hub_restart(tmp_path):
+    async def run():
+        hub = ClusterHub(str(tmp_path / "hub.sock"))
+        await hub.start()
+        (a, b), (_, b_changes) = _make_nodes(tmp_path, hub)
+        await a.start()
+        await b.start()
+        await hub.stop()
+        await asyncio.sleep(0.05)
+
+        # Written while the hub is gone, so the announcement is lost.
+        tid = a.manager.create_timer(5)
+        a.change_feed.record(tid)
+        await hub.start()
+        assert await asyncio.wait_for(b_changes.get(), 3) == [tid]
+        assert b.manager.timers[tid].duration == 5
+
+        # Announcements flow again once both are back.
+        a.manager.pause_timer(tid)
+        a.change_feed.record(tid)
+        await asyncio.wait_for(b_changes.get(), 1)
+        assert not b.manager.timers[tid].running
+        await a.stop()
+        await b.stop()
+        await hub.stop()
+
+    asyncio.run(run())
+
+
+@pytest.fixture()
+def cluster(tmp_path):
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "mytimer.server.cluster",
+            "--port",
+            str(PORT),
+            "--workers",
+            "2",
+            "--db",
+            str(tmp_path / "timers.db"),
+            "--socket",
+            str(tmp_path / "hub.sock"),
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    for _ in range(30):
+        try:
+            requests.get(f"{BASE_URL}/timers", timeout=1)
+            break
+        except Exception:
+            time.sleep(0.5)
+    else:
+        proc.terminate()
+        proc.wait()
+        raise RuntimeError("cluster failed to start")
+    # Give the second worker time to come up as well.
+    time.sleep(1.5)
+    yield
+    proc.terminate()
+    proc.wait(timeout=10)
+
+
+@pytest.mark.asyncio
+async def test_workers_fan_out_changes_from_each_other(cluster):
+    async with websockets.connect(f"ws://127.0.0.1:{PORT}/ws") as ws:
+        created = []
+        for _ in range(6):
+            # A fresh connection per request lets the kernel spread them
+            # across workers.
+            resp = requests.post(
+                f"{BASE_URL}/timers", params={"duration": 30}, headers={"Connection": "close"}
+            )
+            created.append(str(resp.json()["timer_id"]))
+        assert len(set(created)) == 6
+
+        seen = set()
+        deadline = time.time() + 5
+        while not seen.issuperset(created) and time.time() < deadline:
+            data = json.loads(await asyncio.wait_for(ws.recv(), 5))
+            if data.get("type") == "update":
+                seen.add(data["timer_id"])
+            elif data.get("type") is None:
+                seen.update(data)
+        assert seen.issuperset(created)
+
+    time.sleep(0.2)
+    for _ in range(4):
+        timers = requests.get(f"{BASE_URL}/timers", headers={"Connection": "close"}).json()
+        assert set(created) <= set(timers)
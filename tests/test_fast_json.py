@@ -0,0 +1,51 @@
+import json
+import os
+import sys
+
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.server.api import _timer_payload, app, manager, timer_json
+from mytimer.server.fast_json import TimerJSONCache
+
+
+def setup_function(function):
+    manager.timers.clear()
+    manager._next_id = 1
+
+
+def test_cached_body_matches_generic_encoding():
+    with TestClient(app) as client:
+        for duration in (5, 10):
+            client.post("/timers", params={"duration": duration})
+        body = client.get("/timers").content
+    expected = {str(tid): _timer_payload(t) for tid, t in manager.timers.items()}
+    assert json.loads(body) == expected
+
+
+def test_body_is_reused_until_a_timer_changes():
+    with TestClient(app) as client:
+        client.post("/timers", params={"duration": 30})
+        client.post("/timers", params={"duration": 30})
+        first = client.get("/timers").content
+        hits = timer_json.hits
+        assert client.get("/timers").content == first
+        assert timer_json.hits == hits + 1
+        client.post("/timers/2/pause")
+        data = client.get("/timers").json()
+    assert data["2"]["running"] is False
+    assert data["1"] == json.loads(first)["1"]
+
+
+def test_time_dependent_payloads_are_not_cached():
+    timers = {}
+    cache = TimerJSONCache(timers, lambda t: {"v": t["v"]}, lambda t: t["static"])
+    timers[1] = {"v": 1, "static": False}
+    timers[2] = {"v": 2, "static": True}
+    assert cache.body() == b'{"1":{"v":1},"2":{"v":2}}'
+    timers[1]["v"] = 5
+    timers[2]["v"] = 9  # mutated without invalidation: stays cached
+    assert cache.body() == b'{"1":{"v":5},"2":{"v":2}}'
+    cache.invalidate([2])
+    assert cache.body() == b'{"1":{"v":5},"2":{"v":9}}'
@@ -0,0 +1,66 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from fastapi.testclient import TestClient
+
+from mytimer.client.sync_service import SyncService
+from mytimer.core.frame_compression import (
+    FrameCompressor,
+    decompress_frame,
+    is_compressed,
+)
+from mytimer.server.api import app, manager, websockets, ws_manager
+
+client = TestClient(app)
+
+
+def setup_function(function):
+    manager.timers.clear()
+    manager._next_id = 1
+    websockets.clear()
+
+
+def test_small_frames_are_sent_raw():
+    comp = FrameCompressor(threshold=100)
+    assert comp.compress("x" * 10) is None
+    stats = comp.stats()
+    assert stats["frames"] == 1 and stats["attempts"] == 0
+
+
+def test_large_frames_round_trip():
+    comp = FrameCompressor(threshold=100)
+    text = json.dumps({str(i): {"duration": 5, "running": True} for i in range(50)})
+    frame = comp.compress(text)
+    assert is_compressed(frame)
+    assert decompress_frame(frame) == text
+    assert comp.compress(b"\x01" * 500) is not None
+    stats = comp.stats()
+    assert stats["compressed_frames"] == 2
+    assert stats["ratio"] < 0.5
+    assert stats["cpu_seconds_per_frame"] >= 0
+
+
+def test_websocket_compresses_large_snapshots():
+    for _ in range(40):
+        manager.create_timer(5)
+    with client.websocket_connect("/ws?compress=deflate") as ws:
+        frame = ws.receive_bytes()
+        assert is_compressed(frame)
+        assert len(json.loads(decompress_frame(frame))) == 40
+        ws.send_text("not json")
+        # small control messages stay plain text
+        assert ws.receive_json()["type"] == "error"
+    stats = client.get("/ws/stats").json()["compression"]
+    assert stats["compressed_frames"] >= 1
+    assert stats["threshold"] == ws_manager.compressor.threshold
+
+
+def test_sync_service_inflates_frames():
+    svc = SyncService("http://127.0.0.1:1")
+    comp = FrameCompressor(threshold=1)
+    snapshot = {"1": {"duration": 5, "remaining": 5, "running": True, "finished": False}}
+    svc._handle_message(comp.compress(json.dumps(snapshot)))
+    assert svc.state["1"].duration == 5
@@ -0,0 +1,164 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+import requests
+import websockets
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.server.change_feed import ChangeFeed
+from mytimer.server.handoff import Handoff
+
+PORT = 8019
+BASE_URL = f"http://127.0.0.1:{PORT}"
+WS_URL = f"ws://127.0.0.1:{PORT}/ws"
+
+
+def launch(control, takeover=False, state_file=None):
+    cmd = [sys.executable, "-m", "mytimer.server.handoff", "--port", str(PORT),
+           "--control", control, "--graceful-timeout", "2"]
+    if takeover:
+        cmd.append("--takeover")
+    env = os.environ.copy()
+    env["MYTIMER_LOOP_LAG_THRESHOLD"] = "0"
+    if state_file is not None:
+        env["MYTIMER_STATE_FILE"] = state_file
+    return subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def reachable():
+    try:
+        requests.get(f"{BASE_URL}/status", timeout=0.5)
+        return True
+    except requests.RequestException:
+        return False
+
+
+@pytest.fixture
+def server(tmp_path):
+    control = str(tmp_path / "control.sock")
+    proc = launch(control)
+    if not wait_until(lambda: reachable() and os.path.exists(control)):
+        proc.terminate()
+        raise RuntimeError("API server failed to start")
+    procs = [proc]
+    yield control, procs
+    for p in procs:
+        p.terminate()
+        p.wait()
+
+
+def test_change_feed_continues_in_another_instance():
+    old = ChangeFeed(history=3)
+    for tid in (1, 2, 3, 4):
+        old.record(tid)
+    new = ChangeFeed(history=3)
+    new.restore(old.export())
+    assert (new.epoch, new.version) == (old.epoch, 4)
+    assert new.changes_since(2, old.epoch) == {3, 4}
+    assert new.changes_since(0, old.epoch) is None
+    assert new.record(5) == 5
+
+
+@pytest.mark.asyncio
+async def test_reload_keeps_port_state_and_resume(server):
+    control, procs = server
+    for duration in (30, 60, 90):
+        requests.post(f"{BASE_URL}/timers", params={"duration": duration})
+    before = requests.get(f"{BASE_URL}/timers").json()
+
+    failures = []
+    stop = threading.Event()
+
+    def hammer():
+        while not stop.is_set():
+            try:
+                requests.get(f"{BASE_URL}/status", timeout=5).raise_for_status()
+            except requests.RequestException as exc:
+                failures.append(exc)
+
+    ws = await websockets.connect(f"{WS_URL}?seq=1")
+    hello = json.loads(await ws.recv())
+    await ws.recv()  # snapshot
+    thread = threading.Thread(target=hammer)
+    thread.start()
+    try:
+        new = launch(control, takeover=True)
+        procs.append(new)
+        with pytest.raises(websockets.ConnectionClosed) as closed:
+            while True:
+                await ws.recv()
+        assert closed.value.rcvd.code == 1012
+        assert await_exit(procs[0])
+    finally:
+        stop.set()
+        thread.join()
+    assert failures == []
+    assert new.poll() is None
+    assert requests.get(f"{BASE_URL}/timers").json() == before
+
+    url = f"{WS_URL}?seq=1&since={hello['seq']}&epoch={hello['epoch']}"
+    async with websockets.connect(url) as ws:
+        assert json.loads(await ws.recv())["resumed"] is True
+    created = requests.post(f"{BASE_URL}/timers", params={"duration": 5}).json()
+    assert created["timer_id"] == 4
+
+
+def await_exit(proc, timeout=10.0):
+    return wait_until(lambda: proc.poll() is not None, timeout)
+
+
+def test_replaced_server_leaves_the_state_file_to_its_successor(tmp_path):
+    control = str(tmp_path / "control.sock")
+    state_file = str(tmp_path / "state.json")
+    old = launch(control, state_file=state_file)
+    procs = [old]
+    try:
+        assert wait_until(lambda: reachable() and os.path.exists(control))
+        requests.post(f"{BASE_URL}/timers", params={"duration": 30})
+        procs.append(launch(control, takeover=True, state_file=state_file))
+        assert await_exit(old)
+        # The old process exited without writing over the new one's state.
+        assert not os.path.exists(state_file)
+        requests.post(f"{BASE_URL}/timers", params={"duration": 60})
+    finally:
+        for p in procs:
+            p.terminate()
+            p.wait()
+    with open(state_file, encoding="utf-8") as f:
+        assert len(json.load(f)["timers"]) == 2
+
+
+def test_failed_takeover_resumes_old_server(server):
+    control, procs = server
+    requests.post(f"{BASE_URL}/timers", params={"duration": 30})
+    successor = Handoff()
+    listener = successor.take_over(control)
+    listener.close()
+    successor._predecessor.sendall(b'{"op": "state"}\n')
+    state = json.loads(successor._reader.readline())
+    assert list(state["timers"]["timers"]) == ["1"]
+    frozen = requests.post(f"{BASE_URL}/timers", params={"duration": 30})
+    assert frozen.status_code == 503
+    assert requests.get(f"{BASE_URL}/timers").status_code == 200
+    # The successor dies before reporting ready.
+    successor._reader.close()
+    successor._predecessor.close()
+    assert wait_until(
+        lambda: requests.post(f"{BASE_URL}/timers", params={"duration": 30}).status_code == 200
+    )
+    assert procs[0].poll() is None
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.client.sync_service import SyncService
+from mytimer.core.loop_monitor import LoopLagMonitor
+from mytimer.server.api import app
+
+
+def blocking_callback():
+    time.sleep(0.4)
+
+
+def test_monitor_records_lag_and_logs_blocking_stack(caplog):
+    async def run():
+        monitor = LoopLagMonitor(interval=0.02, threshold=0.1)
+        await monitor.start()
+        await asyncio.sleep(0.1)
+        blocking_callback()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+        return monitor
+
+    with caplog.at_level(logging.WARNING, logger="mytimer.loop"):
+        monitor = asyncio.run(run())
+    assert monitor.stalls == 1
+    assert monitor.max_lag >= 0.3
+    assert monitor.histogram.count >= 3
+    assert "blocking_callback" in caplog.text
+
+
+def test_monitor_quiet_loop_has_no_stalls():
+    async def run():
+        monitor = LoopLagMonitor(interval=0.02, threshold=0.1)
+        await monitor.start()
+        await asyncio.sleep(0.2)
+        await monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(run())
+    assert monitor.stalls == 0
+    assert monitor.histogram.count > 0
+
+
+def test_sync_service_runs_optional_monitor(tmp_path):
+    async def run():
+        svc = SyncService(
+            "http://127.0.0.1:9",
+            storage_path=tmp_path / "timers.json",
+            monitor_loop=True,
+        )
+        await svc.connect()
+        await asyncio.sleep(0.25)
+        await svc.close()
+        return svc
+
+    svc = asyncio.run(run())
+    assert svc.loop_monitor.histogram.count > 0
+    assert svc.loop_monitor._task is None
+
+
+def test_metrics_export_loop_lag():
+    text = TestClient(app).get("/metrics").text
+    assert "# TYPE mytimer_event_loop_lag_seconds histogram" in text
+    assert "mytimer_event_loop_stalls_total" in text
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.server.api import app, engine_stats, manager
+from mytimer.server.metrics import Histogram, MetricsRegistry, histogram_lines
+
+
+def setup_function(function):
+    manager.timers.clear()
+    manager._next_id = 1
+
+
+def sample(text, name):
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{name} not found")
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        hist.observe(value)
+    lines = histogram_lines("x", "help", [({}, hist)])
+    assert 'x_bucket{le="0.1"} 2' in lines
+    assert 'x_bucket{le="1.0"} 3' in lines
+    assert 'x_bucket{le="+Inf"} 4' in lines
+    assert "x_count 4" in lines
+
+
+def test_registry_counts_requests_per_route():
+    registry = MetricsRegistry()
+    registry.preallocate(["/timers"])
+    registry.observe_request("/timers", "GET", 200, 0.002)
+    registry.observe_request("/timers", "GET", 200, 0.004)
+    text = registry.render()
+    assert 'mytimer_http_requests_total{route="/timers",method="GET",status="200"} 2' in text
+    assert 'mytimer_http_request_duration_seconds_count{route="/timers"} 2' in text
+
+
+def test_metrics_endpoint_reports_routes_and_timers():
+    client = TestClient(app)
+    client.post("/timers", params={"duration": 5})
+    client.post("/timers", params={"duration": 5})
+    client.post("/timers/2/pause")
+    client.get("/timers/99/pause")
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = resp.text
+    assert (
+        'mytimer_http_requests_total{route="/timers",method="POST",status="200"}' in text
+    )
+    assert 'route="/timers/{timer_id}/pause"' in text
+    assert sample(text, 'mytimer_timers{state="running"}') == 1
+    assert sample(text, 'mytimer_timers{state="paused"}') == 1
+    assert sample(text, "mytimer_websocket_connections") == 0
+
+
+def test_finish_lateness_and_websocket_bytes_recorded():
+    client = TestClient(app)
+    before = engine_stats.finish_lateness.count
+    tid = manager.create_timer(1)
+    manager.timers[tid].start_at = time.time() - 1.5
+    manager.reschedule(tid)
+
+    async def expire():
+        return manager.expire_due()
+
+    assert asyncio.run(expire()) == [tid]
+    assert engine_stats.finish_lateness.count == before + 1
+    assert engine_stats.finish_lateness.sum >= 0.5
+
+    with client.websocket_connect("/ws") as ws:
+        client.post("/timers", params={"duration": 3})
+        ws.receive_json()
+        text = client.get("/metrics").text
+        assert sample(text, "mytimer_websocket_connections") == 1
+        assert sample(text, "mytimer_websocket_bytes_sent_total") > 0
+        assert sample(text, "mytimer_websocket_fanout_duration_seconds_count") >= 1
+
+
+def test_debug_engine_endpoint_dumps_operation_stats():
+    client = TestClient(app)
+    client.post("/timers", params={"duration": 5})
+    client.post("/timers/1/pause")
+    data = client.get("/debug/engine").json()
+    assert data["enabled"] is True
+    assert data["operations"]["pause_timer"]["count"] >= 1
+    assert "+Inf" in data["finish_lateness"]["buckets"]
+    text = client.get("/metrics").text
+    assert 'mytimer_engine_operation_duration_seconds_count{operation="pause_timer"}' in text
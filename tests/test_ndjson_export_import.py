@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.server import api, ndjson
+from mytimer.server.api import app, manager
+from mytimer.server.rate_limit import TimerQuota
+
+
+def setup_function(function):
+    manager.timers.clear()
+    manager._next_id = 1
+
+
+def test_export_streams_one_line_per_timer():
+    with TestClient(app) as client:
+        for duration in (5, 10, 15):
+            client.post("/timers", params={"duration": duration})
+        client.post("/timers/2/pause")
+        resp = client.get("/timers/export")
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["id"] for r in records] == [1, 2, 3]
+    assert [r["duration"] for r in records] == [5, 10, 15]
+    assert records[1]["running"] is False
+
+
+def test_import_round_trip_preserves_ids():
+    with TestClient(app) as client:
+        for duration in (5, 10):
+            client.post("/timers", params={"duration": duration})
+        exported = client.get("/timers/export").content
+        client.delete("/timers")
+        resp = client.post(
+            "/timers/import", params={"preserve_ids": True}, content=exported
+        )
+        assert resp.json() == {"imported": 2, "errors": []}
+        assert set(client.get("/timers").json()) == {"1", "2"}
+        # New timers are numbered after the imported ids.
+        assert client.post("/timers", params={"duration": 1}).json()["timer_id"] == 3
+
+
+def test_import_assigns_new_ids_and_reports_bad_lines():
+    body = b'{"id": 7, "duration": 30}\n\nnot json\n{"remaining": 3}\n{"duration": 20, "running": false}'
+    with TestClient(app) as client:
+        client.post("/timers", params={"duration": 5})
+        resp = client.post("/timers/import", content=body)
+        data = resp.json()
+        assert data["imported"] == 2
+        assert [e["line"] for e in data["errors"]] == [3, 4]
+        timers = client.get("/timers").json()
+    assert set(timers) == {"1", "2", "3"}
+    assert timers["2"]["running"] is True
+    assert timers["3"]["running"] is False
+
+
+def test_import_rejects_non_finite_and_out_of_range_values():
+    body = b"\n".join(
+        [
+            b'{"duration": NaN}',
+            b'{"duration": Infinity}',
+            b'{"duration": 1e400}',
+            b'{"duration": -5}',
+            b'{"duration": 10, "remaining": -1}',
+            b'{"duration": 10, "remaining": 11}',
+            b'{"duration": 10, "start_at": NaN}',
+            b'{"duration": 10, "remaining": 4}',
+        ]
+    )
+    with TestClient(app) as client:
+        data = client.post("/timers/import", content=body).json()
+        assert data["imported"] == 1
+        assert [e["line"] for e in data["errors"]] == [1, 2, 3, 4, 5, 6, 7]
+        resp = client.get("/timers")
+    assert resp.status_code == 200
+    assert resp.json()["1"]["duration"] == 10
+
+
+def test_import_counts_against_timer_quota(monkeypatch):
+    quota = TimerQuota(2, manager.timers)
+    monkeypatch.setattr(api, "timer_quota", quota)
+    lines = [{"duration": 30}, {"duration": 5, "finished": True, "remaining": 0},
+             {"duration": 60}, {"duration": 90}]
+    body = "\n".join(json.dumps(line) for line in lines).encode()
+    with TestClient(app) as client:
+        client.post("/timers", params={"duration": 10})
+        resp = client.post("/timers/import", content=body)
+    assert resp.json() == {"imported": 2, "errors": [], "over_quota": 2}
+    owner = next(iter(quota.owners().values()))
+    assert quota.owners() == {1: owner, 2: owner, 3: owner}
+    assert quota.count(owner) == 2
+
+
+def test_import_sends_single_broadcast():
+    lines = b"".join(b'{"duration": %d}\n' % (i + 1) for i in range(2500))
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws") as ws:
+            resp = client.post("/timers/import", content=lines)
+            assert resp.json()["imported"] == 2500
+            state = ws.receive_json()
+            assert len(state) == 2500
+    assert len(manager.timers) == 2500
+
+
+def test_iter_lines_handles_split_chunks():
+    async def chunks():
+        for part in (b'{"a"', b':1}\n{"b":', b"2}\n", b'{"c":3}'):
+            yield part
+
+    async def collect():
+        return [item async for item in ndjson.iter_lines(chunks())]
+
+    assert asyncio.run(collect()) == [
+        (1, b'{"a":1}'),
+        (2, b'{"b":2}'),
+        (3, b'{"c":3}'),
+    ]
+
+
+def test_iter_lines_rejects_unbounded_line():
+    async def chunks():
+        yield b"x" * (ndjson.MAX_LINE_BYTES + 1)
+
+    async def collect():
+        return [item async for item in ndjson.iter_lines(chunks())]
+
+    with pytest.raises(ValueError):
+        asyncio.run(collect())
@@ -0,0 +1,64 @@
+import io
+import marshal
+import os
+import pstats
+import sys
+
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.server.api import admin_auth, app
+
+TOKEN = "profile-test-token"
+admin_auth.register_device(TOKEN)
+HEADERS = {"X-Auth-Token": TOKEN}
+
+
+def test_profile_requires_admin_token():
+    client = TestClient(app)
+    assert client.post("/debug/profile", params={"seconds": 0.1}).status_code == 401
+    resp = client.post(
+        "/debug/profile", params={"seconds": 0.1}, headers={"X-Auth-Token": "nope"}
+    )
+    assert resp.status_code == 401
+
+
+def test_profile_rejects_invalid_arguments():
+    client = TestClient(app)
+    resp = client.post("/debug/profile", params={"seconds": 0}, headers=HEADERS)
+    assert resp.status_code == 400
+    resp = client.post(
+        "/debug/profile", params={"seconds": 0.1, "format": "svg"}, headers=HEADERS
+    )
+    assert resp.status_code == 400
+
+
+def test_profile_text_and_pstats_output(tmp_path):
+    client = TestClient(app)
+    resp = client.post("/debug/profile", params={"seconds": 0.1}, headers=HEADERS)
+    assert resp.status_code == 200
+    assert "function calls" in resp.text
+
+    resp = client.post(
+        "/debug/profile", params={"seconds": 0.1, "format": "pstats"}, headers=HEADERS
+    )
+    assert resp.headers["content-type"] == "application/octet-stream"
+    assert isinstance(marshal.loads(resp.content), dict)
+    path = tmp_path / "mytimer.prof"
+    path.write_bytes(resp.content)
+    stats = pstats.Stats(str(path), stream=io.StringIO())
+    assert stats.total_calls > 0
+
+
+def test_profile_collapsed_stacks():
+    client = TestClient(app)
+    resp = client.post(
+        "/debug/profile", params={"seconds": 0.2, "format": "collapsed"}, headers=HEADERS
+    )
+    assert resp.status_code == 200
+    lines = resp.text.strip().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert "asyncio.base_events:run_forever" in stack
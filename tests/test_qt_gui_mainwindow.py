@@ -17,6 +17,9 @@ class DummyClient:
     def list_timers(self):
         return self.data
 
+    def server_now(self):
+        return time.time()
+
     def create_timer(self, dur):
         self.created.append(dur)
         return '1'
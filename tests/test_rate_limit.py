@@ -0,0 +1,129 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.core.timer_manager import TimerManager
+from mytimer.server.rate_limit import RateLimiter, TimerQuota, client_key
+
+PORT = 8016
+BASE_URL = f"http://127.0.0.1:{PORT}"
+
+
+def test_token_bucket_refills_over_time():
+    limiter = RateLimiter(rate=2, burst=3)
+    assert [limiter.acquire("a", now=0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("a", now=0.0) == pytest.approx(0.5)
+    assert limiter.acquire("b", now=0.0) == 0.0
+    assert limiter.acquire("a", now=0.5) == 0.0
+    assert limiter.acquire("a", cost=2, now=0.5) == pytest.approx(1.0)
+
+
+def test_limiter_evicts_least_recent_clients():
+    limiter = RateLimiter(rate=1, burst=1, max_clients=2)
+    limiter.acquire("a", now=0.0)
+    limiter.acquire("b", now=0.0)
+    limiter.acquire("c", now=0.0)
+    # ``a`` was evicted and starts with a full bucket again.
+    assert limiter.acquire("a", now=0.0) == 0.0
+    assert limiter.acquire("c", now=0.0) == pytest.approx(1.0)
+
+
+def test_quota_counts_unfinished_timers():
+    manager = TimerManager()
+    quota = TimerQuota(2, manager.timers)
+    first = manager.create_timer(10)
+    second = manager.create_timer(20)
+    quota.assign(first, "ip:1")
+    quota.assign(second, "ip:1")
+    start = manager.timers[first].start_at
+    assert quota.retry_after("ip:1", now=start + 4) == pytest.approx(6)
+    assert quota.retry_after("ip:2") is None
+    manager.expire_due(now=start + 11)
+    assert quota.retry_after("ip:1", now=start + 11) is None
+    manager.remove_timer(second)
+    assert quota.count("ip:1") == 0
+
+
+def test_quota_tracks_refreshed_timers_without_rescanning():
+    manager = TimerManager()
+    quota = TimerQuota(1, manager.timers)
+    ids = [manager.create_timer(10) for _ in range(3)]
+    for tid in ids:
+        quota.assign(tid, "ip:1")
+        manager.timers[tid].finished = True
+        quota.refresh([tid])
+    assert quota._active == {}
+    assert quota.retry_after("ip:1") is None
+    # ``reset_all`` makes finished timers count again.
+    manager.timers[ids[0]].finished = False
+    quota.refresh(ids)
+    assert quota.count("ip:1") == 1
+    manager.remove_timer(ids[0])
+    quota.refresh(ids[:1])
+    assert quota.owners() == {ids[1]: "ip:1", ids[2]: "ip:1"}
+
+
+def test_client_key_prefers_registered_tokens():
+    scope = {"headers": [(b"x-auth-token", b"abc")], "client": ("10.0.0.1", 1234)}
+    assert client_key(scope, lambda token: token == "abc") == "device:abc"
+    assert client_key(scope, lambda token: False) == "ip:10.0.0.1"
+
+
+@pytest.fixture()
+def limited_server():
+    env = os.environ.copy()
+    env.update(
+        {
+            "MYTIMER_RATE_LIMIT": "2",
+            "MYTIMER_RATE_BURST": "6",
+            "MYTIMER_MAX_TIMERS_PER_CLIENT": "2",
+            "MYTIMER_ADMIN_TOKEN": "admin",
+        }
+    )
+    proc = subprocess.Popen(
+        ["uvicorn", "mytimer.server.api:app", "--host", "127.0.0.1", "--port", str(PORT)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+    )
+    for _ in range(10):
+        try:
+            requests.get(f"{BASE_URL}/status", timeout=1)
+            break
+        except Exception:
+            time.sleep(0.5)
+    else:
+        proc.terminate()
+        proc.wait()
+        raise RuntimeError("API server failed to start")
+    time.sleep(3)  # refill the bucket used by the startup probe
+    yield
+    proc.terminate()
+    proc.wait()
+
+
+def test_server_enforces_quota_and_rate_limit(limited_server):
+    assert requests.post(f"{BASE_URL}/timers", params={"duration": 30}).status_code == 200
+    assert requests.post(f"{BASE_URL}/timers", params={"duration": 30}).status_code == 200
+    resp = requests.post(f"{BASE_URL}/timers", params={"duration": 30})
+    assert resp.status_code == 429
+    assert 25 <= int(resp.headers["Retry-After"]) <= 30
+
+    # A registered device has its own quota and bucket.
+    token = requests.post(f"{BASE_URL}/devices", headers={"X-Auth-Token": "admin"}).json()["token"]
+    device = {"X-Auth-Token": token}
+    assert requests.post(f"{BASE_URL}/timers", params={"duration": 5}, headers=device).status_code == 200
+
+    # /tick costs five tokens, so the anonymous bucket runs dry quickly.
+    statuses = [requests.post(f"{BASE_URL}/tick", params={"seconds": 0}).status_code for _ in range(3)]
+    assert 429 in statuses
+    limited = requests.post(f"{BASE_URL}/tick", params={"seconds": 0})
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+    assert requests.get(f"{BASE_URL}/timers", headers=device).status_code == 200
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+import websockets
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.core.timer_manager import Timer, TimerManager
+from mytimer.server.change_feed import ChangeFeed
+from mytimer.server.relay import RelayFollower, upstream_urls
+
+ORIGIN, EDGE, LEAF = 8023, 8024, 8025
+
+
+def url(port):
+    return f"http://127.0.0.1:{port}"
+
+
+def launch(cmd, port):
+    env = os.environ.copy()
+    env["MYTIMER_LOOP_LAG_THRESHOLD"] = "0"
+    for name in ("MYTIMER_RELAY_FROM", "MYTIMER_REPLICATE_FROM", "MYTIMER_REPLICATION_LISTEN"):
+        env.pop(name, None)
+    return subprocess.Popen(
+        [*cmd, "--host", "127.0.0.1", "--port", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def relay(upstream, port):
+    return launch([sys.executable, "-m", "mytimer.server.relay", "--upstream", upstream], port)
+
+
+def wait_until(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if predicate():
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    return False
+
+
+def status(port):
+    return requests.get(f"{url(port)}/replication", timeout=2).json()
+
+
+@pytest.fixture(scope="module")
+def chain():
+    procs = [launch(["uvicorn", "mytimer.server.api:app"], ORIGIN)]
+    try:
+        if not wait_until(lambda: requests.get(f"{url(ORIGIN)}/status").ok):
+            raise RuntimeError("origin failed to start")
+        procs.append(relay(url(ORIGIN), EDGE))
+        procs.append(relay(f"ws://127.0.0.1:{EDGE}/ws", LEAF))
+        for port in (EDGE, LEAF):
+            if not wait_until(lambda: status(port).get("connected")):
+                raise RuntimeError("relay failed to connect")
+        yield procs
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+
+
+def test_upstream_urls():
+    assert upstream_urls("http://origin:8000") == ("ws://origin:8000/ws", "http://origin:8000")
+    assert upstream_urls("wss://edge/api/ws") == ("wss://edge/api/ws", "https://edge/api")
+    with pytest.raises(ValueError):
+        upstream_urls("origin:8000")
+
+
+def test_stale_updates_after_a_newer_snapshot_are_ignored():
+    manager, feed = TimerManager(), ChangeFeed()
+    changes = []
+    follower = RelayFollower(manager, feed, "http://origin:8000", lambda: None,
+                             lambda seq, ids: changes.append((seq, ids)))
+    timer = Timer(duration=30, remaining=30, running=False).to_dict()
+    follower._apply({"type": "hello", "epoch": "e", "seq": 1, "resumed": False})
+    follower._apply({"type": "snapshot", "seq": 1, "timers": {"1": timer}})
+    ticked = {**timer, "remaining": 29}
+    follower._apply({"type": "snapshot", "seq": 3, "timers": {"1": ticked}})
+    # ``/tick`` sends its per-timer updates after the broadcast snapshot.
+    follower._apply({"type": "update", "timer_id": "1", "seq": 2, **timer})
+    follower._apply({"type": "update", "timer_id": "1", "seq": 3, **ticked})
+    assert (feed.epoch, feed.version) == ("e", 3)
+    assert manager.timers[1].remaining == 29
+    assert changes == [(3, [1])]
+
+
+def test_updates_arriving_out_of_order_are_applied():
+    manager, feed = TimerManager(), ChangeFeed()
+    follower = RelayFollower(manager, feed, "http://origin:8000", lambda: None,
+                             lambda seq, ids: None)
+    running = Timer(duration=30, remaining=30, running=True).to_dict()
+    paused = {**running, "running": False, "start_at": None}
+    follower._apply({"type": "hello", "epoch": "e", "seq": 4, "resumed": False})
+    follower._apply({"type": "snapshot", "seq": 4, "timers": {"1": running, "2": running}})
+    # Concurrent pauses: timer 2's update (seq 6) overtakes timer 1's (seq 5).
+    follower._apply({"type": "update", "timer_id": "2", "seq": 6, **paused})
+    follower._apply({"type": "update", "timer_id": "1", "seq": 5, **paused})
+    assert not manager.timers[1].running and not manager.timers[2].running
+    assert feed.version == 6
+    assert feed.changes_since(5) == {1, 2}
+    # A removal is not undone by an older update arriving after it.
+    follower._apply({"type": "remove", "timer_id": "1", "seq": 8})
+    follower._apply({"type": "update", "timer_id": "1", "seq": 7, **running})
+    assert 1 not in manager.timers
+
+
+@pytest.mark.asyncio
+async def test_chained_relays_fan_out_one_upstream_connection(chain):
+    clients = [
+        await websockets.connect(f"ws://127.0.0.1:{port}/ws?seq=1")
+        for port in (EDGE, EDGE, LEAF, LEAF, LEAF)
+    ]
+    try:
+        for ws in clients:
+            assert json.loads(await ws.recv())["type"] == "hello"
+            await ws.recv()  # snapshot
+        # Each relay holds a single connection to its upstream.
+        assert requests.get(f"{url(ORIGIN)}/ws/stats").json()["connections"] == 1
+        assert requests.get(f"{url(EDGE)}/ws/stats").json()["connections"] == 3
+
+        created = requests.post(f"{url(ORIGIN)}/timers", params={"duration": 30}).json()
+        timer_id = str(created["timer_id"])
+        for ws in clients:
+            message = json.loads(await asyncio.wait_for(ws.recv(), 5))
+            assert timer_id in message["timers"]
+    finally:
+        for ws in clients:
+            await ws.close()
+
+    origin = status(ORIGIN)
+    leaf = status(LEAF)
+    assert (leaf["epoch"], leaf["version"]) == (origin["epoch"], origin["version"])
+    assert set(requests.get(f"{url(LEAF)}/timers").json()) == {timer_id}
+    assert requests.get(f"{url(LEAF)}/timers/changes", params={"since": 0}).status_code == 200
+
+    refused = requests.post(f"{url(LEAF)}/timers", params={"duration": 5})
+    assert refused.status_code == 403
+    assert refused.json()["leader"] == url(EDGE)
+
+
+def test_relay_serves_sse_and_resumes_across_servers(chain):
+    requests.post(f"{url(ORIGIN)}/timers", params={"duration": 60})
+    origin = status(ORIGIN)
+    assert wait_until(lambda: status(LEAF)["version"] == origin["version"])
+    removed = requests.get(f"{url(ORIGIN)}/timers").json()
+    timer_id = max(removed, key=int)
+    requests.delete(f"{url(ORIGIN)}/timers/{timer_id}")
+
+    # A position obtained from the origin is valid on the leaf relay.
+    headers = {"Last-Event-ID": f"{origin['epoch']}:{origin['version']}"}
+    with requests.get(f"{url(LEAF)}/events", headers=headers, stream=True, timeout=5) as resp:
+        for line in resp.iter_lines(decode_unicode=True):
+            if line.startswith("data:"):
+                event = json.loads(line[len("data:"):])
+                break
+    assert event["type"] == "remove"
+    assert event["timer_id"] == timer_id
@@ -0,0 +1,188 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+import websockets
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.core.timer_manager import TimerManager
+from mytimer.server.change_feed import ChangeFeed
+from mytimer.server.replication import ReplicationSource, parse_address
+
+TOKEN = "replication-admin"
+HEADERS = {"X-Auth-Token": TOKEN}
+LEADER, FOLLOWER, SECOND = 8020, 8021, 8022
+LEADER_STREAM, FOLLOWER_STREAM = "127.0.0.1:9120", "127.0.0.1:9121"
+
+
+def url(port):
+    return f"http://127.0.0.1:{port}"
+
+
+def launch(port, listen=None, follow=None):
+    env = os.environ.copy()
+    env.update(MYTIMER_API_PORT=str(port), MYTIMER_ADMIN_TOKEN=TOKEN,
+               MYTIMER_LOOP_LAG_THRESHOLD="0")
+    for name, value in (("MYTIMER_REPLICATION_LISTEN", listen),
+                        ("MYTIMER_REPLICATE_FROM", follow)):
+        if value:
+            env[name] = value
+        else:
+            env.pop(name, None)
+    return subprocess.Popen(
+        ["uvicorn", "mytimer.server.api:app", "--host", "127.0.0.1", "--port", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if predicate():
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    return False
+
+
+def status(port):
+    return requests.get(f"{url(port)}/replication", timeout=2).json()
+
+
+def timer_ids(port):
+    return set(requests.get(f"{url(port)}/timers", timeout=2).json())
+
+
+@pytest.fixture
+def servers():
+    procs = {
+        LEADER: launch(LEADER, listen=LEADER_STREAM),
+        FOLLOWER: launch(FOLLOWER, listen=FOLLOWER_STREAM, follow=LEADER_STREAM),
+        SECOND: launch(SECOND, follow=LEADER_STREAM),
+    }
+    try:
+        for port in (FOLLOWER, SECOND):
+            if not wait_until(lambda: status(port).get("connected")):
+                raise RuntimeError("replication did not start")
+        yield procs
+    finally:
+        for proc in procs.values():
+            proc.terminate()
+            proc.wait()
+
+
+def test_record_at_continues_another_feed():
+    feed = ChangeFeed()
+    assert feed.record_at(5, 1, 2) == 5
+    assert feed.changes_since(3) == {1, 2}
+    assert feed.changes_since(5) == set()
+    assert feed.record(3) == 6
+    with pytest.raises(ValueError):
+        feed.record_at(4, 1)
+
+
+def test_parse_address():
+    assert parse_address("127.0.0.1:9120") == ("127.0.0.1", 9120)
+    assert parse_address("[::1]:9120") == ("::1", 9120)
+    assert parse_address("9120", "127.0.0.1") == ("127.0.0.1", 9120)
+    with pytest.raises(ValueError):
+        parse_address("localhost")
+
+
+@pytest.mark.asyncio
+async def test_source_answers_malformed_follow_requests_with_an_error():
+    source = ReplicationSource(TimerManager(), ChangeFeed(), "127.0.0.1", 9122, TOKEN)
+    await source.start()
+    try:
+        for request in ('{"type": "follow", "token": "%s", "version": "x"}' % TOKEN,
+                        '{"type": "follow", "token": "%s", "epoch": 5}' % TOKEN,
+                        '{"type": "follow", "token": "wrong"}', '{"type": "follow"}',
+                        '["follow"]', "not json"):
+            reader, writer = await asyncio.open_connection("127.0.0.1", 9122)
+            writer.write(request.encode() + b"\n")
+            reply = json.loads(await asyncio.wait_for(reader.readline(), 5))
+            assert reply["type"] == "error"
+            assert await asyncio.wait_for(reader.read(), 5) == b""
+            writer.close()
+        assert source.followers == 0
+    finally:
+        await source.stop()
+
+
+@pytest.mark.asyncio
+async def test_followers_mirror_the_leader(servers):
+    first = requests.post(f"{url(LEADER)}/timers", params={"duration": 30}).json()["timer_id"]
+    assert wait_until(lambda: timer_ids(FOLLOWER) == {str(first)})
+
+    # A follower's feed is the leader's: positions are valid on either.
+    leader = status(LEADER)
+    assert wait_until(lambda: status(FOLLOWER)["version"] == leader["version"])
+    assert status(FOLLOWER)["epoch"] == leader["epoch"]
+    assert leader["followers"] == 2
+
+    since = f"since={leader['version']}&epoch={leader['epoch']}"
+    ws_url = f"ws://127.0.0.1:{FOLLOWER}/ws?seq=1&{since}"
+    async with websockets.connect(ws_url) as ws:
+        hello = json.loads(await ws.recv())
+        assert hello["resumed"] is True
+        second = requests.post(f"{url(LEADER)}/timers", params={"duration": 60}).json()
+        requests.post(f"{url(LEADER)}/timers/{first}/pause")
+        timers = {}
+        while str(second["timer_id"]) not in timers or timers[str(first)]["running"]:
+            message = json.loads(await asyncio.wait_for(ws.recv(), 5))
+            timers.update(message.get("timers", {}))
+            if message.get("type") == "update":
+                timers[message["timer_id"]] = message
+
+        command = {"type": "command", "id": 1, "op": "create", "args": {"duration": 5}}
+        await ws.send(json.dumps(command))
+        while (ack := json.loads(await asyncio.wait_for(ws.recv(), 5))).get("type") != "ack":
+            pass
+        assert ack["ok"] is False and ack["status"] == 403
+        assert ack["leader"] == url(LEADER)
+
+    refused = requests.post(f"{url(FOLLOWER)}/timers", params={"duration": 5})
+    assert refused.status_code == 403
+    assert refused.json()["leader"] == url(LEADER)
+    # Endpoints that do not change timers are local to each server.
+    assert requests.post(f"{url(FOLLOWER)}/devices", headers=HEADERS).status_code == 200
+    assert requests.get(f"{url(FOLLOWER)}/timers").json()[str(first)]["running"] is False
+
+
+def test_promote_follower_after_leader_failure(servers):
+    for duration in (30, 60):
+        requests.post(f"{url(LEADER)}/timers", params={"duration": duration})
+    assert wait_until(lambda: timer_ids(SECOND) == {"1", "2"})
+    version = status(LEADER)["version"]
+    servers[LEADER].kill()
+    servers[LEADER].wait()
+    assert wait_until(lambda: not status(FOLLOWER)["connected"])
+
+    assert requests.post(f"{url(FOLLOWER)}/replication/promote").status_code == 401
+    promoted = requests.post(f"{url(FOLLOWER)}/replication/promote", headers=HEADERS).json()
+    assert promoted["promoted"] is True
+    assert promoted["role"] == "leader"
+
+    followed = requests.post(
+        f"{url(SECOND)}/replication/follow", params={"leader": FOLLOWER_STREAM}, headers=HEADERS
+    )
+    assert followed.status_code == 200
+    assert wait_until(lambda: status(SECOND)["connected"])
+    # The second follower resumed from its position instead of a snapshot.
+    assert status(SECOND)["snapshots"] == 0
+
+    created = requests.post(f"{url(FOLLOWER)}/timers", params={"duration": 90}).json()
+    assert created["timer_id"] == 3
+    assert status(FOLLOWER)["version"] > version
+    assert wait_until(lambda: timer_ids(SECOND) == {"1", "2", "3"})
+    assert requests.post(f"{url(SECOND)}/timers", params={"duration": 5}).status_code == 403
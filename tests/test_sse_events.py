@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.server import sse
+from mytimer.server.api import change_feed, event_stream, manager
+
+
+def setup_function(function):
+    manager.timers.clear()
+    manager._next_id = 1
+
+
+def parse(message):
+    fields = {}
+    for line in message.strip().splitlines():
+        key, _, value = line.partition(": ")
+        fields[key] = value
+    return fields
+
+
+def test_format_and_parse_event_id():
+    message = sse.format_event({"a": 1}, event_id=sse.format_event_id("abc", 5))
+    assert message == 'id: abc:5\ndata: {"a":1}\n\n'
+    assert sse.parse_last_event_id("abc:5") == ("abc", 5)
+    assert sse.parse_last_event_id("garbage") == (None, -1)
+    assert sse.parse_last_event_id(None) == (None, -1)
+
+
+def test_event_stream_snapshot_then_updates():
+    async def run():
+        tid = manager.create_timer(5)
+        change_feed.record(tid)
+        stream = event_stream(-1, None)
+        first = parse(await stream.__anext__())
+        assert json.loads(first["data"])[str(tid)]["duration"] == 5
+        assert first["id"] == sse.format_event_id(change_feed.epoch, change_feed.version)
+
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.01)
+        manager.remove_timer(tid)
+        change_feed.record(tid)
+        removed = parse(await asyncio.wait_for(pending, 1))
+        data = json.loads(removed["data"])
+        assert data["type"] == "remove" and data["timer_id"] == str(tid)
+        await stream.aclose()
+
+    asyncio.run(run())
+
+
+def test_event_stream_resumes_from_last_event_id():
+    async def run():
+        tid1 = manager.create_timer(5)
+        change_feed.record(tid1)
+        since = change_feed.version
+        tid2 = manager.create_timer(3)
+        change_feed.record(tid2)
+        stream = event_stream(since, change_feed.epoch)
+        message = parse(await stream.__anext__())
+        data = json.loads(message["data"])
+        assert data["type"] == "update"
+        assert data["timer_id"] == str(tid2)
+        await stream.aclose()
+
+    asyncio.run(run())
+
+
+@pytest.fixture()
+def server():
+    proc = subprocess.Popen(
+        ["uvicorn", "mytimer.server.api:app", "--host", "127.0.0.1", "--port", "8013"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    for _ in range(10):
+        try:
+            requests.get("http://127.0.0.1:8013/timers", timeout=1)
+            break
+        except Exception:
+            time.sleep(0.5)
+    else:
+        proc.terminate()
+        proc.wait()
+        raise RuntimeError("API server failed to start")
+    yield
+    proc.terminate()
+    proc.wait()
+
+
+@pytest.mark.asyncio
+async def test_events_endpoint_streams_updates(server):
+    async with httpx.AsyncClient(base_url="http://127.0.0.1:8013", trust_env=False) as client:
+        async with client.stream("GET", "/events") as resp:
+            assert resp.headers["content-type"].startswith("text/event-stream")
+            lines = resp.aiter_lines()
+            assert (await lines.__anext__()).startswith("id: ")
+            assert json.loads((await lines.__anext__())[len("data: "):]) == {}
+            await client.post("/timers", params={"duration": 5})
+            received = []
+            async for line in lines:
+                if line.startswith("data: "):
+                    received.append(json.loads(line[len("data: "):]))
+                    break
+            assert received[0]["type"] == "update"
+            assert received[0]["duration"] == 5
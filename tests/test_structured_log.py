@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import queue
+import sys
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.server import api
+from mytimer.server.api import app, manager
+from mytimer.server.structured_log import (
+    JSONFormatter,
+    NonBlockingQueueHandler,
+    SamplingFilter,
+    StructuredLogging,
+    parse_sample_rates,
+)
+
+
+def setup_function(function):
+    manager.timers.clear()
+    manager._next_id = 1
+
+
+def make_record(msg="hello", name="mytimer.test", args=None, **extra):
+    record = logging.LogRecord(name, logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_formatter_emits_extra_fields_as_json():
+    record = make_record("took %dms", args=(5,), event="tick", seconds=1.5, obj=object())
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry["msg"] == "took 5ms"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "mytimer.test"
+    assert entry["event"] == "tick"
+    assert entry["seconds"] == 1.5
+    assert entry["obj"].startswith("<object")
+
+
+def test_sampling_keeps_one_record_per_rate():
+    sampler = SamplingFilter({"tick": 0.25, "/status": 0.5})
+    kept = [r for r in (make_record(event="tick") for _ in range(100)) if sampler.filter(r)]
+    assert len(kept) == 25
+    assert all(r.sample_rate == 0.25 for r in kept)
+    access = [
+        make_record('%s - "%s %s HTTP/%s" %d', name="uvicorn.access",
+                    args=("127.0.0.1:1", "GET", "/status?x=1", "1.1", 200))
+        for _ in range(10)
+    ]
+    assert sum(sampler.filter(r) for r in access) == 5
+    entry = json.loads(JSONFormatter().format(access[0]))
+    assert (entry["method"], entry["path"], entry["status"]) == ("GET", "/status?x=1", 200)
+    # Unsampled events always pass.
+    assert sampler.filter(make_record(event="timer.create"))
+    assert sampler.sampled_out == 75 + 5
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+    start = time.perf_counter()
+    for _ in range(5):
+        handler.handle(make_record())
+    assert time.perf_counter() - start < 0.5
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("tick=0.01, /status=0.5,") == {"tick": 0.01, "/status": 0.5}
+    with pytest.raises(ValueError):
+        parse_sample_rates("tick")
+    with pytest.raises(ValueError):
+        parse_sample_rates("tick=2")
+
+
+def test_writer_thread_rotates_and_restores_handlers(tmp_path):
+    path = tmp_path / "server.log"
+    before = list(logging.getLogger("uvicorn.access").handlers)
+    logs = StructuredLogging(str(path), max_bytes=2000, backups=2)
+    logs.start()
+    log = logging.getLogger("mytimer.test")
+    for i in range(100):
+        log.info("message %d", i, extra={"event": "test", "i": i})
+    logs.stop()
+    assert logging.getLogger("uvicorn.access").handlers == before
+    assert (tmp_path / "server.log.1").exists()
+    assert not (tmp_path / "server.log.3").exists()
+    last = read_lines(path)[-1]
+    assert last["msg"] == "message 99"
+    assert last["i"] == 99
+
+
+def test_server_logs_requests_and_events(tmp_path, monkeypatch):
+    path = tmp_path / "server.log"
+    logs = StructuredLogging(str(path), sample_rates={"broadcast": 0.5})
+    monkeypatch.setattr(api, "structured_logging", logs)
+    with TestClient(app) as client:
+        client.post("/timers", params={"duration": 5})
+        client.post("/tick", params={"seconds": 1})
+        client.post("/tick", params={"seconds": 1})
+    entries = read_lines(path)
+    events = [e.get("event") for e in entries]
+    assert events.count("timer.create") == 1
+    assert events.count("tick") == 2
+    broadcasts = [e for e in entries if e.get("event") == "broadcast"]
+    # Every other broadcast is kept, starting with the first.
+    assert len(broadcasts) - logs.sampled_out in (0, 1)
+    assert all(e["sample_rate"] == 0.5 for e in broadcasts)
+    create = next(e for e in entries if e.get("event") == "timer.create")
+    assert create["timer_id"] == 1
+    assert create["duration"] == 5
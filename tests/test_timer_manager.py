@@ -4,6 +4,7 @@ import pytest
 import asyncio
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from mytimer.core.instrumentation import EngineStats
 from mytimer.core.timer_manager import TimerManager
 
 
@@ -148,3 +149,69 @@ async def test_auto_tick_background():
     assert tm.timers[tid].finished
 
 
+
+
+def test_expire_due_finishes_without_fast_forward():
+    tm = TimerManager()
+    finished = []
+    tm.register_on_finish(lambda tid, t: finished.append(tid))
+    short = tm.create_timer(5)
+    long = tm.create_timer(50)
+    start_at = tm.timers[long].start_at
+    assert tm.next_deadline() == pytest.approx(tm.timers[short].start_at + 5)
+    assert tm.expire_due(now=start_at + 10) == [short]
+    assert finished == [short]
+    assert tm.timers[short].finished and tm.timers[short].remaining == 0
+    assert tm.timers[long].start_at == start_at
+    assert tm.next_deadline() == pytest.approx(start_at + 50)
+
+
+def test_deadline_heap_skips_stale_entries():
+    tm = TimerManager()
+    finished = []
+    tm.register_on_finish(lambda tid, t: finished.append(tid))
+    first, second, third = (tm.create_timer(d) for d in (5, 10, 15))
+    start_at = tm.timers[first].start_at
+    tm.pause_timer(first)
+    tm.remove_timer(second)
+    assert tm.next_deadline() == pytest.approx(tm.timers[third].start_at + 15)
+    tm.resume_timer(first)
+    assert tm.next_deadline() == pytest.approx(tm.timers[first].start_at + 5)
+    tm.timers[third].start_at -= 20
+    tm.reschedule(third)
+    assert tm.expire_due(now=start_at + 1) == [third]
+    assert tm.expire_due(now=start_at + 100) == [first]
+    assert finished == [third, first]
+    assert tm.next_deadline() is None
+
+
+def test_settle_stores_wall_clock_remaining():
+    tm = TimerManager()
+    tid = tm.create_timer(10)
+    now = tm.timers[tid].start_at + 4
+    assert tm.timers[tid].remaining_at(now) == pytest.approx(6)
+    tm.settle(tid, now=now)
+    tm.pause_timer(tid)
+    assert tm.timers[tid].remaining == pytest.approx(6)
+
+
+def test_instrumentation_times_operations_and_lateness(tmp_path):
+    tm = TimerManager()
+    assert "tick" not in tm.__dict__
+    stats = EngineStats()
+    tm.set_instrumentation(stats)
+    tid = tm.create_timer(5)
+    tm.pause_timer(tid)
+    tm.resume_timer(tid)
+    tm.save_state(tmp_path / "state.json")
+    tm.expire_due(now=tm.timers[tid].start_at + 5.25)
+    snapshot = stats.snapshot()
+    for name in ("pause_timer", "resume_timer", "save_state", "expire_due", "run_callbacks"):
+        assert snapshot["operations"][name]["count"] == 1
+    assert snapshot["finish_lateness"]["count"] == 1
+    assert snapshot["finish_lateness"]["sum"] == pytest.approx(0.25)
+
+    tm.set_instrumentation(None)
+    assert "tick" not in tm.__dict__
+    tm.tick(1)
+    assert stats.operations["tick"].count == 0
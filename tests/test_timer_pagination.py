@@ -0,0 +1,88 @@
+import os
+import sys
+
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.core.timer_manager import TimerManager
+from mytimer.server.api import app, manager
+from mytimer.server.timer_index import TimerIndex
+
+
+def setup_function(function):
+    manager.timers.clear()
+    manager._next_id = 1
+
+
+def test_pages_follow_cursor_until_exhausted():
+    with TestClient(app) as client:
+        for _ in range(7):
+            client.post("/timers", params={"duration": 30})
+        seen = []
+        params = {"limit": 3}
+        while True:
+            data = client.get("/timers", params=params).json()
+            seen.extend(int(tid) for tid in data["timers"])
+            if data["next_cursor"] is None:
+                break
+            params["cursor"] = data["next_cursor"]
+    assert seen == list(range(1, 8))
+
+
+def test_status_filter_and_projection():
+    with TestClient(app) as client:
+        for _ in range(4):
+            client.post("/timers", params={"duration": 30})
+        client.post("/timers/2/pause")
+        client.post("/timers/4/pause")
+        data = client.get(
+            "/timers", params={"status": "paused", "fields": "remaining,running"}
+        ).json()
+    assert list(data["timers"]) == ["2", "4"]
+    assert set(data["timers"]["2"]) == {"remaining", "running"}
+    assert data["timers"]["2"]["running"] is False
+    assert data["next_cursor"] is None
+
+
+def test_columnar_format():
+    with TestClient(app) as client:
+        for duration in (5, 10, 15):
+            client.post("/timers", params={"duration": duration})
+        data = client.get(
+            "/timers", params={"format": "columnar", "fields": "duration,running", "limit": 2}
+        ).json()
+    assert data["ids"] == [1, 2]
+    assert data["columns"] == {"duration": [5, 10], "running": [True, True]}
+    assert data["next_cursor"] == "2"
+
+
+def test_invalid_parameters_are_rejected():
+    with TestClient(app) as client:
+        assert client.get("/timers", params={"status": "late"}).status_code == 400
+        assert client.get("/timers", params={"fields": "nope"}).status_code == 400
+        assert client.get("/timers", params={"cursor": "x"}).status_code == 400
+        assert client.get("/timers", params={"format": "xml"}).status_code == 400
+        assert client.get("/timers", params={"limit": 0}).status_code == 422
+
+
+def test_plain_listing_is_unchanged():
+    with TestClient(app) as client:
+        client.post("/timers", params={"duration": 5})
+        data = client.get("/timers").json()
+    assert set(data) == {"1"}
+    assert data["1"]["duration"] == 5
+
+
+def test_index_repairs_entries_changed_behind_its_back():
+    mgr = TimerManager()
+    index = TimerIndex(mgr.timers)
+    ids = [mgr.create_timer(30) for _ in range(3)]
+    index.update(ids)
+    assert index.page("running") == ([1, 2, 3], None)
+    mgr.pause_timer(2)
+    assert index.page("running") == ([1, 3], None)
+    assert index.page("paused") == ([2], None)
+    mgr.remove_timer(3)
+    assert index.page(limit=1) == ([1], 1)
+    assert index.page(after=1) == ([2], None)
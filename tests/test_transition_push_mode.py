@@ -0,0 +1,105 @@
+import asyncio
+import json
+import os
+import subprocess
+import time
+
+import pytest
+import requests
+import websockets
+
+from mytimer.core.timer_manager import TimerManager
+from mytimer.server.ticker import DeadlineWatcher
+
+
+def test_deadline_watcher_finishes_due_timers():
+    async def run():
+        tm = TimerManager()
+        finished = []
+        tm.register_on_finish(lambda tid, t: finished.append(tid))
+        watcher = DeadlineWatcher(tm)
+        await watcher.start()
+        try:
+            tid = tm.create_timer(30)
+            tm.timers[tid].start_at -= 29.9
+            watcher.poke()
+            for _ in range(20):
+                if finished:
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            await watcher.stop()
+        return finished
+
+    assert asyncio.run(run()) == [1]
+
+
+def test_deadline_watcher_only_wakes_for_earlier_deadlines():
+    async def run():
+        tm = TimerManager()
+        watcher = DeadlineWatcher(tm)
+        await watcher.start()
+        try:
+            tm.create_timer(30)
+            watcher.poke()
+            await asyncio.sleep(0.01)
+            later = watcher._wake.is_set()
+            tm.create_timer(60)
+            watcher.poke()
+            woken_for_later = watcher._wake.is_set()
+            tm.create_timer(10)
+            watcher.poke()
+            woken_for_earlier = watcher._wake.is_set()
+        finally:
+            await watcher.stop()
+        return later, woken_for_later, woken_for_earlier
+
+    assert asyncio.run(run()) == (False, False, True)
+
+
+@pytest.fixture()
+def server():
+    env = os.environ.copy()
+    env["MYTIMER_PUSH_MODE"] = "transitions"
+    env["MYTIMER_AUTO_TICK_INTERVAL"] = "0.05"
+    proc = subprocess.Popen(
+        ["uvicorn", "mytimer.server.api:app", "--host", "127.0.0.1", "--port", "8014"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+    )
+    for _ in range(10):
+        try:
+            requests.get("http://127.0.0.1:8014/timers", timeout=1)
+            break
+        except Exception:
+            time.sleep(0.5)
+    else:
+        proc.terminate()
+        proc.wait()
+        raise RuntimeError("API server failed to start")
+    yield
+    proc.terminate()
+    proc.wait()
+
+
+@pytest.mark.asyncio
+async def test_only_transitions_are_pushed(server):
+    assert requests.get("http://127.0.0.1:8014/status").json()["push_mode"] == "transitions"
+    async with websockets.connect("ws://127.0.0.1:8014/ws?seq=1") as ws:
+        assert json.loads(await ws.recv())["type"] == "hello"
+        assert json.loads(await ws.recv())["type"] == "snapshot"
+
+        requests.post("http://127.0.0.1:8014/timers", params={"duration": 0.5})
+        created = json.loads(await ws.recv())
+        assert created["type"] == "update"
+        assert created["running"] and "server_time" in created
+
+        # no per-tick traffic while the timer counts down
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(ws.recv(), 0.3)
+
+        finished = json.loads(await asyncio.wait_for(ws.recv(), 2))
+        assert finished["type"] == "update"
+        assert finished["timer_id"] == created["timer_id"]
+        assert finished["finished"]
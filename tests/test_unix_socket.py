@@ -0,0 +1,139 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.client import controller, local_socket
+from mytimer.client.sync_service import SyncService
+from qt_client.network_client import NetworkClient
+
+PORT = 8018
+BASE_URL = f"http://127.0.0.1:{PORT}"
+
+
+@pytest.fixture(scope="module")
+def socket_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("uds") / "mytimer.sock")
+    env = os.environ.copy()
+    env["MYTIMER_UNIX_SOCKET"] = path
+    proc = subprocess.Popen(
+        ["uvicorn", "mytimer.server.api:app", "--host", "127.0.0.1", "--port", str(PORT)],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    for _ in range(40):
+        if os.path.exists(path):
+            break
+        time.sleep(0.25)
+    else:
+        proc.terminate()
+        proc.wait()
+        raise RuntimeError("API server failed to start")
+    yield path
+    proc.terminate()
+    proc.wait()
+    assert not os.path.exists(path)
+
+
+@pytest.fixture
+def use_socket(socket_path, monkeypatch):
+    monkeypatch.setenv(local_socket.ENV_VAR, socket_path)
+    return socket_path
+
+
+def test_server_serves_http_on_the_socket(use_socket):
+    session = requests.Session()
+    assert local_socket.mount(session, BASE_URL) == use_socket
+    created = session.post(f"{BASE_URL}/timers", params={"duration": 30}).json()
+    # The TCP listener sees the same timers.
+    timers = requests.get(f"{BASE_URL}/timers").json()
+    assert str(created["timer_id"]) in timers
+    assert os.stat(use_socket).st_mode & 0o777 == 0o600
+
+
+def test_only_local_urls_use_the_socket(use_socket, monkeypatch):
+    assert local_socket.resolve(f"http://localhost:{PORT}") == use_socket
+    assert local_socket.resolve("http://192.0.2.1:8000") is None
+    monkeypatch.setenv(local_socket.ENV_VAR, local_socket.DISABLED)
+    assert local_socket.resolve(BASE_URL) is None
+
+
+def test_sockets_of_other_users_are_ignored(use_socket, monkeypatch):
+    uid = os.getuid()
+    monkeypatch.setattr(local_socket.os, "getuid", lambda: uid + 1)
+    assert local_socket.resolve(BASE_URL) is None
+
+
+def test_default_path_and_stale_socket(tmp_path, monkeypatch):
+    monkeypatch.delenv(local_socket.ENV_VAR, raising=False)
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr(local_socket.tempfile, "gettempdir", lambda: str(tmp_path))
+    path = local_socket.default_socket_path(PORT)
+    assert path == str(tmp_path / f"mytimer-{os.getuid()}" / f"{PORT}.sock")
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    path = local_socket.default_socket_path(PORT)
+    assert path == str(tmp_path / "mytimer" / f"{PORT}.sock")
+    assert local_socket.resolve(BASE_URL) is None
+    os.mkdir(os.path.dirname(path), 0o700)
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()  # file remains but nobody listens
+    assert local_socket.resolve(BASE_URL) is None
+
+
+def test_controller_and_network_client_prefer_the_socket(use_socket, monkeypatch):
+    monkeypatch.setattr(controller, "_sessions", {})
+    timer_id = controller.create_timer(BASE_URL, 45)
+    adapter = controller._session(BASE_URL).get_adapter(BASE_URL + "/timers")
+    assert isinstance(adapter, local_socket.UnixSocketAdapter)
+    client = NetworkClient(BASE_URL, clock_sync_interval=3600)
+    assert client.unix_socket == use_socket
+    assert str(timer_id) in client.list_timers()
+
+
+@pytest.mark.asyncio
+async def test_sync_service_uses_the_socket(use_socket):
+    svc = SyncService(BASE_URL, clock_sync_interval=0, unix_socket=True)
+    assert svc.unix_socket == use_socket
+    await svc.connect()
+    try:
+        assert svc._ws is not None
+        timer_id = await svc.create_timer(5)
+        resp = await svc.client.get("/timers", params={"limit": 1000})
+        assert str(timer_id) in resp.json()["timers"]
+    finally:
+        await svc.close()
+    # The socket is opt-in.
+    assert SyncService(BASE_URL).unix_socket is None
+
+
+@pytest.mark.asyncio
+async def test_listener_creates_a_private_directory(tmp_path):
+    from mytimer.server.unix_listener import UnixSocketListener
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    path = str(tmp_path / "run" / "mytimer.sock")
+    listener = UnixSocketListener(path)
+    assert await listener.start(app)
+    try:
+        assert os.stat(os.path.dirname(path)).st_mode & 0o777 == 0o700
+        assert os.stat(path).st_mode & 0o777 == 0o600
+        session = requests.Session()
+        session.mount("http://localhost/", local_socket.UnixSocketAdapter(path))
+        # The listener runs on this loop; a blocking request must not.
+        resp = await asyncio.to_thread(session.get, "http://localhost/")
+        assert resp.status_code == 204
+    finally:
+        await listener.stop()
+    assert not os.path.exists(path)
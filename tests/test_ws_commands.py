@@ -0,0 +1,127 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.client.sync_service import CommandError, SyncService
+from mytimer.server import api
+from mytimer.server.api import app, manager
+from mytimer.server.rate_limit import RateLimiter
+
+PORT = 8017
+BASE_URL = f"http://127.0.0.1:{PORT}"
+
+
+def setup_function(function):
+    manager.timers.clear()
+    manager._next_id = 1
+
+
+def command(id, op, **args):
+    return {"type": "command", "id": id, "op": op, "args": args}
+
+
+def acks(ws, count):
+    received = []
+    while len(received) < count:
+        message = ws.receive_json()
+        if message.get("type") == "ack":
+            received.append(message)
+    return received
+
+
+def test_pipelined_commands_are_acked_in_order():
+    client = TestClient(app)
+    with client.websocket_connect("/ws?seq=1") as ws:
+        assert ws.receive_json()["commands"] is True
+        ws.receive_json()
+        ws.send_json(command("a", "create", duration=30))
+        ws.send_json(command("b", "create", duration=60))
+        ws.send_json(command("c", "pause", timer_id=1))
+        ws.send_json(command("d", "remove", timer_id=2))
+        result = acks(ws, 4)
+    assert [a["id"] for a in result] == ["a", "b", "c", "d"]
+    assert all(a["ok"] for a in result)
+    assert result[0]["result"] == {"timer_id": 1}
+    assert result[3]["result"] == {"status": "removed"}
+    assert manager.timers[1].running is False
+    assert 2 not in manager.timers
+
+
+def test_rejected_commands_report_status():
+    client = TestClient(app)
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json(command(1, "pause", timer_id=5))
+        ws.send_json(command(2, "create", duration=-1))
+        ws.send_json(command(3, "create"))
+        ws.send_json(command(4, "explode"))
+        result = acks(ws, 4)
+    assert [(a["ok"], a["status"]) for a in result] == [
+        (False, 404),
+        (False, 400),
+        (False, 400),
+        (False, 400),
+    ]
+
+
+def test_commands_share_the_rate_limit(monkeypatch):
+    monkeypatch.setattr(api, "rate_limiter", RateLimiter(rate=1, burst=1))
+    client = TestClient(app)
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json(command(1, "create", duration=30))
+        ws.send_json(command(2, "create", duration=30))
+        first, second = acks(ws, 2)
+    assert first["ok"]
+    assert second["status"] == 429
+    assert second["retry_after"] > 0
+
+
+@pytest.fixture(scope="module")
+def server():
+    proc = subprocess.Popen(
+        ["uvicorn", "mytimer.server.api:app", "--host", "127.0.0.1", "--port", str(PORT)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    for _ in range(20):
+        try:
+            requests.get(f"{BASE_URL}/status", timeout=1)
+            break
+        except Exception:
+            time.sleep(0.25)
+    else:
+        proc.terminate()
+        proc.wait()
+        raise RuntimeError("API server failed to start")
+    yield
+    proc.terminate()
+    proc.wait()
+
+
+@pytest.mark.asyncio
+async def test_sync_service_uses_websocket_commands(server):
+    svc = SyncService(BASE_URL, clock_sync_interval=0, ws_commands=True)
+    await svc.connect()
+    try:
+        async def no_http(*args, **kwargs):
+            raise AssertionError("command went over HTTP")
+
+        svc.client.post = no_http
+        svc.client.delete = no_http
+        ids = await asyncio.gather(*(svc.create_timer(10 + i) for i in range(5)))
+        assert len(set(ids)) == 5
+        await svc.pause_timer(ids[0])
+        with pytest.raises(CommandError) as exc:
+            await svc.resume_timer(10**6)
+        assert exc.value.status == 404
+        await svc.remove_all_timers()
+    finally:
+        await svc.close()
+    assert requests.get(f"{BASE_URL}/timers").json() == {}
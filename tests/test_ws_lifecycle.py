@@ -0,0 +1,162 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from mytimer.server.api import admin_auth, app, ws_manager
+from mytimer.server.websocket_manager import CLOSE_TRY_AGAIN_LATER, WebSocketManager
+
+TOKEN = "lifecycle-test-token"
+admin_auth.register_device(TOKEN)
+
+
+class FakeWebSocket:
+    def __init__(self, query="", block=False, delay=0.0):
+        self.query_params = {"seq": "1"} if query == "seq" else {}
+        self.scope = {"client": ("10.0.0.1", 5000)}
+        self.sent = []
+        self.closed = None
+        self.block = block
+        self.delay = delay
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, text):
+        if self.block:
+            await asyncio.Event().wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed = code
+
+
+def test_connection_cap_refuses_gracefully(monkeypatch):
+    monkeypatch.setattr(ws_manager, "max_connections", 1)
+    refused = ws_manager.refused
+    client = TestClient(app)
+    with client.websocket_connect("/ws") as first:
+        with client.websocket_connect("/ws") as second:
+            assert second.receive_json()["detail"] == "Too many connections"
+            with pytest.raises(WebSocketDisconnect) as exc:
+                second.receive_json()
+            assert exc.value.code == CLOSE_TRY_AGAIN_LATER
+        assert ws_manager.refused == refused + 1
+        assert len(ws_manager.connections) == 1
+
+
+def test_connection_stats_endpoint():
+    client = TestClient(app)
+    assert client.get("/ws/connections").status_code == 401
+    with client.websocket_connect("/ws?seq=1") as ws:
+        ws.receive_json()
+        ws.receive_json()
+        ws.send_json({"type": "ping", "t0": 1.0})
+        ws.receive_json()
+        data = client.get("/ws/connections", headers={"X-Auth-Token": TOKEN}).json()
+    (conn,) = data["connections"]
+    assert conn["sequenced"] is True
+    assert conn["messages_received"] == 1
+    assert conn["messages_sent"] >= 3
+    assert conn["bytes_sent"] > 0
+    assert conn["age"] >= 0
+    assert conn["queue_depth"] == 0
+
+
+def test_heartbeat_then_reap_silent_numbered_connection():
+    async def scenario():
+        manager = WebSocketManager(heartbeat_interval=10, dead_timeout=30)
+        numbered, legacy = FakeWebSocket("seq"), FakeWebSocket()
+        await manager.connect(numbered)
+        await manager.connect(legacy)
+        start = time.monotonic()
+        assert await manager.reap(start + 15) == []
+        await asyncio.sleep(0)
+        assert numbered.sent[-1]["type"] == "heartbeat"
+        assert legacy.sent[-1]["type"] == "heartbeat"
+        manager.touch(numbered, heartbeat=True)
+        assert await manager.reap(time.monotonic() + 15) == []
+        await asyncio.sleep(0)
+        reaped = await manager.reap(time.monotonic() + 45)
+        return manager, numbered, legacy, reaped
+
+    manager, numbered, legacy, reaped = asyncio.run(scenario())
+    assert reaped == [numbered]
+    assert numbered.closed == 1001
+    assert legacy in manager.connections
+    assert manager.reaped["dead"] == 1
+
+
+def test_idle_and_blocked_connections_are_reaped():
+    async def scenario():
+        manager = WebSocketManager(heartbeat_interval=10, dead_timeout=30, idle_timeout=100)
+        idle, stuck = FakeWebSocket(), FakeWebSocket(block=True)
+        await manager.connect(idle)
+        await manager.connect(stuck)
+        manager.touch(stuck)
+        send = asyncio.create_task(manager.send_json(stuck, {"x": 1}))
+        await asyncio.sleep(0)
+        assert manager.connection_stats()[1]["queue_depth"] == 1
+        reaped = await manager.reap(time.monotonic() + 50)
+        assert reaped == [stuck]
+        await asyncio.sleep(0)
+        manager.touch(stuck)
+        reaped += await manager.reap(time.monotonic() + 150)
+        send.cancel()
+        return manager, idle, stuck, reaped
+
+    manager, idle, stuck, reaped = asyncio.run(scenario())
+    assert reaped == [stuck, idle]
+    assert manager.reaped == {"dead": 1, "idle": 1}
+    assert manager.connections == {}
+
+
+def test_stuck_legacy_connection_does_not_stall_others_and_is_reaped():
+    async def scenario():
+        manager = WebSocketManager(heartbeat_interval=10, dead_timeout=30)
+        stuck, other = FakeWebSocket(block=True), FakeWebSocket()
+        await manager.connect(stuck)
+        await manager.connect(other)
+        await manager.reap(time.monotonic() + 15)
+        await manager.broadcast_json({"x": 1})
+        await asyncio.sleep(0.01)
+        delivered = list(other.sent)
+        reaped = await manager.reap(time.monotonic() + 45)
+        return manager, stuck, other, delivered, reaped
+
+    manager, stuck, other, delivered, reaped = asyncio.run(scenario())
+    assert [m.get("type", "x") for m in delivered] == ["heartbeat", "x"]
+    assert reaped == [stuck]
+    assert stuck.closed == 1001
+    assert list(manager.connections) == [other]
+    assert manager.reaped["dead"] == 1
+
+def test_messages_are_delivered_in_order_without_waiting_for_slow_peers():
+    async def scenario():
+        manager = WebSocketManager()
+        slow, fast = FakeWebSocket("seq", delay=0.01), FakeWebSocket("seq")
+        await manager.connect(slow)
+        await manager.connect(fast)
+        for seq in range(1, 6):
+            manager.publish({"type": "update", "timer_id": "1", "seq": seq}, 1, "running")
+        await asyncio.sleep(0.005)
+        fast_seqs = [m["seq"] for m in fast.sent]
+        slow_backlog = manager.pending_sends()
+        await asyncio.sleep(0.2)
+        return manager, fast_seqs, slow_backlog, [m["seq"] for m in slow.sent]
+
+    manager, fast_seqs, slow_backlog, slow_seqs = asyncio.run(scenario())
+    assert fast_seqs == [1, 2, 3, 4, 5]
+    assert slow_backlog[1] >= 4
+    assert slow_seqs == [1, 2, 3, 4, 5]
+    assert manager.pending_sends() == (0, 0)
+    assert manager.messages_sent == 10
@@ -0,0 +1,82 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from fastapi.testclient import TestClient
+
+from mytimer.client.sync_service import SyncService
+from mytimer.server.api import app, change_feed, manager, websockets
+
+client = TestClient(app)
+
+
+def setup_function(function):
+    manager.timers.clear()
+    manager._next_id = 1
+    websockets.clear()
+
+
+def test_numbered_connection_gets_hello_and_snapshot():
+    tid = client.post("/timers", params={"duration": 5}).json()["timer_id"]
+    with client.websocket_connect("/ws?seq=1") as ws:
+        hello = ws.receive_json()
+        assert hello["type"] == "hello"
+        assert hello["epoch"] == change_feed.epoch
+        assert not hello["resumed"]
+        snapshot = ws.receive_json()
+        assert snapshot["type"] == "snapshot"
+        assert snapshot["seq"] == hello["seq"] == change_feed.version
+        assert str(tid) in snapshot["timers"]
+
+        client.post(f"/timers/{tid}/pause")
+        message = ws.receive_json()
+        assert message["type"] == "snapshot"
+        assert message["seq"] == change_feed.version
+
+
+def test_reconnect_replays_only_missed_changes():
+    first = client.post("/timers", params={"duration": 5}).json()["timer_id"]
+    with client.websocket_connect("/ws?seq=1") as ws:
+        hello = ws.receive_json()
+        ws.receive_json()
+    last_seen = hello["seq"]
+
+    second = client.post("/timers", params={"duration": 3}).json()["timer_id"]
+    client.delete(f"/timers/{first}")
+
+    url = f"/ws?seq=1&since={last_seen}&epoch={change_feed.epoch}"
+    with client.websocket_connect(url) as ws:
+        hello = ws.receive_json()
+        assert hello["resumed"]
+        replay = [ws.receive_json(), ws.receive_json()]
+    assert replay[0]["type"] == "remove"
+    assert replay[0]["timer_id"] == str(first)
+    assert replay[0]["seq"] == hello["seq"]
+    assert replay[1]["type"] == "update"
+    assert replay[1]["timer_id"] == str(second)
+
+
+def test_unknown_history_falls_back_to_snapshot():
+    client.post("/timers", params={"duration": 5})
+    with client.websocket_connect("/ws?seq=1&since=0&epoch=stale") as ws:
+        assert not ws.receive_json()["resumed"]
+        assert ws.receive_json()["type"] == "snapshot"
+
+
+def test_sync_service_tracks_sequence():
+    svc = SyncService("http://127.0.0.1:1")
+    svc._handle_message('{"type": "hello", "epoch": "e1", "seq": 4, "resumed": false}')
+    svc._handle_message(
+        '{"type": "snapshot", "seq": 4, "timers": {"1": {"duration": 5}}}'
+    )
+    assert svc.version == 4 and "1" in svc.state
+    svc._handle_message(
+        '{"type": "update", "timer_id": "2", "seq": 6, "duration": 3, "remaining": 3}'
+    )
+    svc._handle_message('{"type": "remove", "timer_id": "1", "seq": 7}')
+    assert svc.version == 7
+    assert set(svc.state) == {"2"}
+    # a restarted server announces a new epoch and resets the position
+    svc._handle_message('{"type": "hello", "epoch": "e2", "seq": 1, "resumed": false}')
+    assert svc.version == 1 and svc._epoch == "e2"
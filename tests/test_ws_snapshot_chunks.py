@@ -0,0 +1,92 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from fastapi.testclient import TestClient
+
+from mytimer.client.sync_service import SyncService
+from mytimer.server import api
+from mytimer.server.api import app, change_feed, manager, websockets
+
+client = TestClient(app)
+
+
+def setup_function(function):
+    manager.timers.clear()
+    manager._next_id = 1
+    websockets.clear()
+
+
+def receive_snapshot(ws):
+    begin = ws.receive_json()
+    assert begin["type"] == "snapshot_begin"
+    chunks = []
+    while True:
+        message = ws.receive_json()
+        if message["type"] == "snapshot_end":
+            return begin, chunks, message
+        assert message["type"] == "snapshot_chunk"
+        chunks.append(message)
+
+
+def test_chunks_are_ordered_by_relevance(monkeypatch):
+    monkeypatch.setattr(api, "SNAPSHOT_CHUNK_SIZE", 2)
+    for duration in (50, 10, 30, 20, 5):
+        client.post("/timers", params={"duration": duration})
+    client.post("/timers/2/pause")  # 10s, paused
+    client.post("/tick", params={"seconds": 5})  # 5s timer finishes
+    with client.websocket_connect("/ws?seq=1&snapshot=chunked") as ws:
+        hello = ws.receive_json()
+        begin, chunks, end = receive_snapshot(ws)
+    assert begin["total"] == 5
+    assert begin["seq"] == hello["seq"] == change_feed.version
+    assert [c["index"] for c in chunks] == [0, 1, 2]
+    assert end["chunks"] == 3
+    order = [int(tid) for c in chunks for tid in c["timers"]]
+    # Running by time left (20s, 30s, 50s), then paused, then finished.
+    assert order == [4, 3, 1, 2, 5]
+
+
+def test_chunked_snapshot_respects_subscriptions():
+    for duration in (5, 10):
+        client.post("/timers", params={"duration": duration})
+    client.post("/timers/1/pause")
+    with client.websocket_connect("/ws?seq=1&snapshot=chunked") as ws:
+        ws.receive_json()
+        receive_snapshot(ws)
+        ws.send_json({"type": "subscribe", "status": ["paused"]})
+        assert ws.receive_json()["type"] == "subscribed"
+        assert list(ws.receive_json()["timers"]) == ["1"]
+
+
+def test_empty_server_sends_begin_and_end():
+    with client.websocket_connect("/ws?seq=1&snapshot=chunked") as ws:
+        ws.receive_json()
+        begin, chunks, end = receive_snapshot(ws)
+    assert begin["total"] == 0
+    assert chunks == []
+    assert end["chunks"] == 0
+
+
+def test_client_merges_chunks_and_interleaved_deltas():
+    service = SyncService("http://127.0.0.1:1")
+    service._epoch = "e"
+    service.state = {"99": None}
+    timer = {"duration": 5, "remaining": 5, "running": True, "finished": False, "start_at": 1.0}
+    service._handle_data({"type": "snapshot_begin", "seq": 3, "total": 2})
+    assert service.state == {}
+    assert service._snapshot_open
+    service._handle_data({"type": "snapshot_chunk", "seq": 3, "index": 0, "timers": {"1": timer}})
+    service._handle_data(
+        {"type": "update", "timer_id": "2", "seq": 4, **timer, "running": False}
+    )
+    service._handle_data({"type": "remove", "timer_id": "1", "seq": 5})
+    service._handle_data(
+        {"type": "snapshot_chunk", "seq": 3, "index": 1, "timers": {"2": {**timer, "running": False}}}
+    )
+    service._handle_data({"type": "snapshot_end", "seq": 3, "chunks": 2})
+    assert not service._snapshot_open
+    assert set(service.state) == {"2"}
+    assert service.state["2"].running is False
+    assert service.version == 5
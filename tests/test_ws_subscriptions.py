@@ -0,0 +1,100 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from fastapi.testclient import TestClient
+
+from mytimer.server.api import app, manager, websockets, ws_manager
+from mytimer.server.subscriptions import SubscriptionIndex
+
+client = TestClient(app)
+
+
+def setup_function(function):
+    manager.timers.clear()
+    manager._next_id = 1
+    websockets.clear()
+
+
+def test_index_routes_by_timer_and_status():
+    index = SubscriptionIndex()
+    index.subscribe("a", timers=[1])
+    index.subscribe("b", statuses=["paused"])
+    assert index.recipients(1, "running") == {"a"}
+    assert index.recipients(2, "paused") == {"b"}
+    # leaving the paused class still notifies paused subscribers
+    assert index.recipients(2, "running") == {"b"}
+    assert index.route([(1, "running"), (3, "paused")]) == {"a": [1], "b": [3]}
+    # connections with nothing to send are left out
+    assert index.route([(3, "paused")]) == {"b": [3]}
+
+
+def test_index_remembers_statuses_sent_without_routing():
+    index = SubscriptionIndex()
+    index.note([(1, "paused"), (2, None)])
+    index.subscribe("a", statuses=["paused"])
+    index.subscribe("b", statuses=["running"])
+    assert index.last_status(1) == "paused"
+    assert index.recipients(1, index.last_status(1)) == {"a"}
+    # a timer whose status was never sent reaches every status subscriber
+    assert index.last_status(2) is None
+    assert index.recipients(2, None) == {"a", "b"}
+
+
+def test_index_unsubscribe_and_remove():
+    index = SubscriptionIndex()
+    index.subscribe("a", timers=[1, 2], statuses=["running"])
+    index.unsubscribe("a", timers=[1])
+    assert index.topics("a") == ([2], ["running"])
+    index.unsubscribe("a")
+    assert not index.is_filtered("a")
+    assert len(index) == 0
+    with pytest.raises(ValueError):
+        index.subscribe("a", statuses=["bogus"])
+
+
+def test_subscribed_client_only_receives_its_timers():
+    keep = client.post("/timers", params={"duration": 5}).json()["timer_id"]
+    with client.websocket_connect("/ws") as ws:
+        ws.receive_json()  # initial snapshot
+        ws.send_json({"type": "subscribe", "timers": [keep]})
+        ack = ws.receive_json()
+        assert ack == {"type": "subscribed", "filtered": True, "timers": [keep], "status": []}
+        assert set(ws.receive_json()) == {str(keep)}
+
+        client.post("/timers", params={"duration": 3})
+        assert set(ws.receive_json()) == {str(keep)}
+
+        ws.send_json({"type": "unsubscribe"})
+        assert ws.receive_json()["filtered"] is False
+        assert len(ws.receive_json()) == 2
+    assert len(ws_manager.subscriptions) == 0
+
+
+def test_status_subscription_and_errors():
+    tid = client.post("/timers", params={"duration": 5}).json()["timer_id"]
+    client.post(f"/timers/{tid}/pause")
+    with client.websocket_connect("/ws") as ws:
+        ws.receive_json()
+        ws.send_json({"type": "subscribe", "status": ["running"]})
+        ws.receive_json()
+        assert ws.receive_json() == {}
+
+        client.post(f"/timers/{tid}/resume")
+        assert set(ws.receive_json()) == {str(tid)}
+
+        ws.send_json({"type": "subscribe", "status": ["bogus"]})
+        assert ws.receive_json()["type"] == "error"
+        for bad in ({"timers": "12"}, {"timers": ["x"]}, {"timers": [True]}, {"status": "running"}):
+            ws.send_json({"type": "subscribe", **bad})
+            assert ws.receive_json()["type"] == "error"
+        # Rejected messages leave the subscription as it was.
+        ws.send_json({"type": "subscribe"})
+        ack = ws.receive_json()
+        assert (ack["timers"], ack["status"]) == ([], ["running"])
+        assert set(ws.receive_json()) == {str(tid)}
+        ws.send_text("not json")
+        assert ws.receive_json() == {"type": "error", "detail": "Invalid JSON"}
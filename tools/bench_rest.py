@@ -0,0 +1,103 @@
+"""Measure ``GET /timers`` throughput with and without the pre-encoded JSON
+fast path.
+
+The server is started twice, once with ``MYTIMER_FAST_JSON=0`` (generic
+FastAPI serialisation) and once with the fast path, filled with ``--timers``
+timers and hammered by ``--clients`` threads for ``--seconds`` per endpoint::
+
+    python -m tools.bench_rest --timers 10000
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+PATHS = ("/timers",)
+
+
+def _start_server(port: int, fast: bool) -> subprocess.Popen:
+    env = os.environ.copy()
+    env["MYTIMER_FAST_JSON"] = "1" if fast else "0"
+    # Without a ticker the timers do not change during the run.
+    env["MYTIMER_PUSH_MODE"] = "transitions"
+    env["MYTIMER_LOOP_LAG_THRESHOLD"] = "0"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "mytimer.server.api:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    for _ in range(100):
+        try:
+            requests.get(f"http://127.0.0.1:{port}/status", timeout=0.5)
+            return proc
+        except requests.RequestException:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("server did not start")
+
+
+def _fill(base_url: str, count: int) -> None:
+    # Paused timers keep a fixed payload, matching the tick push mode where
+    # payloads only change on ticks.
+    lines = "".join(
+        f'{{"duration": {60 + i % 600}, "running": false}}\n' for i in range(count)
+    )
+    requests.post(f"{base_url}/timers/import", data=lines.encode(), timeout=60).raise_for_status()
+
+
+def _measure(url: str, clients: int, seconds: float) -> float:
+    counts = [0] * clients
+    deadline = time.perf_counter() + seconds
+
+    def worker(index: int) -> None:
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                session.get(url, timeout=30).raise_for_status()
+                counts[index] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def run(timers: int, clients: int, seconds: float, port: int) -> dict:
+    """Return ``{path: (generic_rps, fast_rps)}``."""
+    results: dict = {path: [0.0, 0.0] for path in PATHS}
+    for column, fast in enumerate((False, True)):
+        proc = _start_server(port, fast)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            _fill(base_url, timers)
+            for path in PATHS:
+                _measure(base_url + path, clients, min(1.0, seconds))  # warm up
+                results[path][column] = _measure(base_url + path, clients, seconds)
+        finally:
+            proc.terminate()
+            proc.wait()
+    return {path: tuple(values) for path, values in results.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="REST fast path benchmark")
+    parser.add_argument("--timers", type=int, default=10000, help="Timers to create")
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent client threads")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration per measurement")
+    parser.add_argument("--port", type=int, default=8099, help="Server port")
+    args = parser.parse_args()
+    results = run(args.timers, args.clients, args.seconds, args.port)
+    print(f"{'endpoint':<10} {'generic req/s':>14} {'fast req/s':>12} {'speedup':>8}")
+    for path, (generic, fast) in results.items():
+        print(f"{path:<10} {generic:>14.1f} {fast:>12.1f} {fast / generic:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,10 +21,14 @@ sys.path.insert(0, str(ROOT))
 
 import requests
 
+from mytimer.client.local_socket import default_socket_path
 from tools import server_discovery
 
 PID_FILE = Path("server.pid")
 LOG_FILE = Path("server.log")
+# Raw stdout/stderr of the server process (startup messages, crashes); the
+# server itself writes JSON logs to ``LOG_FILE`` from a background thread.
+OUTPUT_FILE = Path("server.out")
 TUI_PID_FILE = Path("tui.pid")
 
 COMMANDS = [
@@ -33,6 +37,8 @@ COMMANDS = [
     "selfupdate",
     "start",
     "stop",
+    "reload",
+    "promote",
     "log",
     "test",
     "autotick",
@@ -116,30 +122,113 @@ def run_self_update(branch: str = "main") -> None:
         print(f"Update failed: {exc}")
 
 
-def start_server(port: int) -> None:
-    """Start the API server with uvicorn and save the PID."""
+def _launch_server(
+    port: int, unix_socket: str | None, takeover: bool = False
+) -> tuple[subprocess.Popen, dict]:
+    env = os.environ.copy()
+    env["MYTIMER_API_PORT"] = str(port)
+    env.setdefault("MYTIMER_LOG_FILE", str(LOG_FILE))
+    if unix_socket:
+        env["MYTIMER_UNIX_SOCKET"] = unix_socket
+    cmd = [
+        sys.executable,
+        "-m",
+        "mytimer.server.handoff",
+        "--host",
+        "0.0.0.0",
+        "--port",
+        str(port),
+    ]
+    if takeover:
+        cmd.append("--takeover")
+    log_file = open(OUTPUT_FILE, "a")
+    proc = subprocess.Popen(cmd, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+    log_file.close()
+    return proc, env
+
+
+def start_server(port: int, unix_socket: str | None = None) -> None:
+    """Start the API server and save the PID.
+
+    With ``unix_socket`` the server also listens on that Unix domain socket,
+    which local clients prefer over TCP.
+    """
     if PID_FILE.exists():
         print("Server already running")
         return
-    env = os.environ.copy()
-    env["MYTIMER_API_PORT"] = str(port)
-    log_file = open(LOG_FILE, "a")
-    proc = subprocess.Popen(
-        [
-            "uvicorn",
-            "mytimer.server.api:app",
-            "--host",
-            "0.0.0.0",
-            "--port",
-            str(port),
-        ],
-        env=env,
-        stdout=log_file,
-        stderr=subprocess.STDOUT,
+    proc, env = _launch_server(port, unix_socket)
+    PID_FILE.write_text(str(proc.pid))
+    print(
+        f"Server started on port {port} (PID {proc.pid}). "
+        f"Logs: {env['MYTIMER_LOG_FILE']}, output: {OUTPUT_FILE}"
     )
-    log_file.close()
+    if unix_socket:
+        print(f"Also listening on {unix_socket}")
+
+
+def reload_server(
+    port: int, unix_socket: str | None = None, timeout: float = 30.0
+) -> bool:
+    """Replace the running server with a new process without downtime.
+
+    The new process takes over the listening socket and the timer state of
+    the old one, which then drains its connections and exits. Clients
+    reconnect and resume instead of resynchronising.
+    """
+    if not PID_FILE.exists():
+        print("Server not running")
+        return False
+    old_pid = int(PID_FILE.read_text())
+    proc, _env = _launch_server(port, unix_socket, takeover=True)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            print(f"Reload failed; the old server keeps running. See {OUTPUT_FILE}")
+            return False
+        try:
+            os.kill(old_pid, 0)
+        except ProcessLookupError:
+            PID_FILE.write_text(str(proc.pid))
+            print(f"Server reloaded (PID {old_pid} -> {proc.pid})")
+            return True
+        time.sleep(0.1)
+    # The new server is serving; the old one is still draining.
     PID_FILE.write_text(str(proc.pid))
-    print(f"Server started on port {port} (PID {proc.pid}). Logs: {LOG_FILE}")
+    print(f"Server reloaded (PID {proc.pid}); PID {old_pid} is still draining")
+    return True
+
+
+def promote_server(url: str, token: str | None, leader: str | None = None) -> bool:
+    """Promote the replica at ``url`` to leader, or make it follow ``leader``."""
+    if not token:
+        print("An admin token is required (--token or MYTIMER_ADMIN_TOKEN)")
+        return False
+    base = url.rstrip("/")
+    headers = {"X-Auth-Token": token}
+    try:
+        if leader:
+            resp = requests.post(
+                f"{base}/replication/follow",
+                params={"leader": leader},
+                headers=headers,
+                timeout=10,
+            )
+        else:
+            resp = requests.post(f"{base}/replication/promote", headers=headers, timeout=10)
+    except requests.RequestException as exc:
+        print(f"Server not reachable at {base}: {exc}")
+        return False
+    if resp.status_code != 200:
+        print(f"Request failed ({resp.status_code}): {resp.text}")
+        return False
+    status = resp.json()
+    if leader:
+        print(f"{base} now follows {leader}")
+    elif status["promoted"]:
+        print(f"{base} promoted to leader at version {status['version']}")
+    else:
+        print(f"{base} already is a leader")
+    return True
 
 
 def stop_server() -> None:
@@ -157,11 +246,13 @@ def stop_server() -> None:
 
 
 def view_log() -> None:
-    """Display the contents of the server log file."""
-    if not LOG_FILE.exists():
+    """Display the server's JSON log followed by its raw process output."""
+    files = [path for path in (LOG_FILE, OUTPUT_FILE) if path.exists()]
+    if not files:
         print("No log file found")
         return
-    print(LOG_FILE.read_text())
+    for path in files:
+        print(path.read_text())
 
 
 def ensure_server(url: str) -> str | None:
@@ -260,9 +351,46 @@ def main() -> None:
 
     start_p = sub.add_parser("start", help="Start the API server")
     start_p.add_argument("--port", type=int, default=8000, help="Server port")
+    start_p.add_argument(
+        "--unix-socket",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PATH",
+        help="Also listen on a Unix socket (default path derived from the port)",
+    )
 
     sub.add_parser("stop", help="Stop the running API server")
 
+    reload_p = sub.add_parser(
+        "reload", help="Restart the API server without dropping connections"
+    )
+    reload_p.add_argument("--port", type=int, default=8000, help="Server port")
+    reload_p.add_argument(
+        "--unix-socket",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PATH",
+        help="Unix socket the server was started with",
+    )
+
+    promote_p = sub.add_parser(
+        "promote", help="Promote a replica to leader after the leader failed"
+    )
+    promote_p.add_argument("--url", default="http://127.0.0.1:8000", help="Replica base URL")
+    promote_p.add_argument(
+        "--token",
+        default=os.environ.get("MYTIMER_ADMIN_TOKEN"),
+        help="Admin token (default: MYTIMER_ADMIN_TOKEN)",
+    )
+    promote_p.add_argument(
+        "--follow",
+        default=None,
+        metavar="HOST:PORT",
+        help="Instead of promoting, replicate from this leader",
+    )
+
     sub.add_parser("log", help="Show the API server log output")
 
     sub.add_parser("test", help="Run all unit tests")
@@ -298,9 +426,19 @@ def main() -> None:
     elif args.command == "selfupdate":
         run_self_update()
     elif args.command == "start":
-        start_server(args.port)
+        unix_socket = args.unix_socket
+        if unix_socket == "":
+            unix_socket = default_socket_path(args.port)
+        start_server(args.port, unix_socket)
     elif args.command == "stop":
         stop_server()
+    elif args.command == "reload":
+        unix_socket = args.unix_socket
+        if unix_socket == "":
+            unix_socket = default_socket_path(args.port)
+        reload_server(args.port, unix_socket)
+    elif args.command == "promote":
+        promote_server(args.url, args.token, args.follow)
     elif args.command == "log":
         view_log()
     elif args.command == "test":